@@ -12,7 +12,19 @@ from src.core.config import get_settings
 from src.core.database import Base
 
 # Import all models to register them with Base.metadata
-from src.models import DailyUsage, User, Job, GeneratedImage, Preset  # noqa: F401
+from src.models import (  # noqa: F401
+    ArchivedJob,
+    Blob,
+    DailyUsage,
+    GeneratedImage,
+    IdempotencyKey,
+    Job,
+    Preset,
+    UploadedImage,
+    User,
+    UserStats,
+    WebhookDelivery,
+)
 
 config = context.config
 settings = get_settings()
@@ -0,0 +1,34 @@
+"""Add batch_id column to jobs table.
+
+Revision ID: 002_add_batch_id
+Revises: 001_add_model
+Create Date: 2026-10-19
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "002_add_batch_id"
+down_revision: str | None = "001_add_model"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add batch_id column to jobs table."""
+    op.add_column(
+        "jobs",
+        sa.Column("batch_id", sa.String(36), nullable=True),
+    )
+    op.create_index("ix_jobs_batch_id", "jobs", ["batch_id"])
+
+
+def downgrade() -> None:
+    """Remove batch_id column from jobs table."""
+    op.drop_index("ix_jobs_batch_id", table_name="jobs")
+    op.drop_column("jobs", "batch_id")
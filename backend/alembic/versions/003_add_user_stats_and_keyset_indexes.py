@@ -0,0 +1,68 @@
+"""Add user_stats counters and keyset pagination indexes.
+
+Revision ID: 003_user_stats_keyset
+Revises: 002_add_batch_id
+Create Date: 2026-10-19
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "003_user_stats_keyset"
+down_revision: str | None = "002_add_batch_id"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create user_stats, backfill it, and add (user_id, created_at DESC, id) indexes."""
+    op.create_table(
+        "user_stats",
+        sa.Column(
+            "user_id",
+            sa.String(36),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("job_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("image_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+    op.execute(
+        """
+        INSERT INTO user_stats (user_id, job_count, image_count, updated_at)
+        SELECT user_id, SUM(job_count), SUM(image_count), CURRENT_TIMESTAMP
+        FROM (
+            SELECT user_id, COUNT(*) AS job_count, 0 AS image_count
+            FROM jobs GROUP BY user_id
+            UNION ALL
+            SELECT user_id, 0 AS job_count, COUNT(*) AS image_count
+            FROM generated_images GROUP BY user_id
+        ) AS counts
+        GROUP BY user_id
+        """
+    )
+
+    op.create_index(
+        "ix_jobs_user_created_id",
+        "jobs",
+        ["user_id", sa.text("created_at DESC"), "id"],
+    )
+    op.create_index(
+        "ix_generated_images_user_created_id",
+        "generated_images",
+        ["user_id", sa.text("created_at DESC"), "id"],
+    )
+
+
+def downgrade() -> None:
+    """Drop keyset indexes and user_stats."""
+    op.drop_index("ix_generated_images_user_created_id", table_name="generated_images")
+    op.drop_index("ix_jobs_user_created_id", table_name="jobs")
+    op.drop_table("user_stats")
@@ -0,0 +1,56 @@
+"""Add callback_url to jobs and webhook_deliveries table.
+
+Revision ID: 004_webhooks
+Revises: 003_user_stats_keyset
+Create Date: 2026-10-19
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "004_webhooks"
+down_revision: str | None = "003_user_stats_keyset"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add callback_url column and webhook delivery log."""
+    op.add_column(
+        "jobs",
+        sa.Column("callback_url", sa.String(2000), nullable=True),
+    )
+    op.create_table(
+        "webhook_deliveries",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column(
+            "job_id",
+            sa.String(36),
+            sa.ForeignKey("jobs.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("url", sa.String(2000), nullable=False),
+        sa.Column("event", sa.String(50), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_status_code", sa.Integer(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("delivered_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_webhook_deliveries_job_id", "webhook_deliveries", ["job_id"])
+    op.create_index("ix_webhook_deliveries_status", "webhook_deliveries", ["status"])
+
+
+def downgrade() -> None:
+    """Remove webhook delivery log and callback_url column."""
+    op.drop_index("ix_webhook_deliveries_status", table_name="webhook_deliveries")
+    op.drop_index("ix_webhook_deliveries_job_id", table_name="webhook_deliveries")
+    op.drop_table("webhook_deliveries")
+    op.drop_column("jobs", "callback_url")
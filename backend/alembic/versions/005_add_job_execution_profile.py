@@ -0,0 +1,35 @@
+"""Add execution profile columns to jobs table.
+
+Revision ID: 005_job_profile
+Revises: 004_webhooks
+Create Date: 2026-10-19
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "005_job_profile"
+down_revision: str | None = "004_webhooks"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add timing breakdown and resource usage columns to jobs table."""
+    op.add_column("jobs", sa.Column("timings_json", sa.Text(), nullable=True))
+    op.add_column("jobs", sa.Column("cpu_seconds", sa.Float(), nullable=True))
+    op.add_column("jobs", sa.Column("peak_rss_bytes", sa.BigInteger(), nullable=True))
+    op.add_column("jobs", sa.Column("pipeline_cache_hit", sa.Boolean(), nullable=True))
+
+
+def downgrade() -> None:
+    """Remove execution profile columns from jobs table."""
+    op.drop_column("jobs", "pipeline_cache_hit")
+    op.drop_column("jobs", "peak_rss_bytes")
+    op.drop_column("jobs", "cpu_seconds")
+    op.drop_column("jobs", "timings_json")
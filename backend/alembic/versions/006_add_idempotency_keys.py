@@ -0,0 +1,46 @@
+"""Add idempotency_keys table.
+
+Revision ID: 006_idempotency_keys
+Revises: 005_job_profile
+Create Date: 2026-10-19
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "006_idempotency_keys"
+down_revision: str | None = "005_job_profile"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create idempotency_keys table."""
+    op.create_table(
+        "idempotency_keys",
+        sa.Column(
+            "user_id",
+            sa.String(36),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("key", sa.String(255), primary_key=True),
+        sa.Column("scope", sa.String(20), nullable=False),
+        sa.Column("request_hash", sa.String(64), nullable=False),
+        sa.Column("job_id", sa.String(36), nullable=True),
+        sa.Column("batch_id", sa.String(36), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+
+
+def downgrade() -> None:
+    """Drop idempotency_keys table."""
+    op.drop_index("ix_idempotency_keys_expires_at", table_name="idempotency_keys")
+    op.drop_table("idempotency_keys")
@@ -0,0 +1,89 @@
+"""Add jobs_archive table and partial index on pending jobs.
+
+Revision ID: 008_jobs_archive
+Revises: 007_mask_blobs
+Create Date: 2026-10-19
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "008_jobs_archive"
+down_revision: str | None = "007_mask_blobs"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create jobs_archive (partitioned by month on PostgreSQL) and ix_jobs_pending."""
+    op.create_table(
+        "jobs_archive",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.String(36),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("type", sa.String(20), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("prompt", sa.Text(), nullable=False),
+        sa.Column("negative_prompt", sa.Text(), nullable=True),
+        sa.Column("aspect_ratio", sa.String(20), nullable=False),
+        sa.Column("seed", sa.Integer(), nullable=True),
+        sa.Column("steps", sa.Integer(), nullable=False),
+        sa.Column("strength", sa.Float(), nullable=True),
+        sa.Column("model", sa.String(100), nullable=True),
+        sa.Column("batch_id", sa.String(36), nullable=True),
+        sa.Column("source_image_id", sa.String(36), nullable=True),
+        sa.Column("mask_hash", sa.String(64), nullable=True),
+        sa.Column("callback_url", sa.String(2000), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("timings_json", sa.Text(), nullable=True),
+        sa.Column("cpu_seconds", sa.Float(), nullable=True),
+        sa.Column("peak_rss_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("pipeline_cache_hit", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=False),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index("ix_jobs_archive_id", "jobs_archive", ["id"])
+    op.create_index("ix_jobs_archive_user_id", "jobs_archive", ["user_id"])
+    op.create_index("ix_jobs_archive_status", "jobs_archive", ["status"])
+    op.create_index("ix_jobs_archive_batch_id", "jobs_archive", ["batch_id"])
+    op.create_index("ix_jobs_archive_mask_hash", "jobs_archive", ["mask_hash"])
+    op.create_index(
+        "ix_jobs_archive_user_created_id",
+        "jobs_archive",
+        ["user_id", sa.text("created_at DESC"), "id"],
+    )
+
+    op.create_index(
+        "ix_jobs_pending",
+        "jobs",
+        ["created_at", "id"],
+        sqlite_where=sa.text("status = 'pending'"),
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    """Move archived jobs back to jobs and drop jobs_archive and ix_jobs_pending."""
+    op.drop_index("ix_jobs_pending", table_name="jobs")
+
+    columns = (
+        "id, user_id, type, status, prompt, negative_prompt, aspect_ratio, seed, steps, "
+        "strength, model, batch_id, source_image_id, mask_hash, callback_url, error_message, "
+        "timings_json, cpu_seconds, peak_rss_bytes, pipeline_cache_hit, created_at, "
+        "started_at, completed_at"
+    )
+    op.execute(f"INSERT INTO jobs ({columns}) SELECT {columns} FROM jobs_archive")
+
+    op.drop_table("jobs_archive")
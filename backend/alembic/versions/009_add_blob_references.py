@@ -0,0 +1,301 @@
+"""Add reference-counted blobs and move uploads to the blob store.
+
+Revision ID: 009_blob_refs
+Revises: 008_jobs_archive
+Create Date: 2026-10-19
+
+"""
+
+import hashlib
+import os
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from uuid import UUID
+
+import sqlalchemy as sa
+from PIL import Image
+
+from alembic import context, op
+from src.core.config import get_settings
+
+# revision identifiers, used by Alembic.
+revision: str = "009_blob_refs"
+down_revision: str | None = "008_jobs_archive"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+blobs = sa.table(
+    "blobs",
+    sa.column("hash", sa.String(64)),
+    sa.column("size", sa.Integer()),
+    sa.column("ref_count", sa.Integer()),
+    sa.column("created_at", sa.DateTime(timezone=True)),
+    sa.column("updated_at", sa.DateTime(timezone=True)),
+)
+uploaded_images = sa.table(
+    "uploaded_images",
+    sa.column("id", sa.String(36)),
+    sa.column("user_id", sa.String(36)),
+    sa.column("blob_hash", sa.String(64)),
+    sa.column("width", sa.Integer()),
+    sa.column("height", sa.Integer()),
+    sa.column("file_size", sa.Integer()),
+    sa.column("mime_type", sa.String(50)),
+    sa.column("created_at", sa.DateTime(timezone=True)),
+)
+users = sa.table("users", sa.column("id", sa.String(36)))
+
+
+def _generated_images_table(with_blob_hash: bool) -> sa.Table:
+    """
+    generated_images as it is on either side of this revision.
+
+    Offline SQLite migrations cannot reflect the table to rebuild it, so
+    the rebuild copies from this instead.
+    """
+    columns = [
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.String(36),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "job_id",
+            sa.String(36),
+            sa.ForeignKey("jobs.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("file_path", sa.String(500), nullable=False),
+        sa.Column("thumbnail_path", sa.String(500), nullable=True),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column("file_size", sa.Integer(), nullable=False),
+        sa.Column("mime_type", sa.String(50)),
+        sa.Column("prompt", sa.Text(), nullable=False),
+        sa.Column("negative_prompt", sa.Text(), nullable=True),
+        sa.Column("parameters_json", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Index("ix_generated_images_user_id", "user_id"),
+        sa.Index("ix_generated_images_job_id", "job_id"),
+        sa.Index("ix_generated_images_expires_at", "expires_at"),
+    ]
+    if with_blob_hash:
+        columns.append(
+            sa.Column(
+                "blob_hash",
+                sa.String(64),
+                sa.ForeignKey("blobs.hash", name="fk_generated_images_blob_hash"),
+                nullable=True,
+            )
+        )
+    return sa.Table("generated_images", sa.MetaData(), *columns)
+
+
+def _blob_path(digest: str) -> Path:
+    """Path of a blob in BLOB_DIR, laid out as the local blob store was at this revision."""
+    return Path(get_settings().blob_dir) / digest[:2] / digest[2:4] / digest
+
+
+def _write_blob(data: bytes) -> str:
+    """Write a payload under its SHA-256 digest if it is not there yet; returns the digest."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = _blob_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".tmp-{digest}")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+    return digest
+
+
+def _blob_size(digest: str) -> int | None:
+    try:
+        return _blob_path(digest).stat().st_size
+    except FileNotFoundError:
+        return None
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+@contextmanager
+def _alter_generated_images(with_blob_hash: bool) -> Iterator:
+    """
+    Batch-alter generated_images.
+
+    SQLite cannot add or drop foreign keys in place and rebuilds the table,
+    which would lose the DESC of the keyset index, so that index is
+    recreated around the rebuild. ``with_blob_hash`` tells whether the
+    table has blob_hash before the change.
+    """
+    sqlite = context.get_context().dialect.name == "sqlite"
+    copy_from = None
+    if sqlite:
+        op.drop_index("ix_generated_images_user_created_id", table_name="generated_images")
+        if context.is_offline_mode():
+            copy_from = _generated_images_table(with_blob_hash)
+    with op.batch_alter_table("generated_images", copy_from=copy_from) as batch_op:
+        yield batch_op
+    if sqlite:
+        op.create_index(
+            "ix_generated_images_user_created_id",
+            "generated_images",
+            ["user_id", sa.text("created_at DESC"), "id"],
+        )
+
+
+def upgrade() -> None:
+    """
+    Create blobs and uploaded_images, import uploaded files into BLOB_DIR
+    and count existing references to mask blobs.
+
+    Generated images saved before this revision keep their files and have no
+    blob_hash. Imported upload files are left in place, so a failed
+    migration loses nothing; the storage sweeper deletes them later. Offline
+    (``--sql``) runs only change the schema. With the S3 storage backend,
+    copy BLOB_DIR to the bucket afterwards.
+    """
+    op.create_table(
+        "blobs",
+        sa.Column("hash", sa.String(64), primary_key=True),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_blobs_ref_count", "blobs", ["ref_count"])
+
+    op.create_table(
+        "uploaded_images",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.String(36),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("blob_hash", sa.String(64), sa.ForeignKey("blobs.hash"), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column("file_size", sa.Integer(), nullable=False),
+        sa.Column("mime_type", sa.String(50), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_uploaded_images_user_id", "uploaded_images", ["user_id"])
+    op.create_index("ix_uploaded_images_blob_hash", "uploaded_images", ["blob_hash"])
+
+    with _alter_generated_images(with_blob_hash=False) as batch_op:
+        batch_op.add_column(sa.Column("blob_hash", sa.String(64), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_generated_images_blob_hash", "blobs", ["blob_hash"], ["hash"]
+        )
+    op.create_index("ix_generated_images_blob_hash", "generated_images", ["blob_hash"])
+
+    if context.is_offline_mode():
+        return
+
+    connection = op.get_bind()
+    refs: Counter[str] = Counter()
+    sizes: dict[str, int] = {}
+
+    # Uploads were stored as {upload_dir}/{user_id}/{image_id}.png
+    upload_dir = Path(get_settings().upload_dir)
+    user_ids = set(connection.execute(sa.select(users.c.id)).scalars())
+    for path in sorted(upload_dir.glob("*/*.png")):
+        user_id, image_id = path.parent.name, path.stem
+        if user_id not in user_ids or not _is_uuid(image_id):
+            continue
+        data = path.read_bytes()
+        try:
+            with Image.open(path) as image:
+                width, height = image.size
+        except OSError:
+            continue
+
+        digest = _write_blob(data)
+        refs[digest] += 1
+        sizes[digest] = len(data)
+        connection.execute(
+            uploaded_images.insert().values(
+                id=image_id,
+                user_id=user_id,
+                blob_hash=digest,
+                width=width,
+                height=height,
+                file_size=len(data),
+                mime_type="image/png",
+                created_at=datetime.fromtimestamp(path.stat().st_mtime, UTC),
+            )
+        )
+
+    # Each live job referencing a mask holds a reference to its blob;
+    # archived jobs are never run again and hold none
+    mask_hash = sa.column("mask_hash", sa.String(64))
+    rows = connection.execute(
+        sa.select(mask_hash, sa.func.count())
+        .select_from(sa.table("jobs", mask_hash))
+        .where(mask_hash.is_not(None))
+        .group_by(mask_hash)
+    )
+    for digest, count in rows.all():
+        size = _blob_size(digest)
+        if size is None:
+            continue
+        sizes[digest] = size
+        refs[digest] += count
+
+    now = datetime.now(UTC)
+    if refs:
+        op.bulk_insert(
+            blobs,
+            [
+                {
+                    "hash": digest,
+                    "size": sizes[digest],
+                    "ref_count": count,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for digest, count in refs.items()
+            ],
+        )
+
+
+def downgrade() -> None:
+    """Write uploads back to upload_dir and drop the blob tables; blobs are left in place."""
+    if not context.is_offline_mode():
+        connection = op.get_bind()
+        upload_dir = Path(get_settings().upload_dir)
+        rows = connection.execute(
+            sa.select(uploaded_images.c.id, uploaded_images.c.user_id, uploaded_images.c.blob_hash)
+        )
+        for image_id, user_id, digest in rows.all():
+            try:
+                data = _blob_path(digest).read_bytes()
+            except FileNotFoundError:
+                continue
+            path = upload_dir / user_id / f"{image_id}.png"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+
+    op.drop_index("ix_generated_images_blob_hash", table_name="generated_images")
+    with _alter_generated_images(with_blob_hash=True) as batch_op:
+        batch_op.drop_constraint("fk_generated_images_blob_hash", type_="foreignkey")
+        batch_op.drop_column("blob_hash")
+
+    op.drop_index("ix_uploaded_images_blob_hash", table_name="uploaded_images")
+    op.drop_index("ix_uploaded_images_user_id", table_name="uploaded_images")
+    op.drop_table("uploaded_images")
+    op.drop_index("ix_blobs_ref_count", table_name="blobs")
+    op.drop_table("blobs")
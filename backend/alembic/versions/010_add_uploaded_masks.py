@@ -0,0 +1,54 @@
+"""Add uploaded_masks table.
+
+Revision ID: 010_uploaded_masks
+Revises: 009_blob_refs
+Create Date: 2026-10-19
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "010_uploaded_masks"
+down_revision: str | None = "009_blob_refs"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """
+    Create uploaded_masks.
+
+    Masks uploaded before this revision were only blobs with no owner; they
+    are left to blob collection, and clients upload them again.
+    """
+    op.create_table(
+        "uploaded_masks",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.String(36),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("blob_hash", sa.String(64), sa.ForeignKey("blobs.hash"), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column("file_size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_uploaded_masks_user_id", "uploaded_masks", ["user_id"])
+    op.create_index("ix_uploaded_masks_blob_hash", "uploaded_masks", ["blob_hash"])
+    op.create_index("ix_uploaded_masks_created_at", "uploaded_masks", ["created_at"])
+
+
+def downgrade() -> None:
+    """Drop uploaded_masks; their blob references are released by hand if needed."""
+    op.drop_index("ix_uploaded_masks_created_at", table_name="uploaded_masks")
+    op.drop_index("ix_uploaded_masks_blob_hash", table_name="uploaded_masks")
+    op.drop_index("ix_uploaded_masks_user_id", table_name="uploaded_masks")
+    op.drop_table("uploaded_masks")
@@ -0,0 +1,131 @@
+"""Responses serving stored image files."""
+
+import re
+from pathlib import Path
+
+from fastapi import Request, status
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+
+from src.core.config import get_settings
+from src.models.image import GeneratedImage
+from src.services.blob_store import get_blob_store
+
+settings = get_settings()
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single-range ``Range`` header into inclusive (start, end).
+
+    Returns None when the whole file should be sent: no header, or a form
+    this server does not handle such as multiple ranges.
+
+    Raises:
+        ValueError: If the range cannot be satisfied
+    """
+    match = _RANGE_PATTERN.match(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _content_disposition(filename: str | None) -> dict[str, str]:
+    return {"Content-Disposition": f'attachment; filename="{filename}"'} if filename else {}
+
+
+async def blob_response(
+    request: Request,
+    digest: str,
+    media_type: str,
+    filename: str | None = None,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    Serve a blob from the storage backend.
+
+    Local blobs are sent as files. Remote blobs are streamed through this
+    server, honouring a single-range ``Range`` header, or, with
+    ``STORAGE_PRESIGN_DOWNLOADS``, the client is redirected to a presigned
+    URL and downloads straight from the bucket.
+
+    Raises:
+        FileNotFoundError: If the blob is missing
+    """
+    blob_store = get_blob_store()
+    headers = dict(headers or {})
+
+    path = blob_store.local_path(digest)
+    if path is not None:
+        if not path.exists():
+            raise FileNotFoundError(digest)
+        return FileResponse(path=path, media_type=media_type, filename=filename, headers=headers)
+
+    if settings.storage_presign_downloads:
+        url = await blob_store.presign(
+            digest, settings.storage_presign_seconds, filename, media_type
+        )
+        if url:
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers=headers)
+
+    size = await blob_store.size(digest)
+    if size is None:
+        raise FileNotFoundError(digest)
+
+    headers.update(_content_disposition(filename))
+    headers["Accept-Ranges"] = "bytes"
+    try:
+        byte_range = _parse_range(request.headers.get("range"), size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{size}"
+        # Starlette renamed this status constant; the code works with every version
+        return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(blob_store.stream(digest), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        blob_store.stream(digest, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+async def generated_image_response(
+    request: Request,
+    image: GeneratedImage,
+    filename: str | None = None,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    Serve a generated image's file.
+
+    Images saved before blob storage have no ``blob_hash`` and are served
+    from their local ``file_path``.
+
+    Raises:
+        FileNotFoundError: If the image's file or blob is missing
+    """
+    if image.blob_hash:
+        return await blob_response(request, image.blob_hash, image.mime_type, filename, headers)
+
+    path = Path(image.file_path)
+    if not path.exists():
+        raise FileNotFoundError(image.file_path)
+    return FileResponse(path=path, media_type=image.mime_type, filename=filename, headers=headers)
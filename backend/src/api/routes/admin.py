@@ -0,0 +1,43 @@
+"""Admin API routes."""
+
+from fastapi import APIRouter, Query
+
+from src.api.deps import AdminUser, DbSession
+from src.models.job import JobStatus
+from src.schemas.admin import JobTimingStatsResponse, StorageSweepReport
+from src.services.job_stats_service import JobStatsService
+from src.services.storage_sweep_service import get_storage_sweep_service
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get(
+    "/jobs/timings",
+    response_model=JobTimingStatsResponse,
+    summary="Get job timing percentiles",
+)
+async def get_job_timings(
+    admin_user: AdminUser,
+    db: DbSession,
+    days: int = Query(7, ge=1, le=90),
+    job_status: JobStatus = Query(JobStatus.COMPLETED, alias="status"),
+) -> JobTimingStatsResponse:
+    """
+    Get p50/p90/p99 of per-phase timings, CPU time and peak RSS of finished
+    jobs, grouped by model and task.
+    """
+    items = await JobStatsService(db).get_timing_stats(days=days, status=job_status)
+    return JobTimingStatsResponse(days=days, status=job_status.value, items=items)
+
+
+@router.post(
+    "/storage/sweep",
+    response_model=StorageSweepReport,
+    summary="Sweep expired images and orphan files now",
+)
+async def sweep_storage(admin_user: AdminUser) -> StorageSweepReport:
+    """
+    Delete expired images and unreferenced blobs, reconcile the next
+    directories of the orphan scan, and report the bytes reclaimed.
+    """
+    return await get_storage_sweep_service().sweep()
@@ -1,26 +1,38 @@
 """Images API routes."""
 
 import logging
-from io import BytesIO
 from math import ceil
 from pathlib import Path
-from uuid import uuid4
+from typing import Literal
 
-from fastapi import APIRouter, File, HTTPException, Query, UploadFile, status
-from fastapi.responses import FileResponse
-from PIL import Image
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import select
 
 from src.api.deps import CurrentUser, DbSession
+from src.api.files import blob_response, generated_image_response
+from src.api.uploads import receive_upload
 from src.core.config import get_settings
+from src.core.pagination import after_cursor, encode_cursor
+from src.models.image import GeneratedImage
+from src.models.uploaded_image import UploadedImage
 from src.schemas.image import (
     ImageDownloadResponse,
     ImageListResponse,
     ImageResponse,
     ImageUploadResponse,
 )
+from src.services.blob_service import BlobService
+from src.services.image_encoding import (
+    FORMATS,
+    extension_for_mime_type,
+    mime_type_for_path,
+    negotiate_format,
+    resolve_format,
+)
 from src.services.image_service import get_image_service
-from sqlalchemy import func, select
-from src.models.image import GeneratedImage
+from src.services.render_service import get_render_service
+from src.services.user_stats_service import UserStatsService
 
 router = APIRouter(prefix="/images", tags=["Images"])
 logger = logging.getLogger(__name__)
@@ -28,7 +40,9 @@ settings = get_settings()
 
 # Allowed image types
 ALLOWED_MIME_TYPES = {"image/jpeg", "image/png", "image/webp"}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_FILE_SIZE = settings.max_image_size_mb * 1024 * 1024
+
+DEFAULT_RENDER_FORMAT = resolve_format(settings.thumbnail_format)
 
 
 @router.post(
@@ -36,77 +50,70 @@ MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     response_model=ImageUploadResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Upload an image for img2img or inpainting",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                    }
+                }
+            },
+        }
+    },
 )
 async def upload_image(
-    file: UploadFile = File(...),
-    current_user: CurrentUser = None,
+    request: Request,
+    current_user: CurrentUser,
+    db: DbSession,
 ) -> ImageUploadResponse:
     """
     Upload an image to use as source for img2img or inpainting.
 
-    Returns the image ID to use as source_image_id in job creation.
+    Returns the image ID to use as source_image_id in job creation. Uploads
+    with identical content share one stored file. The file is streamed to
+    disk and rejected as soon as it exceeds the size limit; large images
+    are stored downscaled.
     """
-    # Validate content type
-    if file.content_type not in ALLOWED_MIME_TYPES:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_MIME_TYPES)}",
-        )
-
-    # Read file content
-    content = await file.read()
-
-    # Validate file size
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB",
-        )
-
-    # Validate image
+    file = await receive_upload(request, "file", MAX_FILE_SIZE)
     try:
-        image = Image.open(BytesIO(content))
-        image.verify()  # Verify it's a valid image
-        # Re-open for actual use (verify() can only be called once)
-        image = Image.open(BytesIO(content))
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid or corrupted image file",
-        )
-
-    # Generate unique ID
-    image_id = str(uuid4())
-
-    # Create user upload directory
-    upload_dir = Path(settings.upload_dir) / current_user.id
-    upload_dir.mkdir(parents=True, exist_ok=True)
-
-    # Save the image as PNG
-    file_path = upload_dir / f"{image_id}.png"
-
-    # Convert to RGB if needed (handle RGBA, P mode, etc.)
-    if image.mode in ("RGBA", "P", "LA"):
-        # Create white background for transparency
-        background = Image.new("RGB", image.size, (255, 255, 255))
-        if image.mode == "P":
-            image = image.convert("RGBA")
-        background.paste(image, mask=image.split()[-1] if "A" in image.mode else None)
-        image = background
-    elif image.mode != "RGB":
-        image = image.convert("RGB")
-
-    image.save(file_path, format="PNG", optimize=True)
-    file_size = file_path.stat().st_size
-
-    logger.info(f"User {current_user.id} uploaded image {image_id} ({image.width}x{image.height})")
+        # Validate content type
+        if file.content_type not in ALLOWED_MIME_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_MIME_TYPES)}",
+            )
+
+        # Validate, convert to RGB and save as PNG off the event loop
+        try:
+            saved, data = await get_image_service().save_uploaded_image(file.file)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            ) from e
+    finally:
+        await file.close()
+
+    await BlobService(db).store(data, content_type=saved["mime_type"])
+    uploaded_image = UploadedImage(user_id=current_user.id, **saved)
+    db.add(uploaded_image)
+    await db.commit()
+
+    logger.info(
+        f"User {current_user.id} uploaded image {uploaded_image.id} "
+        f"({uploaded_image.width}x{uploaded_image.height})"
+    )
 
     return ImageUploadResponse(
-        id=image_id,
-        width=image.width,
-        height=image.height,
-        file_size=file_size,
-        mime_type="image/png",
+        id=uploaded_image.id,
+        width=uploaded_image.width,
+        height=uploaded_image.height,
+        file_size=uploaded_image.file_size,
+        mime_type=uploaded_image.mime_type,
     )
 
 
@@ -116,22 +123,31 @@ async def upload_image(
 )
 async def get_uploaded_image(
     image_id: str,
+    request: Request,
     current_user: CurrentUser,
+    db: DbSession,
 ):
     """Get an uploaded image by ID."""
-    upload_dir = Path(settings.upload_dir) / current_user.id
-    file_path = upload_dir / f"{image_id}.png"
-
-    if not file_path.exists():
+    result = await db.execute(
+        select(UploadedImage).where(
+            UploadedImage.id == image_id,
+            UploadedImage.user_id == current_user.id,
+        )
+    )
+    uploaded_image = result.scalar_one_or_none()
+    if uploaded_image is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Uploaded image not found",
         )
 
-    return FileResponse(
-        path=file_path,
-        media_type="image/png",
-    )
+    try:
+        return await blob_response(request, uploaded_image.blob_hash, uploaded_image.mime_type)
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Uploaded image not found",
+        ) from e
 
 
 @router.get(
@@ -144,28 +160,57 @@ async def get_images(
     db: DbSession,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="next_cursor from a previous page"),
 ) -> ImageListResponse:
-    """Get paginated list of user's generated images."""
-    query = select(GeneratedImage).where(GeneratedImage.user_id == current_user.id)
+    """
+    Get paginated list of user's generated images.
 
-    # Count total
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+    Pass the ``next_cursor`` of a response as ``cursor`` to fetch the following
+    page by keyset instead of offset; ``page`` is ignored when a cursor is given.
+    """
+    total_column = UserStatsService.image_count(current_user.id)
+    query = select(GeneratedImage, total_column).where(
+        GeneratedImage.user_id == current_user.id
+    )
 
-    # Get paginated results
-    query = query.order_by(GeneratedImage.created_at.desc())
-    query = query.offset((page - 1) * page_size).limit(page_size)
+    if cursor:
+        try:
+            query = query.where(
+                after_cursor(GeneratedImage.created_at, GeneratedImage.id, cursor)
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            ) from e
+    else:
+        query = query.offset((page - 1) * page_size)
+
+    # Fetch one extra row to tell whether there is a next page
+    query = query.order_by(GeneratedImage.created_at.desc(), GeneratedImage.id.desc())
+    query = query.limit(page_size + 1)
 
     result = await db.execute(query)
-    images = list(result.scalars().all())
+    rows = result.all()
+
+    if rows:
+        total = rows[0][1]
+    else:
+        total = (await db.execute(select(total_column))).scalar() or 0
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last_image = rows[-1][0]
+        next_cursor = encode_cursor(last_image.created_at, last_image.id)
 
     return ImageListResponse(
-        items=[ImageResponse.model_validate(img) for img in images],
+        items=[ImageResponse.model_validate(img) for img, _ in rows],
         total=total,
         page=page,
         page_size=page_size,
         total_pages=ceil(total / page_size) if total > 0 else 1,
+        next_cursor=next_cursor,
     )
 
 
@@ -203,6 +248,7 @@ async def get_image(
 )
 async def download_image(
     image_id: str,
+    request: Request,
     current_user: CurrentUser,
     db: DbSession,
 ):
@@ -221,17 +267,47 @@ async def download_image(
             detail="Image not found",
         )
 
-    file_path = Path(image.file_path)
-    if not file_path.exists():
+    try:
+        return await generated_image_response(
+            request,
+            image,
+            filename=f"imageplayground_{image_id}.{extension_for_mime_type(image.mime_type)}",
+        )
+    except FileNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Image file not found",
+        ) from e
+
+
+async def _rendered(
+    image: GeneratedImage,
+    width: int | None,
+    height: int | None,
+    fit: str,
+    format: str,
+) -> Response:
+    """Serve a derivative of an image from the render cache."""
+    try:
+        rendered = await get_render_service().render(
+            # Images with identical bytes share their derivatives
+            image.blob_hash or image.id,
+            lambda: get_image_service().read_generated_image(image),
+            width,
+            height,
+            fit,
+            format,
         )
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image file not found",
+        ) from e
 
-    return FileResponse(
-        path=file_path,
-        media_type=image.mime_type,
-        filename=f"imageplayground_{image_id}.png",
+    return Response(
+        content=rendered,
+        media_type=FORMATS[format].mime_type,
+        headers={"Vary": "Accept", "Cache-Control": "private, max-age=86400"},
     )
 
 
@@ -243,8 +319,9 @@ async def get_thumbnail(
     image_id: str,
     current_user: CurrentUser,
     db: DbSession,
+    accept: str | None = Header(None),
 ):
-    """Get the thumbnail for an image."""
+    """Get the thumbnail for an image, in a format the client accepts."""
     result = await db.execute(
         select(GeneratedImage).where(
             GeneratedImage.id == image_id,
@@ -259,18 +336,64 @@ async def get_thumbnail(
             detail="Image not found",
         )
 
-    thumb_path = Path(image.thumbnail_path) if image.thumbnail_path else None
-    if not thumb_path or not thumb_path.exists():
-        # Fall back to main image
-        thumb_path = Path(image.file_path)
+    # Images saved before thumbnails were rendered on demand keep their file
+    if image.thumbnail_path and Path(image.thumbnail_path).exists():
+        return FileResponse(
+            path=image.thumbnail_path,
+            media_type=mime_type_for_path(image.thumbnail_path),
+        )
+
+    size = settings.thumbnail_size
+    return await _rendered(
+        image, size, size, "contain", negotiate_format(accept, DEFAULT_RENDER_FORMAT)
+    )
+
 
-    if not thumb_path.exists():
+@router.get(
+    "/{image_id}/render",
+    summary="Get a resized derivative of an image",
+)
+async def render_image(
+    image_id: str,
+    current_user: CurrentUser,
+    db: DbSession,
+    w: int | None = Query(None, ge=1, le=settings.render_max_dimension, description="Width"),
+    h: int | None = Query(None, ge=1, le=settings.render_max_dimension, description="Height"),
+    fit: Literal["contain", "cover", "fill"] = Query("contain"),
+    format: str | None = Query(None, description="png, webp, jpeg or avif; defaults to the Accept header"),
+    accept: str | None = Header(None),
+):
+    """
+    Render a resized copy of an image.
+
+    ``contain`` fits the image inside ``w``x``h`` without upscaling,
+    ``cover`` fills the box and crops the overflow, and ``fill`` stretches
+    the image to the box. Without ``format`` the response format is
+    negotiated from the ``Accept`` header. Renders are cached.
+    """
+    if format is not None:
+        try:
+            format = resolve_format(format)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            ) from e
+    else:
+        format = negotiate_format(accept, DEFAULT_RENDER_FORMAT)
+
+    result = await db.execute(
+        select(GeneratedImage).where(
+            GeneratedImage.id == image_id,
+            GeneratedImage.user_id == current_user.id,
+        )
+    )
+    image = result.scalar_one_or_none()
+
+    if not image:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Thumbnail not found",
+            detail="Image not found",
         )
 
-    return FileResponse(
-        path=thumb_path,
-        media_type="image/png",
-    )
+    return await _rendered(image, w, h, fit, format)
@@ -1,39 +1,54 @@
 """Jobs API routes."""
 
+import asyncio
+import json
 import logging
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
 from math import ceil
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, status
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 
 from src.api.deps import CurrentUser, DbSession
-from src.models.job import JobStatus
-from src.schemas.job import CreateJobRequest, JobListResponse, JobResponse
-from src.services.job_service import JobService
+from src.api.files import generated_image_response
+from src.api.uploads import receive_upload
+from src.core.config import get_settings
+from src.core.database import async_session_maker
+from src.core.metrics import jobs_rejected_total
+from src.models.image import GeneratedImage
+from src.models.job import TERMINAL_STATUSES, Job, JobStatus
+from src.models.uploaded_mask import UploadedMask
+from src.schemas.job import (
+    BatchResponse,
+    CreateBatchRequest,
+    CreateJobRequest,
+    JobEvent,
+    JobListResponse,
+    JobResponse,
+    MaskUploadResponse,
+    WebhookDeliveryResponse,
+)
+from src.services.blob_service import BlobService
+from src.services.event_bus import get_event_bus, user_channel
+from src.services.idempotency_service import (
+    MAX_KEY_LENGTH,
+    IdempotencyKeyMismatchError,
+    IdempotencyService,
+    request_hash,
+)
+from src.services.image_service import get_image_service
+from src.services.job_queue import JobQueue, QueueFullError, get_job_queue
+from src.services.job_service import InvalidMaskError, JobService, PendingJobLimitError
+from src.services.quota_service import QuotaExceededError
+from src.services.webhook_service import UnsafeCallbackError, get_webhook_service
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
-
-async def process_job_background(job_id: str, user_id: str, db_url: str):
-    """Background task to process a job."""
-    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-
-    from src.services.job_service import JobService
-
-    engine = create_async_engine(db_url)
-    async with AsyncSession(engine, expire_on_commit=False) as session:
-        job_service = JobService(session)
-        job = await job_service.get_job(job_id, user_id)
-
-        if job:
-            if job.type == "text2img":
-                await job_service.process_text_to_image(job)
-            elif job.type == "img2img":
-                await job_service.process_image_to_image(job)
-            elif job.type == "inpaint":
-                await job_service.process_inpaint(job)
-
-    await engine.dispose()
+MAX_MASK_SIZE = settings.max_image_size_mb * 1024 * 1024
 
 
 @router.post(
@@ -41,45 +56,440 @@ async def process_job_background(job_id: str, user_id: str, db_url: str):
     response_model=JobResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Create a new image generation job",
+    responses={
+        200: {
+            "content": {"image/*": {}},
+            "description": "Result image (wait mode), or the job of a replayed Idempotency-Key",
+        },
+        202: {"model": JobResponse, "description": "Wait timed out before completion"},
+    },
 )
 async def create_job(
     request: CreateJobRequest,
-    background_tasks: BackgroundTasks,
     current_user: CurrentUser,
     db: DbSession,
-) -> JobResponse:
+    response: Response,
+    http_request: Request,
+    wait: float | None = Query(
+        None,
+        gt=0,
+        description="Seconds to wait for the job to finish before responding",
+    ),
+    accept: str | None = Header(None),
+    idempotency_key: str | None = Header(None, max_length=MAX_KEY_LENGTH),
+) -> JobResponse | Response:
     """
     Create a new image generation job.
 
     The job will be processed asynchronously in the background.
     Poll the job status endpoint to check for completion.
+
+    With ``wait``, the request is held until the job finishes or the wait
+    (capped at ``max_job_wait_seconds``) expires. A finished job is returned
+    with its result image ID, or, if the request accepts ``image/*``, as the
+    encoded image itself. If the wait expires the job is returned as it
+    stands with status 202.
+
+    With an ``Idempotency-Key`` header, repeating the request returns the
+    job created by the first one (status 200, ``Idempotent-Replayed: true``)
+    instead of creating and queueing another.
     """
     job_service = JobService(db)
+    job_queue = get_job_queue()
+    fingerprint = request_hash("job", request)
+
+    async with AsyncExitStack() as stack:
+        events = None
+        job_ids: set[str] = set()
+        if wait:
+            # Subscribe before queueing so the completion event cannot be missed
+            events = await stack.enter_async_context(
+                get_event_bus().subscribe(user_channel(current_user.id), job_ids)
+            )
+
+        estimated_wait = None
+        replayed = await _replayed_job(
+            job_service, current_user.id, idempotency_key, fingerprint
+        )
+        if replayed is None:
+            try:
+                job = await job_service.create_job(current_user.id, request, idempotency_key)
+                job_ids.add(job.id)
+                await job_service.publish_job_event(job)
+
+                # Queue for background processing
+                [estimated_wait] = await job_queue.enqueue([job])
+                result_image_id = None
+
+                logger.info(f"Job {job.id} created and queued for processing")
+
+            except IntegrityError:
+                # A concurrent request with the same Idempotency-Key won
+                await db.rollback()
+                replayed = await _replayed_job(
+                    job_service, current_user.id, idempotency_key, fingerprint
+                )
+                if replayed is None:
+                    raise
+            except QueueFullError as e:
+                raise _queue_full_error(e) from e
+            except PendingJobLimitError as e:
+                raise _pending_limit_error(job_queue, e) from e
+            except (InvalidMaskError, UnsafeCallbackError) as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e),
+                ) from e
+            except ValueError as e:
+                jobs_rejected_total.inc(reason="quota")
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=str(e),
+                ) from e
+
+        if replayed is not None:
+            job, result_image_id = replayed
+            job_ids.add(job.id)
+            response.status_code = status.HTTP_200_OK
+            response.headers["Idempotent-Replayed"] = "true"
+
+        latest = None
+        if events is not None and JobStatus(job.status) not in TERMINAL_STATUSES:
+            latest = await _wait_for_job(events, job.id, min(wait, settings.max_job_wait_seconds))
+            if latest is None or latest.status not in TERMINAL_STATUSES:
+                # Events can be lost, e.g. while the event bus reconnects
+                row = await job_service.get_job_with_result(job.id, current_user.id, refresh=True)
+                if row:
+                    job, result_image_id = row
+                    latest = None
+
+    job_response = job_service.to_response(job, result_image_id)
+    if estimated_wait is not None:
+        job_response.estimated_wait_seconds = round(estimated_wait, 1)
+    if latest is not None:
+        job_response = job_response.model_copy(
+            update=latest.model_dump(include=JOB_EVENT_FIELDS)
+        )
+
+    if events is None:
+        return job_response
+
+    if job_response.status not in TERMINAL_STATUSES:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return job_response
+
+    if job_response.result_image_id and accept and "image/" in accept:
+        image = await db.get(GeneratedImage, job_response.result_image_id)
+        if image:
+            try:
+                return await generated_image_response(
+                    http_request,
+                    image,
+                    headers={"X-Job-Id": job.id, "X-Image-Id": image.id},
+                )
+            except FileNotFoundError:
+                pass
+
+    return job_response
+
+
+async def _replayed_job(
+    job_service: JobService,
+    user_id: str,
+    idempotency_key: str | None,
+    fingerprint: str,
+) -> tuple[Job, str | None] | None:
+    """
+    Find the job created by an earlier request with the same Idempotency-Key.
+
+    Returns:
+        The job and its result image ID, or None if there is no such request
+    """
+    if not idempotency_key:
+        return None
 
     try:
-        job = await job_service.create_job(current_user.id, request)
-        await db.commit()
-
-        # Add background task for processing
-        from src.core.config import get_settings
-
-        settings = get_settings()
-        background_tasks.add_task(
-            process_job_background,
-            job.id,
-            current_user.id,
-            settings.database_url,
+        record = await IdempotencyService(job_service.db).lookup(
+            user_id, idempotency_key, "job", fingerprint
         )
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        ) from e
+    if record is None or record.job_id is None:
+        return None
+    return await job_service.get_job_with_result(record.job_id, user_id)
 
-        logger.info(f"Job {job.id} created and queued for processing")
-        return job_service.to_response(job)
 
-    except ValueError as e:
+def _queue_full_error(error: QueueFullError) -> HTTPException:
+    """503 with Retry-After while the job queue is too long."""
+    jobs_rejected_total.inc(reason="queue_full")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def _pending_limit_error(job_queue: JobQueue, error: PendingJobLimitError) -> HTTPException:
+    """429 for a user at the pending-job cap, retried once about one job has run."""
+    jobs_rejected_total.inc(reason="pending_limit")
+    retry_after = job_queue.average_duration / job_queue.concurrency
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(error),
+        headers={"Retry-After": str(max(ceil(retry_after), 1))},
+    )
+
+
+# Fields of a job response that a JobEvent can update
+JOB_EVENT_FIELDS = {"status", "result_image_id", "error_message", "started_at", "completed_at"}
+
+
+async def _wait_for_job(
+    events: asyncio.Queue[dict],
+    job_id: str,
+    timeout: float,
+) -> JobEvent | None:
+    """
+    Wait on a subscription for a job to reach a terminal status.
+
+    Returns:
+        The latest event seen for the job (terminal unless the wait timed
+        out), or None if no event arrived in time
+    """
+    latest: JobEvent | None = None
+    deadline = asyncio.get_running_loop().time() + timeout
+
+    while True:
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            return latest
+        try:
+            event = await asyncio.wait_for(events.get(), remaining)
+        except TimeoutError:
+            return latest
+
+        if event["job_id"] != job_id:
+            continue
+        latest = JobEvent.model_validate(event)
+        if latest.status in TERMINAL_STATUSES:
+            return latest
+
+
+@router.post(
+    "/batch",
+    response_model=BatchResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create a batch of image generation jobs",
+)
+async def create_batch(
+    request: CreateBatchRequest,
+    current_user: CurrentUser,
+    db: DbSession,
+    response: Response,
+    idempotency_key: str | None = Header(None, max_length=MAX_KEY_LENGTH),
+) -> BatchResponse:
+    """
+    Create many jobs at once, from an explicit list or a parameter matrix.
+
+    All jobs are inserted in one statement under a shared batch ID and queued
+    together so that jobs using the same model run back to back. With an
+    ``Idempotency-Key`` header, repeating the request returns the original
+    batch (status 200) without creating new jobs.
+    """
+    job_service = JobService(db)
+    job_queue = get_job_queue()
+    fingerprint = request_hash("batch", request)
+
+    replayed = await _replayed_batch(job_service, current_user.id, idempotency_key, fingerprint)
+    if replayed is not None:
+        response.status_code = status.HTTP_200_OK
+        response.headers["Idempotent-Replayed"] = "true"
+        return replayed
+
+    try:
+        batch_id, jobs = await job_service.create_batch(
+            current_user.id, request, idempotency_key
+        )
+    except IntegrityError:
+        # A concurrent request with the same Idempotency-Key won
+        await db.rollback()
+        replayed = await _replayed_batch(
+            job_service, current_user.id, idempotency_key, fingerprint
+        )
+        if replayed is None:
+            raise
+        response.status_code = status.HTTP_200_OK
+        response.headers["Idempotent-Replayed"] = "true"
+        return replayed
+    except QueueFullError as e:
+        raise _queue_full_error(e) from e
+    except PendingJobLimitError as e:
+        raise _pending_limit_error(job_queue, e) from e
+    except QuotaExceededError as e:
+        jobs_rejected_total.inc(reason="quota")
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=str(e),
+        ) from e
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+
+    for job in jobs:
+        await job_service.publish_job_event(job)
+    estimated_waits = await job_queue.enqueue(jobs)
+
+    logger.info(f"Batch {batch_id} created and queued with {len(jobs)} jobs")
+    batch_response = _batch_response(job_service, batch_id, [(job, None) for job in jobs])
+    for item, estimated_wait in zip(batch_response.items, estimated_waits, strict=True):
+        item.estimated_wait_seconds = round(estimated_wait, 1)
+    return batch_response
+
+
+@router.post(
+    "/masks",
+    response_model=MaskUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Upload an inpainting mask",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                    }
+                }
+            },
+        }
+    },
+)
+async def upload_mask(
+    request: Request,
+    current_user: CurrentUser,
+    db: DbSession,
+) -> MaskUploadResponse:
+    """
+    Upload a mask image as binary instead of base64 inside the job request.
+
+    Pass the returned ``mask_id`` when creating inpaint jobs; every job of
+    a batch can share it. White pixels mark the area to repaint. The ID
+    can be used for ``STORAGE_ORPHAN_GRACE_SECONDS``; jobs created from it
+    keep their mask after that.
+    """
+    file = await receive_upload(request, "file", MAX_MASK_SIZE)
+    try:
+        data = await file.read()
+    finally:
+        await file.close()
+
+    try:
+        mask_stats = await get_image_service().inspect_mask(data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+    if mask_stats.empty:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Mask is empty; paint the area to inpaint",
+        )
+
+    blob_hash = await BlobService(db).store(data)
+    uploaded_mask = UploadedMask(
+        user_id=current_user.id,
+        blob_hash=blob_hash,
+        width=mask_stats.width,
+        height=mask_stats.height,
+        file_size=len(data),
+    )
+    db.add(uploaded_mask)
+    await db.commit()
+
+    logger.info(f"User {current_user.id} uploaded mask {uploaded_mask.id}")
+    return MaskUploadResponse(
+        mask_id=uploaded_mask.id,
+        width=mask_stats.width,
+        height=mask_stats.height,
+        coverage=round(mask_stats.coverage, 4),
+    )
+
+
+@router.get(
+    "/batch/{batch_id}",
+    response_model=BatchResponse,
+    summary="Get jobs and results of a batch",
+)
+async def get_batch(
+    batch_id: str,
+    current_user: CurrentUser,
+    db: DbSession,
+) -> BatchResponse:
+    """Get every job of a batch with its status and result image."""
+    job_service = JobService(db)
+
+    rows = await job_service.get_batch_jobs(batch_id, current_user.id)
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found",
         )
 
+    return _batch_response(job_service, batch_id, rows)
+
+
+async def _replayed_batch(
+    job_service: JobService,
+    user_id: str,
+    idempotency_key: str | None,
+    fingerprint: str,
+) -> BatchResponse | None:
+    """Find the batch created by an earlier request with the same Idempotency-Key."""
+    if not idempotency_key:
+        return None
+
+    try:
+        record = await IdempotencyService(job_service.db).lookup(
+            user_id, idempotency_key, "batch", fingerprint
+        )
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        ) from e
+    if record is None or record.batch_id is None:
+        return None
+
+    rows = await job_service.get_batch_jobs(record.batch_id, user_id)
+    return _batch_response(job_service, record.batch_id, rows)
+
+
+def _batch_response(
+    job_service: JobService,
+    batch_id: str,
+    rows: list[tuple[Job, str | None]],
+) -> BatchResponse:
+    """Build a batch response from (job, result image ID) pairs."""
+    status_counts: dict[JobStatus, int] = {}
+    for job, _ in rows:
+        job_status = JobStatus(job.status)
+        status_counts[job_status] = status_counts.get(job_status, 0) + 1
+
+    return BatchResponse(
+        batch_id=batch_id,
+        total=len(rows),
+        status_counts=status_counts,
+        items=[job_service.to_response(job, result_image_id) for job, result_image_id in rows],
+    )
+
 
 @router.get(
     "",
@@ -91,37 +501,135 @@ async def get_jobs(
     db: DbSession,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    status: JobStatus | None = None,
+    job_status: JobStatus | None = Query(None, alias="status"),
+    cursor: str | None = Query(None, description="next_cursor from a previous page"),
 ) -> JobListResponse:
-    """Get paginated list of user's jobs."""
-    job_service = JobService(db)
+    """
+    Get paginated list of user's jobs.
 
-    jobs, total = await job_service.get_jobs(
-        user_id=current_user.id,
-        page=page,
-        page_size=page_size,
-        status=status,
-    )
+    Pass the ``next_cursor`` of a response as ``cursor`` to fetch the following
+    page by keyset instead of offset; ``page`` is ignored when a cursor is given.
+    """
+    job_service = JobService(db)
 
-    # Get result images for completed jobs
-    job_responses = []
-    for job in jobs:
-        result_image_id = None
-        if job.status == JobStatus.COMPLETED.value:
-            result_image = await job_service.get_job_result_image(job.id)
-            if result_image:
-                result_image_id = result_image.id
-        job_responses.append(job_service.to_response(job, result_image_id))
+    try:
+        rows, total, next_cursor = await job_service.get_jobs(
+            user_id=current_user.id,
+            page=page,
+            page_size=page_size,
+            status=job_status,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
 
     return JobListResponse(
-        items=job_responses,
+        items=[job_service.to_response(job, result_image_id) for job, result_image_id in rows],
         total=total,
         page=page,
         page_size=page_size,
         total_pages=ceil(total / page_size) if total > 0 else 1,
+        next_cursor=next_cursor,
     )
 
 
+def _sse_message(event: dict) -> str:
+    """Format an event as a server-sent event message."""
+    return f"event: job\ndata: {json.dumps(event)}\n\n"
+
+
+async def _event_stream(
+    user_id: str,
+    job_id: str | None = None,
+) -> AsyncIterator[str]:
+    """
+    Yield a user's job events as server-sent events.
+
+    For a single job the current state is sent first and the stream ends once
+    the job reaches a terminal status. A comment line is sent whenever the
+    stream has been idle for ``sse_heartbeat_seconds`` to keep proxies from
+    closing it.
+    """
+    job_ids = {job_id} if job_id else None
+    async with get_event_bus().subscribe(user_channel(user_id), job_ids) as events:
+        if job_id:
+            # Snapshot after subscribing so no transition falls in between
+            async with async_session_maker() as session:
+                job_service = JobService(session)
+                row = await job_service.get_job_with_result(job_id, user_id)
+            if not row:
+                return
+            job, result_image_id = row
+            snapshot = job_service.to_event(job, result_image_id).model_dump(mode="json")
+            yield _sse_message(snapshot)
+            if JobStatus(job.status) in TERMINAL_STATUSES:
+                return
+
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), settings.sse_heartbeat_seconds)
+            except TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            if job_id and event["job_id"] != job_id:
+                continue
+            yield _sse_message(event)
+            if job_id and JobStatus(event["status"]) in TERMINAL_STATUSES:
+                return
+
+
+def _event_stream_response(stream: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap an event stream in a text/event-stream response."""
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/events",
+    summary="Stream status changes of all jobs",
+    response_class=StreamingResponse,
+)
+async def stream_job_events(current_user: CurrentUser) -> StreamingResponse:
+    """
+    Stream state transitions of the user's jobs as server-sent events.
+
+    Each ``job`` event carries a JobEvent payload. The stream stays open until
+    the client disconnects.
+    """
+    return _event_stream_response(_event_stream(current_user.id))
+
+
+@router.get(
+    "/{job_id}/events",
+    summary="Stream status changes of a job",
+    response_class=StreamingResponse,
+)
+async def stream_job(job_id: str, current_user: CurrentUser) -> StreamingResponse:
+    """
+    Stream state transitions of one job as server-sent events.
+
+    The first event is the job's current state; the stream closes after the
+    job completes, fails or is cancelled. Use this instead of polling
+    ``GET /api/jobs/{job_id}``.
+    """
+    async with async_session_maker() as session:
+        row = await JobService(session).get_job_with_result(job_id, current_user.id)
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+
+    return _event_stream_response(_event_stream(current_user.id, job_id))
+
+
 @router.get(
     "/{job_id}",
     response_model=JobResponse,
@@ -135,18 +643,71 @@ async def get_job(
     """Get details of a specific job."""
     job_service = JobService(db)
 
-    job = await job_service.get_job(job_id, current_user.id)
-    if not job:
+    row = await job_service.get_job_with_result(job_id, current_user.id)
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Job not found",
         )
 
-    # Get result image if completed
-    result_image_id = None
-    if job.status == JobStatus.COMPLETED.value:
-        result_image = await job_service.get_job_result_image(job.id)
-        if result_image:
-            result_image_id = result_image.id
-
+    job, result_image_id = row
     return job_service.to_response(job, result_image_id)
+
+
+@router.get(
+    "/{job_id}/webhooks",
+    response_model=list[WebhookDeliveryResponse],
+    summary="Get webhook delivery log of a job",
+)
+async def get_job_webhooks(
+    job_id: str,
+    current_user: CurrentUser,
+    db: DbSession,
+) -> list[WebhookDeliveryResponse]:
+    """
+    Get the callback deliveries made for a job and their outcome.
+
+    The delivery log is removed when a job is archived.
+    """
+    job_service = JobService(db)
+
+    row = await job_service.get_job_with_result(job_id, current_user.id)
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+
+    deliveries = await get_webhook_service().get_deliveries(db, job_id)
+    return [WebhookDeliveryResponse.model_validate(delivery) for delivery in deliveries]
+
+
+@router.post(
+    "/{job_id}/cancel",
+    response_model=JobResponse,
+    summary="Cancel a pending job",
+)
+async def cancel_job(
+    job_id: str,
+    current_user: CurrentUser,
+    db: DbSession,
+) -> JobResponse:
+    """Cancel a job that has not started processing and refund its quota."""
+    job_service = JobService(db)
+
+    try:
+        job = await job_service.cancel_job(job_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        ) from e
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+
+    await job_service.publish_job_event(job)
+    return job_service.to_response(job)
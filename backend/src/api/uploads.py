@@ -0,0 +1,74 @@
+"""Bounded reading of multipart file uploads."""
+
+from collections.abc import AsyncGenerator
+
+from fastapi import HTTPException, Request, status
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"File too large. Maximum size is {max_bytes // (1024 * 1024)}MB",
+    )
+
+
+async def receive_upload(request: Request, field: str, max_bytes: int) -> UploadFile:
+    """
+    Read one file field of a multipart request.
+
+    The body is parsed as it arrives and the file is written chunk by chunk
+    to a spooled temporary file, so it is never held in memory whole. A
+    request whose ``Content-Length`` exceeds the limit is rejected before
+    its body is read, and a body without one is cut off as soon as it
+    exceeds the limit. The caller closes the returned file.
+
+    Raises:
+        HTTPException: If the file is too large, the body is malformed or
+            the field is missing
+    """
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a multipart/form-data upload",
+        )
+
+    limit = max_bytes + MULTIPART_OVERHEAD
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+        raise _too_large(max_bytes)
+
+    async def bounded_body() -> AsyncGenerator[bytes, None]:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > limit:
+                raise _too_large(max_bytes)
+            yield chunk
+
+    parser = MultiPartParser(request.headers, bounded_body(), max_files=1, max_fields=10)
+    try:
+        form = await parser.parse()
+    except MultiPartException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message,
+        ) from e
+
+    upload = form.get(field)
+    if not isinstance(upload, UploadFile):
+        await form.close()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Missing file field '{field}'",
+        )
+    if upload.size is not None and upload.size > max_bytes:
+        await form.close()
+        raise _too_large(max_bytes)
+
+    await upload.seek(0)
+    return upload
@@ -6,6 +6,9 @@ from typing import Any
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Only accepted with debug on; the server refuses to start with it otherwise
+DEFAULT_WEBHOOK_SECRET = "dev-webhook-secret-change-in-production"
+
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
@@ -42,21 +45,107 @@ class Settings(BaseSettings):
     use_local_inference: bool = True
     default_model: str = "runwayml/stable-diffusion-v1-5"
 
+    # Job processing
+    job_worker_concurrency: int = 1
+    inference_batch_size: int = 1  # text2img images generated per pipeline call
+    batch_slice_size: int = 4  # jobs of a batch run before other queued work gets a turn
+    max_batch_size: int = 100  # jobs per batch submission
+
+    # Admission control (0 disables a limit)
+    max_queue_wait_seconds: float = 900.0  # reject new jobs past this estimated wait
+    max_pending_jobs_per_user: int = 100
+    default_job_duration_seconds: float = 30.0  # until real durations are measured
+    idempotency_key_ttl_hours: int = 24
+
+    # Thread pools for blocking image and file work
+    cpu_executor_workers: int = 0  # 0 = one per CPU core
+    io_executor_workers: int = 8
+
+    # Job archival (0 days disables the archiver)
+    job_archive_after_days: int = 30  # move finished jobs older than this to jobs_archive
+    job_archive_batch_size: int = 500
+    job_archive_interval_seconds: float = 3600.0
+
+    # Storage sweeper: expired images, unreferenced blobs, orphan files (0 interval disables)
+    storage_sweep_interval_seconds: float = 600.0
+    storage_sweep_batch_size: int = 500
+    storage_orphan_grace_seconds: float = 3600.0  # newer files and blobs are never swept as orphans
+    storage_reconcile_dirs_per_sweep: int = 16  # 0 disables file reconciliation
+    upload_retention_hours: float = 48.0  # uploads unused by unfinished jobs are deleted after this; 0 keeps them
+
+    # Job events
+    event_bus_backend: str = "auto"  # auto, memory or postgres
+    event_bus_url: str = ""  # defaults to database_url for the postgres backend
+    sse_heartbeat_seconds: float = 15.0
+    max_job_wait_seconds: float = 300.0  # cap for POST /api/jobs?wait=
+
+    # Webhooks
+    webhook_secret: str = DEFAULT_WEBHOOK_SECRET
+    webhook_allowed_hosts: list[str] = []  # trusted even on private addresses; others must be public
+    webhook_max_concurrency: int = 10
+    webhook_max_attempts: int = 5
+    webhook_timeout_seconds: float = 10.0
+    webhook_retry_base_seconds: float = 2.0
+
     # Storage
     upload_dir: str = "./uploads"
     generated_dir: str = "./generated"
+    blob_dir: str = "./blobs"  # content-addressed payloads such as inpainting masks
     max_image_size_mb: int = 10
+    upload_max_pixels: int = 40_000_000  # decode budget per upload, against decompression bombs
+    upload_max_short_edge: int = 1536  # larger uploads are decoded reduced; keep >= every model dimension
+
+    # Blob storage backend ("local" keeps blobs under blob_dir, "s3" in an S3-compatible bucket)
+    storage_backend: str = "local"
+    storage_presign_downloads: bool = False  # redirect downloads to presigned URLs (s3 only)
+    storage_presign_seconds: int = 900
+    s3_endpoint_url: str = ""  # empty for AWS; e.g. http://localhost:9000 for MinIO
+    s3_region: str = "us-east-1"
+    s3_bucket: str = ""
+    s3_access_key_id: str = ""
+    s3_secret_access_key: str = ""
+    s3_prefix: str = ""
+    s3_multipart_part_size_mb: int = 8
+
+    # Output encoding (formats: png, webp, jpeg or avif)
+    output_format: str = "png"  # lossless; webp (unless output_lossless), jpeg and avif are lossy
+    output_quality: int = 90  # lossy webp, jpeg and avif
+    output_lossless: bool = False  # webp only; png is always lossless
+    output_effort: int = 4  # webp method 0-6, png zlib level 0-9, avif 10 - speed
+    thumbnail_format: str = "webp"  # also the default for rendered derivatives
+    thumbnail_quality: int = 80
+    thumbnail_size: int = 256  # longest edge in pixels
+
+    # Rendered derivatives (thumbnails and previews)
+    render_cache_dir: str = "./render_cache"
+    render_cache_max_mb: int = 512  # least recently used renders are evicted past this
+    render_max_dimension: int = 2048
+
+    # Preprocessed img2img/inpaint sources (0 MB disables the disk tier)
+    source_cache_dir: str = "./source_cache"
+    source_cache_memory_mb: int = 256
+    source_cache_max_mb: int = 1024
+
+    # Inpainting masks: painted where >= threshold, then grown and feathered (pixels)
+    inpaint_mask_threshold: int = 128
+    inpaint_mask_dilate: int = 0
+    inpaint_mask_feather: float = 3.0
 
     # Usage Limits
     daily_generation_limit: int = 10
+    quota_flush_interval_seconds: float = 5.0
+    quota_cache_ttl_seconds: float = 60.0
+
+    # Metrics
+    metrics_enabled: bool = True  # record request latency for /metrics
 
     # CORS
     cors_origins: list[str] = ["http://localhost:5173", "http://127.0.0.1:5173"]
 
-    @field_validator("cors_origins", mode="before")
+    @field_validator("cors_origins", "webhook_allowed_hosts", mode="before")
     @classmethod
-    def parse_cors_origins(cls, v: Any) -> list[str]:
-        """Parse CORS origins from string or list."""
+    def parse_string_list(cls, v: Any) -> list[str]:
+        """Parse a list such as CORS origins from string or list."""
         if isinstance(v, str):
             import json
 
@@ -1,7 +1,8 @@
 """Database connection and session management."""
 
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable
 
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -32,6 +33,16 @@ class Base(DeclarativeBase):
     pass
 
 
+def dialect_insert(session: AsyncSession) -> Callable:
+    """Return the ``insert`` construct of the session's dialect, for ON CONFLICT upserts."""
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise RuntimeError(f"Upserts are not supported on dialect: {dialect}")
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency to get database session."""
     async with async_session_maker() as session:
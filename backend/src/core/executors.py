@@ -0,0 +1,100 @@
+"""Thread pools for blocking work that must stay off the event loop."""
+
+import asyncio
+import contextvars
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, TypeVar
+
+from src.core.config import get_settings
+from src.core.metrics import (
+    executor_queue_depth,
+    executor_task_duration_seconds,
+    executor_wait_seconds,
+)
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class InstrumentedExecutor:
+    """
+    Named thread pool that records how long tasks wait and run.
+
+    Tasks run with a copy of the caller's context, so context variables such
+    as the current job profile are visible inside them. Queue depth counts
+    tasks submitted but not yet started, which is where a saturated pool
+    shows up first.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``func(*args, **kwargs)`` in the pool and await its result."""
+        submitted = time.perf_counter()
+        context = contextvars.copy_context()
+
+        def call() -> T:
+            started = time.perf_counter()
+            executor_queue_depth.dec(executor=self.name)
+            executor_wait_seconds.observe(started - submitted, executor=self.name)
+            try:
+                return context.run(partial(func, *args, **kwargs))
+            finally:
+                executor_task_duration_seconds.observe(
+                    time.perf_counter() - started,
+                    executor=self.name,
+                )
+
+        executor_queue_depth.inc(executor=self.name)
+        future = self._executor.submit(call)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A task cancelled before it started never leaves the queue by itself
+            if future.cancelled():
+                executor_queue_depth.dec(executor=self.name)
+            raise
+
+    def shutdown(self) -> None:
+        """Stop accepting tasks and drop those that have not started."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instances
+_cpu_executor: InstrumentedExecutor | None = None
+_io_executor: InstrumentedExecutor | None = None
+
+
+def get_cpu_executor() -> InstrumentedExecutor:
+    """Get or create the pool for CPU-bound work such as image encoding and resizing."""
+    global _cpu_executor
+    if _cpu_executor is None:
+        workers = settings.cpu_executor_workers or os.cpu_count() or 1
+        _cpu_executor = InstrumentedExecutor("cpu", workers)
+    return _cpu_executor
+
+
+def get_io_executor() -> InstrumentedExecutor:
+    """Get or create the pool for blocking file reads and writes."""
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = InstrumentedExecutor("io", settings.io_executor_workers)
+    return _io_executor
+
+
+def shutdown_executors() -> None:
+    """Shut down the pools; they are recreated on next use."""
+    global _cpu_executor, _io_executor
+    for executor in (_cpu_executor, _io_executor):
+        if executor is not None:
+            executor.shutdown()
+    _cpu_executor = None
+    _io_executor = None
@@ -0,0 +1,475 @@
+"""In-process metrics with Prometheus text exposition."""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.profiling import current_rss_bytes
+
+LabelValues = tuple[str, ...]
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets for job phases, which range from milliseconds to minutes
+JOB_PHASE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value as Prometheus expects."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    """Render a label set such as ``{route="/api/jobs",status="200"}``."""
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=True)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """Base class for a named metric family with optional labels."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> LabelValues:
+        """Label values in declaration order."""
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> Iterable[tuple[str, str, float]]:
+        """Yield (suffix, rendered labels, value) for each sample."""
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        """Render the family in text exposition format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Increment the counter for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[tuple[str, str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", _format_labels(self.label_names, key), value
+
+
+class Gauge(Metric):
+    """
+    Value that can go up and down.
+
+    A gauge either holds values set by the application or, when created with
+    ``collect``, asks the callback for its current values at scrape time.
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        collect: Callable[[], dict[LabelValues, float] | float | None] | None = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self._values: dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Set the gauge for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Increase the gauge for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        """Decrease the gauge for a label set."""
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterable[tuple[str, str, float]]:
+        if self._collect is not None:
+            collected = self._collect()
+            if collected is None:
+                return
+            if not isinstance(collected, dict):
+                collected = {(): collected}
+            items = list(collected.items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for key, value in items:
+            yield "", _format_labels(self.label_names, key), value
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., count in +Inf], sum
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record an observation for a label set."""
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def time(self, **labels: Any) -> "_Timer":
+        """Observe the duration of a ``with`` block."""
+        return _Timer(self, labels)
+
+    def samples(self) -> Iterable[tuple[str, str, float]]:
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                labels = _format_labels((*self.label_names, "le"), (*key, _format_value(bound)))
+                yield "_bucket", labels, cumulative
+            labels = _format_labels(self.label_names, key)
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class _Timer:
+    """Context manager that observes elapsed seconds on a histogram."""
+
+    def __init__(self, histogram: Histogram, labels: dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric family; names must be unique."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        collect: Callable[[], dict[LabelValues, float] | float | None] | None = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labels, collect))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """Render every family in text exposition format."""
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# {metric.name} collection failed: {type(e).__name__}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+_process_start_time = time.time()
+
+# API
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the response starts, by route template.",
+    labels=("method", "route", "status"),
+)
+
+# Queue and jobs
+job_queue_depth = registry.gauge(
+    "job_queue_depth",
+    "Jobs waiting in the in-process queue, by model.",
+    labels=("model",),
+)
+jobs_rejected_total = registry.counter(
+    "jobs_rejected_total",
+    "Job submissions refused by admission control, by reason.",
+    labels=("reason",),
+)
+jobs_finished_total = registry.counter(
+    "jobs_finished_total",
+    "Jobs that reached a final state, by type and status.",
+    labels=("type", "status"),
+)
+jobs_archived_total = registry.counter(
+    "jobs_archived_total",
+    "Finished jobs moved from the jobs table to jobs_archive.",
+)
+job_phase_duration_seconds = registry.histogram(
+    "job_phase_duration_seconds",
+    "Wall-clock time of each job execution phase.",
+    labels=("model", "type", "phase"),
+    buckets=JOB_PHASE_BUCKETS,
+)
+
+# Inference
+pipeline_cache_requests_total = registry.counter(
+    "pipeline_cache_requests_total",
+    "Pipeline lookups, by model, task and result (hit or miss).",
+    labels=("model", "task", "result"),
+)
+pipeline_load_duration_seconds = registry.histogram(
+    "pipeline_load_duration_seconds",
+    "Time spent loading pipelines on cache misses.",
+    labels=("model", "task"),
+    buckets=JOB_PHASE_BUCKETS,
+)
+
+# Storage
+images_saved_total = registry.counter(
+    "images_saved_total",
+    "Image files written, by kind.",
+    labels=("kind",),
+)
+image_bytes_written_total = registry.counter(
+    "image_bytes_written_total",
+    "Bytes of image files written, by kind.",
+    labels=("kind",),
+)
+render_cache_requests_total = registry.counter(
+    "render_cache_requests_total",
+    "Derivative lookups, by result (hit, miss or shared with a render in progress).",
+    labels=("result",),
+)
+render_cache_bytes = registry.gauge(
+    "render_cache_bytes",
+    "Bytes of rendered derivatives held in the disk cache.",
+)
+render_cache_evictions_total = registry.counter(
+    "render_cache_evictions_total",
+    "Derivatives evicted from the disk cache to stay under its size limit.",
+)
+source_cache_requests_total = registry.counter(
+    "source_cache_requests_total",
+    "Preprocessed source lookups, by result (memory, disk, miss or shared).",
+    labels=("result",),
+)
+source_cache_bytes = registry.gauge(
+    "source_cache_bytes",
+    "Size of cached preprocessed sources, by tier (memory or disk).",
+    labels=("tier",),
+)
+source_cache_evictions_total = registry.counter(
+    "source_cache_evictions_total",
+    "Preprocessed sources evicted from a cache tier.",
+    labels=("tier",),
+)
+images_expired_total = registry.counter(
+    "images_expired_total",
+    "Generated images deleted after expiring.",
+)
+storage_reclaimed_bytes_total = registry.counter(
+    "storage_reclaimed_bytes_total",
+    "Bytes freed by the storage sweeper, by source (expired, blob or orphan).",
+    labels=("source",),
+)
+storage_orphans_total = registry.counter(
+    "storage_orphans_total",
+    "Reconciliation mismatches: files without a row (deleted) and rows without a file.",
+    labels=("kind",),
+)
+
+# Executors
+executor_queue_depth = registry.gauge(
+    "executor_queue_depth",
+    "Tasks submitted to a thread pool that have not started, by executor.",
+    labels=("executor",),
+)
+executor_wait_seconds = registry.histogram(
+    "executor_wait_seconds",
+    "Time tasks spent queued before a pool thread picked them up.",
+    labels=("executor",),
+)
+executor_task_duration_seconds = registry.histogram(
+    "executor_task_duration_seconds",
+    "Run time of tasks on a thread pool.",
+    labels=("executor",),
+)
+
+
+def _collect_db_pool() -> dict[LabelValues, float] | None:
+    """Connection pool usage of the database engine."""
+    from src.core.database import engine
+
+    pool = engine.sync_engine.pool
+    values: dict[LabelValues, float] = {}
+    for state, method in (
+        ("size", "size"),
+        ("checked_in", "checkedin"),
+        ("checked_out", "checkedout"),
+        ("overflow", "overflow"),
+    ):
+        getter = getattr(pool, method, None)
+        if getter is not None:
+            values[(state,)] = getter()
+    return values or None
+
+
+# Process and database
+db_pool_connections = registry.gauge(
+    "db_pool_connections",
+    "Database connection pool usage, by state.",
+    labels=("state",),
+    collect=_collect_db_pool,
+)
+process_resident_memory_bytes = registry.gauge(
+    "process_resident_memory_bytes",
+    "Resident memory size in bytes.",
+    collect=current_rss_bytes,
+)
+process_cpu_seconds_total = registry.gauge(
+    "process_cpu_seconds_total",
+    "User and system CPU time of the process in seconds.",
+    collect=time.process_time,
+)
+process_start_time_seconds = registry.gauge(
+    "process_start_time_seconds",
+    "Start time of the process since the Unix epoch in seconds.",
+    collect=lambda: _process_start_time,
+)
+
+
+def _route_template(scope: Scope) -> str:
+    """Path template of the route that handled a request, e.g. ``/api/jobs/{job_id}``."""
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "<unmatched>"
+
+    # Routes of included routers match relative to the router's prefix
+    path = scope["path"]
+    regex = getattr(route, "path_regex", None)
+    if regex is not None and not regex.match(path):
+        for index, char in enumerate(path):
+            if char == "/" and index and regex.match(path[index:]):
+                return path[:index] + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template.
+
+    Requests that match no route are grouped under ``<unmatched>`` so that
+    arbitrary paths cannot create unbounded label sets.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        responded = False
+
+        def observe(status_code: int) -> None:
+            http_request_duration_seconds.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=_route_template(scope),
+                status=status_code,
+            )
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal responded
+            if message["type"] == "http.response.start":
+                responded = True
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not responded:
+                observe(500)
+            raise
@@ -0,0 +1,44 @@
+"""Keyset (cursor) pagination helpers."""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import ColumnElement, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    payload = json.dumps({"t": created_at.isoformat(), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), str(payload["id"])
+    except Exception as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+def after_cursor(
+    created_at_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    cursor: str,
+) -> ColumnElement[bool]:
+    """
+    Filter for rows after a cursor in (created_at DESC, id DESC) order.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    created_at, row_id = decode_cursor(cursor)
+    return tuple_(created_at_column, id_column) < tuple_(created_at, row_id)
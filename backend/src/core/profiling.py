@@ -0,0 +1,115 @@
+"""Per-job execution profiling."""
+
+import os
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes() -> int | None:
+    """Return the resident set size of this process, if it can be measured."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+
+    if resource is not None:
+        # Peak rather than current RSS; reported in bytes on macOS, KiB elsewhere
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+    return None
+
+
+class JobProfile:
+    """
+    Timing breakdown and resource usage of one job execution.
+
+    Phases are wall-clock seconds keyed by name. CPU time is process-wide,
+    so it includes work done for other jobs running at the same time, and
+    peak RSS is the highest resident set size sampled at phase boundaries
+    and denoising steps.
+    """
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self.pipeline_cache_hit: bool | None = None
+        self.peak_rss_bytes: int | None = None
+        self._cpu_start = time.process_time()
+        self.sample_memory()
+
+    @property
+    def cpu_seconds(self) -> float:
+        """CPU time used by the process since profiling started."""
+        return time.process_time() - self._cpu_start
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add wall-clock seconds to a phase."""
+        self.phases[name] = self.phases.get(name, 0.0) + max(seconds, 0.0)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+            self.sample_memory()
+
+    def sample_memory(self) -> None:
+        """Update peak RSS with the current resident set size."""
+        rss = current_rss_bytes()
+        if rss is not None and (self.peak_rss_bytes is None or rss > self.peak_rss_bytes):
+            self.peak_rss_bytes = rss
+
+    def copy(self) -> "JobProfile":
+        """Copy this profile, e.g. for each job of a batched pipeline call."""
+        profile = JobProfile.__new__(JobProfile)
+        profile.phases = dict(self.phases)
+        profile.pipeline_cache_hit = self.pipeline_cache_hit
+        profile.peak_rss_bytes = self.peak_rss_bytes
+        profile._cpu_start = self._cpu_start
+        return profile
+
+    def to_dict(self) -> dict[str, Any]:
+        """Phase timings rounded for storage."""
+        return {name: round(seconds, 4) for name, seconds in self.phases.items()}
+
+
+_current_profile: ContextVar[JobProfile | None] = ContextVar("job_profile", default=None)
+
+
+def current_profile() -> JobProfile | None:
+    """Profile of the job running in the current context, if any."""
+    return _current_profile.get()
+
+
+@contextmanager
+def use_profile(profile: JobProfile) -> Iterator[JobProfile]:
+    """Make a profile current for the enclosed block."""
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+@contextmanager
+def profile_phase(profile: JobProfile | None, name: str) -> Iterator[None]:
+    """Time a phase on a profile; does nothing if there is no profile."""
+    if profile is None:
+        yield
+        return
+    with profile.phase(name):
+        yield
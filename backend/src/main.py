@@ -1,13 +1,28 @@
 """FastAPI application entry point."""
 
+import math
 from contextlib import asynccontextmanager
+from typing import Any
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from src.api.routes import images, jobs, models, presets
+from src.api.routes import admin, images, jobs, models, presets
 from src.core.config import get_settings
 from src.core.database import init_db
+from src.core.executors import shutdown_executors
+from src.core.metrics import MetricsMiddleware, registry
+from src.services.event_bus import get_event_bus
+from src.services.idempotency_service import purge_expired_keys
+from src.services.job_archive_service import get_job_archive_service
+from src.services.job_queue import get_job_queue
+from src.services.quota_service import get_quota_service
+from src.services.storage import close_storage_backend
+from src.services.storage_sweep_service import get_storage_sweep_service
+from src.services.webhook_service import get_webhook_service
 
 settings = get_settings()
 
@@ -17,8 +32,29 @@ async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
     await init_db()
+    await purge_expired_keys()
+    event_bus = get_event_bus()
+    await event_bus.start()
+    quota_service = get_quota_service()
+    quota_service.start()
+    webhook_service = get_webhook_service()
+    await webhook_service.start()
+    job_queue = get_job_queue()
+    await job_queue.start()
+    job_archive_service = get_job_archive_service()
+    job_archive_service.start()
+    storage_sweep_service = get_storage_sweep_service()
+    storage_sweep_service.start()
     yield
     # Shutdown
+    await storage_sweep_service.stop()
+    await job_archive_service.stop()
+    await job_queue.stop()
+    await webhook_service.stop()
+    await quota_service.stop()
+    await event_bus.stop()
+    await close_storage_backend()
+    shutdown_executors()
 
 
 app = FastAPI(
@@ -39,6 +75,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+
+def _json_safe(value: Any) -> Any:
+    """Replace non-finite floats, which JSON cannot represent, with their names."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    """Validation errors; echoed input may hold Infinity or NaN parsed from the body."""
+    return JSONResponse(
+        status_code=422,
+        content={"detail": _json_safe(jsonable_encoder(exc.errors()))},
+    )
+
 
 # Health check endpoint
 @app.get("/health", tags=["Health"])
@@ -47,12 +106,23 @@ async def health_check():
     return {"status": "healthy", "app": settings.app_name, "version": settings.app_version}
 
 
+# Metrics endpoint
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Metrics in Prometheus text exposition format."""
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 # Include routers
 
 app.include_router(jobs.router, prefix="/api")
 app.include_router(images.router, prefix="/api")
 app.include_router(presets.router, prefix="/api")
 app.include_router(models.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 
 
 # Root endpoint
@@ -1,18 +1,33 @@
 """Database Models Package."""
 
+from src.models.blob import Blob
 from src.models.daily_usage import DailyUsage
+from src.models.idempotency_key import IdempotencyKey
 from src.models.image import GeneratedImage
 from src.models.job import Job, JobStatus, JobType
+from src.models.job_archive import ArchivedJob
 from src.models.preset import Preset, PresetCategory
+from src.models.uploaded_image import UploadedImage
+from src.models.uploaded_mask import UploadedMask
 from src.models.user import User
+from src.models.user_stats import UserStats
+from src.models.webhook_delivery import WebhookDelivery, WebhookDeliveryStatus
 
 __all__ = [
     "User",
+    "UserStats",
     "DailyUsage",
     "Job",
     "JobStatus",
     "JobType",
+    "ArchivedJob",
     "GeneratedImage",
+    "UploadedImage",
+    "UploadedMask",
+    "Blob",
+    "IdempotencyKey",
     "Preset",
     "PresetCategory",
+    "WebhookDelivery",
+    "WebhookDeliveryStatus",
 ]
@@ -0,0 +1,44 @@
+"""Content-addressed blob model."""
+
+from datetime import UTC, datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.database import Base
+
+
+class Blob(Base):
+    """
+    A payload in the blob store, with the number of rows referencing it.
+
+    Uploaded images, generated images and inpainting masks each hold a
+    reference; identical bytes share one blob and one file.
+    """
+
+    __tablename__ = "blobs"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)  # SHA-256 hex digest
+    size: Mapped[int] = mapped_column(Integer, nullable=False)  # in bytes
+    ref_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        index=True,
+    )
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<Blob(hash={self.hash}, refs={self.ref_count})>"
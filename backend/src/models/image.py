@@ -3,7 +3,7 @@
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
@@ -35,8 +35,14 @@ class GeneratedImage(Base):
         index=True,
     )
 
-    # File paths
+    # File paths; images saved to the blob store also record their digest
     file_path: Mapped[str] = mapped_column(String(500), nullable=False)
+    blob_hash: Mapped[str | None] = mapped_column(
+        String(64),
+        ForeignKey("blobs.hash"),
+        nullable=True,
+        index=True,
+    )
     thumbnail_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
 
     # Image metadata
@@ -48,7 +54,11 @@ class GeneratedImage(Base):
     # Generation parameters snapshot (for history)
     prompt: Mapped[str] = mapped_column(Text, nullable=False)
     negative_prompt: Mapped[str | None] = mapped_column(Text, nullable=True)
-    parameters_json: Mapped[str | None] = mapped_column(Text, nullable=True)  # Full params as JSON
+    parameters_json: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+        deferred=True,  # Full params as JSON; not needed for listings
+    )
 
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
@@ -74,3 +84,12 @@ class GeneratedImage(Base):
     def is_expired(self) -> bool:
         """Check if the image has expired."""
         return datetime.now(timezone.utc) > self.expires_at
+
+
+# Keyset pagination of a user's gallery: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+Index(
+    "ix_generated_images_user_created_id",
+    GeneratedImage.user_id,
+    GeneratedImage.created_at.desc(),
+    GeneratedImage.id,
+)
@@ -4,7 +4,17 @@ from datetime import datetime, timezone
 from enum import Enum
 from uuid import uuid4
 
-from sqlalchemy import DateTime, ForeignKey, Index, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    String,
+    Text,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
@@ -17,6 +27,17 @@ class JobStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+# Statuses a job never leaves
+TERMINAL_STATUSES = frozenset({JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED})
+
+# Statuses each non-terminal status may move to
+JOB_TRANSITIONS: dict[JobStatus, frozenset[JobStatus]] = {
+    JobStatus.PENDING: frozenset({JobStatus.PROCESSING, JobStatus.CANCELLED}),
+    JobStatus.PROCESSING: frozenset({JobStatus.COMPLETED, JobStatus.FAILED}),
+}
 
 
 class JobType(str, Enum):
@@ -27,14 +48,8 @@ class JobType(str, Enum):
     INPAINT = "inpaint"
 
 
-class Job(Base):
-    """Job model for tracking image generation tasks."""
-
-    __tablename__ = "jobs"
-    __table_args__ = (
-        Index("ix_jobs_user_status", "user_id", "status"),
-        Index("ix_jobs_created_at", "created_at"),
-    )
+class JobColumns:
+    """Columns shared by live jobs and archived jobs."""
 
     id: Mapped[str] = mapped_column(
         String(36),
@@ -70,13 +85,33 @@ class Job(Base):
     # Model selection
     model: Mapped[str | None] = mapped_column(String(100), nullable=True)
 
+    # Batch this job was submitted with, if any
+    batch_id: Mapped[str | None] = mapped_column(String(36), nullable=True, index=True)
+
     # Source image for img2img/inpaint
     source_image_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
-    mask_data: Mapped[str | None] = mapped_column(Text, nullable=True)  # base64 for inpaint
+    mask_hash: Mapped[str | None] = mapped_column(
+        String(64),
+        nullable=True,
+        index=True,  # blob store digest of the inpainting mask
+    )
+
+    # Webhook called when the job completes or fails
+    callback_url: Mapped[str | None] = mapped_column(String(2000), nullable=True)
 
     # Result
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # Execution profile
+    timings_json: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+        deferred=True,  # seconds per phase; loaded only for single-job reads
+    )
+    cpu_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
+    peak_rss_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    pipeline_cache_hit: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -92,6 +127,24 @@ class Job(Base):
         nullable=True,
     )
 
+
+class Job(JobColumns, Base):
+    """Job model for tracking image generation tasks."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_user_status", "user_id", "status"),
+        Index("ix_jobs_created_at", "created_at"),
+        # Queue scans only look at pending rows, a small fraction of the table
+        Index(
+            "ix_jobs_pending",
+            "created_at",
+            "id",
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="jobs")
     generated_images: Mapped[list["GeneratedImage"]] = relationship(
@@ -99,6 +152,15 @@ class Job(Base):
         back_populates="job",
         cascade="all, delete-orphan",
     )
+    webhook_deliveries: Mapped[list["WebhookDelivery"]] = relationship(
+        "WebhookDelivery",
+        back_populates="job",
+        cascade="all, delete-orphan",
+    )
 
     def __repr__(self) -> str:
         return f"<Job(id={self.id}, type={self.type}, status={self.status})>"
+
+
+# Keyset pagination of a user's jobs: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+Index("ix_jobs_user_created_id", Job.user_id, Job.created_at.desc(), Job.id)
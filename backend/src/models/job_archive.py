@@ -0,0 +1,48 @@
+"""Archived job database model."""
+
+from datetime import UTC, datetime
+
+from sqlalchemy import DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.database import Base
+from src.models.job import JobColumns
+
+
+class ArchivedJob(JobColumns, Base):
+    """
+    Finished job moved out of the jobs table by the archiver.
+
+    Rows keep every job column so they can be returned by the same read
+    paths. On PostgreSQL the table is partitioned by month of ``created_at``,
+    which is why ``created_at`` is part of the primary key.
+    """
+
+    __tablename__ = "jobs_archive"
+    __table_args__ = (
+        Index("ix_jobs_archive_id", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+        default=lambda: datetime.now(UTC),
+    )
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<ArchivedJob(id={self.id}, type={self.type}, status={self.status})>"
+
+
+# Same keyset order as ix_jobs_user_created_id, for merged job listings
+Index(
+    "ix_jobs_archive_user_created_id",
+    ArchivedJob.user_id,
+    ArchivedJob.created_at.desc(),
+    ArchivedJob.id,
+)
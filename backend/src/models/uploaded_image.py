@@ -0,0 +1,49 @@
+"""Uploaded image database model."""
+
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.database import Base
+
+
+class UploadedImage(Base):
+    """Source image uploaded for img2img or inpainting, stored as a blob."""
+
+    __tablename__ = "uploaded_images"
+
+    id: Mapped[str] = mapped_column(
+        String(36),
+        primary_key=True,
+        default=lambda: str(uuid4()),
+    )
+    user_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    blob_hash: Mapped[str] = mapped_column(
+        String(64),
+        ForeignKey("blobs.hash"),
+        nullable=False,
+        index=True,
+    )
+
+    # Image metadata
+    width: Mapped[int] = mapped_column(Integer, nullable=False)
+    height: Mapped[int] = mapped_column(Integer, nullable=False)
+    file_size: Mapped[int] = mapped_column(Integer, nullable=False)  # in bytes
+    mime_type: Mapped[str] = mapped_column(String(50), default="image/png")
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<UploadedImage(id={self.id}, blob_hash={self.blob_hash})>"
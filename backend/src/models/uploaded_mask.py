@@ -0,0 +1,49 @@
+"""Uploaded inpainting mask database model."""
+
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.database import Base
+
+
+class UploadedMask(Base):
+    """Inpainting mask uploaded for later jobs, stored as a blob."""
+
+    __tablename__ = "uploaded_masks"
+
+    id: Mapped[str] = mapped_column(
+        String(36),
+        primary_key=True,
+        default=lambda: str(uuid4()),
+    )
+    user_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    blob_hash: Mapped[str] = mapped_column(
+        String(64),
+        ForeignKey("blobs.hash"),
+        nullable=False,
+        index=True,
+    )
+
+    # Mask metadata
+    width: Mapped[int] = mapped_column(Integer, nullable=False)
+    height: Mapped[int] = mapped_column(Integer, nullable=False)
+    file_size: Mapped[int] = mapped_column(Integer, nullable=False)  # in bytes
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        nullable=False,
+        index=True,
+    )
+
+    def __repr__(self) -> str:
+        return f"<UploadedMask(id={self.id}, blob_hash={self.blob_hash})>"
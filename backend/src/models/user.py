@@ -73,6 +73,12 @@ class User(Base):
         back_populates="user",
         cascade="all, delete-orphan",
     )
+    stats: Mapped["UserStats | None"] = relationship(
+        "UserStats",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        uselist=False,
+    )
 
     def __repr__(self) -> str:
         return f"<User(id={self.id}, email={self.email}, username={self.username})>"
@@ -0,0 +1,67 @@
+"""Webhook delivery log model."""
+
+from datetime import UTC, datetime
+from enum import Enum
+from uuid import uuid4
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from src.core.database import Base
+
+
+class WebhookDeliveryStatus(str, Enum):
+    """Webhook delivery status enumeration."""
+
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+
+
+class WebhookDelivery(Base):
+    """Record of a job completion callback and its delivery attempts."""
+
+    __tablename__ = "webhook_deliveries"
+
+    id: Mapped[str] = mapped_column(
+        String(36),
+        primary_key=True,
+        default=lambda: str(uuid4()),
+    )
+    job_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("jobs.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    url: Mapped[str] = mapped_column(String(2000), nullable=False)
+    event: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)  # JSON body as sent
+    status: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        default=WebhookDeliveryStatus.PENDING.value,
+        index=True,
+    )
+
+    # Attempts
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        nullable=False,
+    )
+    delivered_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
+    # Relationships
+    job: Mapped["Job"] = relationship("Job", back_populates="webhook_deliveries")
+
+    def __repr__(self) -> str:
+        return f"<WebhookDelivery(id={self.id}, job_id={self.job_id}, status={self.status})>"
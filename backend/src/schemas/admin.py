@@ -0,0 +1,47 @@
+"""Admin-related Pydantic schemas."""
+
+from pydantic import BaseModel
+
+
+class Percentiles(BaseModel):
+    """Distribution summary of a measurement."""
+
+    count: int
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+
+class JobTimingStats(BaseModel):
+    """Execution profile of finished jobs for one model and task."""
+
+    model: str | None
+    type: str
+    jobs: int
+    pipeline_cache_hit_rate: float | None = None
+    total_seconds: Percentiles | None = None
+    cpu_seconds: Percentiles | None = None
+    peak_rss_bytes: Percentiles | None = None
+    phases: dict[str, Percentiles]
+
+
+class JobTimingStatsResponse(BaseModel):
+    """Response schema for job timing statistics."""
+
+    days: int
+    status: str
+    items: list[JobTimingStats]
+
+
+class StorageSweepReport(BaseModel):
+    """Outcome of one storage sweep."""
+
+    expired_images: int = 0
+    expired_masks: int = 0
+    expired_uploads: int = 0
+    deleted_blobs: int = 0
+    orphan_files: int = 0
+    missing_files: int = 0
+    reconciled_dirs: int = 0
+    reclaimed_bytes: int = 0
@@ -33,6 +33,7 @@ class ImageListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: str | None = None
 
 
 class ImageDownloadResponse(BaseModel):
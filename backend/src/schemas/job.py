@@ -1,9 +1,32 @@
 """Job schemas."""
 
+import base64
 from datetime import datetime
 from enum import Enum
+from itertools import product
+from typing import Annotated, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, AnyHttpUrl, BaseModel, Field, model_validator
+
+
+def decode_base64_data(value: str) -> bytes:
+    """Decode base64 data, with or without a ``data:`` URL prefix."""
+    if value.startswith("data:"):
+        value = value.split(",", 1)[1]
+    return base64.b64decode(value, validate=True)
+
+
+def _check_base64(value: str) -> str:
+    """Reject values that are not valid base64."""
+    try:
+        decode_base64_data(value)
+    except (ValueError, IndexError) as e:
+        raise ValueError("must be base64-encoded data or a data: URL") from e
+    return value
+
+
+# Base64-encoded binary payload such as an inpainting mask PNG
+Base64Data = Annotated[str, AfterValidator(_check_base64)]
 
 
 class JobStatus(str, Enum):
@@ -13,6 +36,100 @@ class JobStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+# A finite coordinate or length in the mask's coordinate space
+Coordinate = Annotated[float, Field(allow_inf_nan=False)]
+# A point as [x, y]
+Point = tuple[Coordinate, Coordinate]
+MAX_MASK_SHAPES = 500
+MAX_SHAPE_POINTS = 10000
+
+
+class MaskRect(BaseModel):
+    """Axis-aligned rectangle."""
+
+    type: Literal["rect"]
+    x: Coordinate
+    y: Coordinate
+    width: Coordinate = Field(..., gt=0)
+    height: Coordinate = Field(..., gt=0)
+    erase: bool = False  # clear instead of paint
+
+    def bounds(self) -> tuple[float, float, float, float]:
+        return self.x, self.y, self.x + self.width, self.y + self.height
+
+
+class MaskPolygon(BaseModel):
+    """Filled polygon."""
+
+    type: Literal["polygon"]
+    points: list[Point] = Field(..., min_length=3, max_length=MAX_SHAPE_POINTS)
+    erase: bool = False
+
+    def bounds(self) -> tuple[float, float, float, float]:
+        xs, ys = zip(*self.points, strict=True)
+        return min(xs), min(ys), max(xs), max(ys)
+
+
+class MaskStroke(BaseModel):
+    """Brush stroke through points, with round ends and joins."""
+
+    type: Literal["stroke"]
+    points: list[Point] = Field(..., min_length=1, max_length=MAX_SHAPE_POINTS)
+    radius: Coordinate = Field(..., gt=0)
+    erase: bool = False
+
+    def bounds(self) -> tuple[float, float, float, float]:
+        xs, ys = zip(*self.points, strict=True)
+        return (
+            min(xs) - self.radius,
+            min(ys) - self.radius,
+            max(xs) + self.radius,
+            max(ys) + self.radius,
+        )
+
+
+MaskShape = Annotated[MaskRect | MaskPolygon | MaskStroke, Field(discriminator="type")]
+
+
+class VectorMask(BaseModel):
+    """
+    Inpainting mask drawn as shapes over the source image.
+
+    Coordinates are in a ``width`` x ``height`` space covering the whole
+    source image, e.g. its pixel size in the editor. Shapes may reach past
+    the image by up to its own size on each side, and a stroke's radius is
+    at most the image's longer side. Shapes are painted in order, so an
+    ``erase`` shape clears what earlier shapes painted. The mask is
+    rasterized at the model's resolution when the job runs.
+    """
+
+    width: int = Field(..., gt=0, le=16384)
+    height: int = Field(..., gt=0, le=16384)
+    shapes: list[MaskShape] = Field(..., min_length=1, max_length=MAX_MASK_SHAPES)
+
+    @model_validator(mode="after")
+    def check_shapes(self) -> "VectorMask":
+        """Reject shapes far outside the image and masks that cannot paint inside it."""
+        paints = False
+        for index, shape in enumerate(self.shapes):
+            if isinstance(shape, MaskStroke) and shape.radius > max(self.width, self.height):
+                raise ValueError(f"Shape {index}: radius exceeds the image size")
+            left, top, right, bottom = shape.bounds()
+            if (
+                left < -self.width
+                or top < -self.height
+                or right > 2 * self.width
+                or bottom > 2 * self.height
+            ):
+                raise ValueError(f"Shape {index} reaches too far outside the image")
+            inside = right > 0 and bottom > 0 and left < self.width and top < self.height
+            paints = paints or (inside and not shape.erase)
+        if not paints:
+            raise ValueError("Mask paints nothing inside the image")
+        return self
 
 
 class JobType(str, Enum):
@@ -45,8 +162,100 @@ class CreateJobRequest(BaseModel):
     steps: int = Field(30, ge=10, le=50)
     strength: float | None = Field(None, ge=0.0, le=1.0)
     source_image_id: str | None = None
-    mask_data: str | None = None  # base64 encoded mask for inpaint
+    # Inpaint mask, one of: base64 image, shapes, or an ID from POST /api/jobs/masks
+    mask_data: Base64Data | None = None
+    mask: VectorMask | None = None
+    mask_id: str | None = None
     model: str | None = None  # model ID for generation
+    callback_url: AnyHttpUrl | None = None  # signed POST on completion or failure
+
+    @model_validator(mode="after")
+    def check_single_mask(self) -> "CreateJobRequest":
+        """Allow at most one way of passing the mask."""
+        if sum(value is not None for value in (self.mask_data, self.mask, self.mask_id)) > 1:
+            raise ValueError("Provide only one of 'mask_data', 'mask' and 'mask_id'")
+        return self
+
+
+class BatchMatrix(BaseModel):
+    """Parameter matrix expanded into one job per combination."""
+
+    prompts: list[Annotated[str, Field(min_length=1, max_length=2000)]] = Field(..., min_length=1)
+    seeds: list[Annotated[int, Field(ge=0, le=2147483647)] | None] = Field([None], min_length=1)
+    steps: list[Annotated[int, Field(ge=10, le=50)]] = Field([30], min_length=1)
+    models: list[str | None] = Field([None], min_length=1)
+
+
+class CreateBatchRequest(BaseModel):
+    """
+    Request schema for creating a batch of jobs.
+
+    Either ``jobs`` lists every job explicitly, or ``matrix`` is expanded to
+    prompts x seeds x steps x models, with the remaining fields shared by
+    every generated job.
+    """
+
+    jobs: list[CreateJobRequest] | None = Field(None, min_length=1)
+    matrix: BatchMatrix | None = None
+
+    # Shared settings for matrix jobs
+    type: JobType = JobType.TEXT2IMG
+    negative_prompt: str | None = Field(None, max_length=2000)
+    aspect_ratio: str = Field("1:1", pattern=r"^\d+:\d+$")
+    strength: float | None = Field(None, ge=0.0, le=1.0)
+    source_image_id: str | None = None
+    mask_data: Base64Data | None = None
+    mask: VectorMask | None = None
+    mask_id: str | None = None
+    callback_url: AnyHttpUrl | None = None
+
+    @model_validator(mode="after")
+    def check_jobs_or_matrix(self) -> "CreateBatchRequest":
+        """Require exactly one of jobs and matrix."""
+        if (self.jobs is None) == (self.matrix is None):
+            raise ValueError("Provide either 'jobs' or 'matrix'")
+        return self
+
+    @property
+    def job_count(self) -> int:
+        """Number of jobs in this batch, without expanding the matrix."""
+        if self.jobs is not None:
+            return len(self.jobs)
+        return (
+            len(self.matrix.prompts)
+            * len(self.matrix.seeds)
+            * len(self.matrix.steps)
+            * len(self.matrix.models)
+        )
+
+    def expand(self) -> list[CreateJobRequest]:
+        """Return the individual job requests of this batch."""
+        if self.jobs is not None:
+            return list(self.jobs)
+
+        return [
+            CreateJobRequest(
+                type=self.type,
+                prompt=prompt,
+                negative_prompt=self.negative_prompt,
+                aspect_ratio=self.aspect_ratio,
+                seed=seed,
+                steps=steps,
+                strength=self.strength,
+                source_image_id=self.source_image_id,
+                mask_data=self.mask_data,
+                mask=self.mask,
+                mask_id=self.mask_id,
+                model=model,
+                callback_url=self.callback_url,
+            )
+            for prompt, seed, steps, model in product(
+                self.matrix.prompts,
+                self.matrix.seeds,
+                self.matrix.steps,
+                self.matrix.models,
+            )
+        ]
 
 
 class JobResponse(BaseModel):
@@ -64,12 +273,51 @@ class JobResponse(BaseModel):
     strength: float | None
     model: str | None
     source_image_id: str | None
+    batch_id: str | None = None
+    callback_url: str | None = None
     error_message: str | None
     created_at: datetime
     started_at: datetime | None
     completed_at: datetime | None
     result_image_id: str | None = None
 
+    # Estimated queue wait before the job starts, returned when it is queued
+    estimated_wait_seconds: float | None = None
+
+    # Execution profile, recorded once the job finishes
+    timings: dict[str, float] | None = None
+    cpu_seconds: float | None = None
+    peak_rss_bytes: int | None = None
+    pipeline_cache_hit: bool | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class JobEvent(BaseModel):
+    """Job state change pushed to event stream subscribers."""
+
+    job_id: str
+    batch_id: str | None = None
+    status: JobStatus
+    result_image_id: str | None = None
+    error_message: str | None = None
+    started_at: datetime | None = None
+    completed_at: datetime | None = None
+
+
+class WebhookDeliveryResponse(BaseModel):
+    """Response schema for a webhook delivery record."""
+
+    id: str
+    url: str
+    event: str
+    status: str
+    attempts: int
+    last_status_code: int | None = None
+    last_error: str | None = None
+    created_at: datetime
+    delivered_at: datetime | None = None
+
     model_config = {"from_attributes": True}
 
 
@@ -81,3 +329,22 @@ class JobListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: str | None = None
+
+
+class BatchResponse(BaseModel):
+    """Response schema for a batch of jobs."""
+
+    batch_id: str
+    total: int
+    status_counts: dict[JobStatus, int]
+    items: list[JobResponse]
+
+
+class MaskUploadResponse(BaseModel):
+    """Response schema for an uploaded inpainting mask."""
+
+    mask_id: str  # pass as ``mask_id`` when creating jobs, until the upload expires
+    width: int
+    height: int
+    coverage: float  # fraction of pixels painted
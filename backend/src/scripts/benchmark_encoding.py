@@ -0,0 +1,100 @@
+"""Compare output image encodings by file size and encoding time.
+
+Usage:
+    python -m src.scripts.benchmark_encoding [IMAGE ...] [--repeat N]
+
+Without images, a synthetic 512x512 image with gradients and noise stands in
+for a generated image. Pass a few real outputs for representative numbers.
+"""
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from src.services.image_encoding import FORMATS, EncodingOptions, encode_image
+
+CANDIDATES = [
+    EncodingOptions("png", effort=1),
+    EncodingOptions("png", effort=6),
+    EncodingOptions("png", effort=9),
+    EncodingOptions("webp", lossless=True, effort=0),
+    EncodingOptions("webp", lossless=True, effort=4),
+    EncodingOptions("webp", quality=90, effort=4),
+    EncodingOptions("webp", quality=80, effort=4),
+    EncodingOptions("jpeg", quality=90),
+    EncodingOptions("jpeg", quality=90, effort=6),
+    EncodingOptions("avif", quality=80, effort=4),
+    EncodingOptions("avif", quality=60, effort=4),
+]
+
+
+def synthetic_image(size: int = 512) -> Image.Image:
+    """Smooth gradients with shapes and fine noise, roughly like a diffusion output."""
+    gradient = Image.linear_gradient("L").resize((size, size))
+    image = Image.merge(
+        "RGB",
+        (gradient, gradient.rotate(90), Image.effect_noise((size, size), 40)),
+    )
+    draw = ImageDraw.Draw(image)
+    for i in range(12):
+        offset = i * size // 14
+        draw.ellipse(
+            (offset, offset // 2, offset + size // 4, offset // 2 + size // 5),
+            fill=(40 * i % 255, 200 - 10 * i, 90 + 12 * i),
+        )
+    noise = Image.effect_noise((size, size), 25).convert("RGB")
+    return Image.blend(image.filter(ImageFilter.GaussianBlur(2)), noise, 0.1)
+
+
+def describe(options: EncodingOptions) -> str:
+    """Short label for a candidate encoding."""
+    if options.format == "png":
+        return f"png level={options.effort}"
+    if options.format == "webp" and options.lossless:
+        return f"webp lossless method={options.effort}"
+    return f"{options.format} q={options.quality} effort={options.effort}"
+
+
+def benchmark(images: list[Image.Image], repeat: int) -> None:
+    """Encode every image with every candidate and print a table."""
+    results: list[tuple[str, float, float] | tuple[str, None, None]] = []
+    for options in CANDIDATES:
+        if not FORMATS[options.format].available:
+            results.append((describe(options), None, None))
+            continue
+
+        sizes = []
+        timings = []
+        for image in images:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                data = encode_image(image, options)
+                timings.append((time.perf_counter() - started) * 1000)
+            sizes.append(len(data))
+        results.append((describe(options), statistics.mean(sizes), statistics.median(timings)))
+
+    # Sizes are relative to PNG at zlib level 6, Pillow's default
+    baseline = next(size for label, size, _ in results if label == "png level=6")
+    print(f"{'encoding':<28}{'avg size':>12}{'vs png':>8}{'median ms':>12}")
+    for label, size, timing in results:
+        if size is None:
+            print(f"{label:<28}  unavailable in this Pillow build")
+            continue
+        print(f"{label:<28}{size / 1024:>9.1f} KB{size / baseline:>7.2f}x{timing:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("images", nargs="*", type=Path, help="images to encode")
+    parser.add_argument("--repeat", type=int, default=3, help="encodes per image and setting")
+    args = parser.parse_args()
+
+    images = [Image.open(path).convert("RGB") for path in args.images] or [synthetic_image()]
+    benchmark(images, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Reference counting for content-addressed blobs."""
+
+from datetime import UTC, datetime
+
+from sqlalchemy import case, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import dialect_insert
+from src.models.blob import Blob
+from src.services.blob_store import BlobStore, get_blob_store
+
+
+class BlobService:
+    """
+    Store payloads in the blob store and count the rows that reference them.
+
+    A payload is written once however many uploads, images or masks share
+    it; each referencing row adds one to the blob's ``ref_count`` in the
+    same transaction that creates the row, and releases it when the row is
+    deleted. Blobs whose count drops to zero are left for the storage
+    sweeper, so a payload stored again in the meantime is simply reused.
+
+    The sweeper deletes a payload while holding its deleted row, so once a
+    reference is added the payload cannot be collected; whether it is
+    still present is checked only after that.
+    """
+
+    def __init__(self, db: AsyncSession, blob_store: BlobStore | None = None):
+        self.db = db
+        self.blob_store = blob_store or get_blob_store()
+
+    async def add_ref(self, digest: str, size: int, refs: int = 1) -> bool:
+        """
+        Add references to a blob, creating its row on first use.
+
+        Returns:
+            Whether the blob had no references before, in which case its
+            payload may have been collected
+        """
+        now = datetime.now(UTC)
+        insert = dialect_insert(self.db)
+        statement = insert(Blob).values(
+            hash=digest,
+            size=size,
+            ref_count=refs,
+            created_at=now,
+            updated_at=now,
+        )
+        ref_count = await self.db.scalar(
+            statement.on_conflict_do_update(
+                index_elements=[Blob.hash],
+                set_={"ref_count": Blob.ref_count + refs, "updated_at": now},
+            ).returning(Blob.ref_count)
+        )
+        return ref_count == refs
+
+    async def store(
+        self,
+        data: bytes,
+        refs: int = 1,
+        content_type: str = "application/octet-stream",
+    ) -> str:
+        """
+        Reference a payload, writing it to the blob store if it is missing.
+
+        A payload already written with ``BlobStore.put`` is checked again
+        here, since it may have been collected before it was referenced.
+
+        Returns:
+            The payload's digest
+        """
+        digest = self.blob_store.digest(data)
+        if await self.add_ref(digest, len(data), refs):
+            await self.blob_store.put(data, content_type)
+        return digest
+
+    async def release(self, digest: str, refs: int = 1) -> None:
+        """Drop references to a blob."""
+        await self.db.execute(
+            update(Blob)
+            .where(Blob.hash == digest)
+            .values(
+                ref_count=case((Blob.ref_count > refs, Blob.ref_count - refs), else_=0),
+                updated_at=datetime.now(UTC),
+            )
+        )
@@ -0,0 +1,107 @@
+"""Content-addressed blob storage."""
+
+import hashlib
+import logging
+import re
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from src.services.storage import StorageBackend, get_storage_backend
+
+logger = logging.getLogger(__name__)
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """
+    Store binary payloads under their SHA-256 digest in a storage backend.
+
+    Identical payloads are stored once. Keys are sharded into two levels of
+    prefixes by the first four hex digits (``ab/cd/abcd...``) so that no
+    single directory grows too large on the local backend.
+    """
+
+    def __init__(self, backend: StorageBackend | None = None):
+        self.backend = backend or get_storage_backend()
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        """SHA-256 hex digest used as a blob's address."""
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def key_for(digest: str) -> str:
+        """Storage key of a blob."""
+        if not _DIGEST_PATTERN.match(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def local_path(self, digest: str) -> Path | None:
+        """File path of a blob, if the backend stores blobs as local files."""
+        return self.backend.local_path(self.key_for(digest))
+
+    async def put(self, data: bytes, content_type: str = "application/octet-stream") -> str:
+        """
+        Store a payload if it is not already present.
+
+        Returns:
+            The payload's digest
+        """
+        digest = self.digest(data)
+        key = self.key_for(digest)
+        if await self.backend.exists(key):
+            return digest
+
+        await self.backend.put(key, data, content_type)
+        logger.debug(f"Stored blob {digest} ({len(data)} bytes)")
+        return digest
+
+    async def get(self, digest: str) -> bytes:
+        """
+        Read a payload.
+
+        Raises:
+            FileNotFoundError: If no blob has this digest
+        """
+        return await self.backend.get(self.key_for(digest))
+
+    def stream(self, digest: str, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        """Stream a payload, or an inclusive byte range of it."""
+        return self.backend.stream(self.key_for(digest), start, end)
+
+    async def size(self, digest: str) -> int | None:
+        """Size of a blob in bytes, or None if it is not stored."""
+        return await self.backend.size(self.key_for(digest))
+
+    async def exists(self, digest: str) -> bool:
+        """Check whether a blob is stored."""
+        return await self.backend.exists(self.key_for(digest))
+
+    async def presign(
+        self,
+        digest: str,
+        expires_seconds: int,
+        filename: str | None = None,
+        content_type: str | None = None,
+    ) -> str | None:
+        """Time-limited download URL of a blob, if the backend supports one."""
+        return await self.backend.presign(
+            self.key_for(digest), expires_seconds, filename, content_type
+        )
+
+    async def delete(self, digest: str) -> None:
+        """Delete a blob if it is stored."""
+        await self.backend.delete(self.key_for(digest))
+
+
+# Singleton instance
+_blob_store: BlobStore | None = None
+
+
+def get_blob_store() -> BlobStore:
+    """Get or create blob store instance."""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore()
+    return _blob_store
@@ -0,0 +1,141 @@
+"""Size-bounded on-disk cache of files, evicted least recently used first."""
+
+import asyncio
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from src.core.executors import get_io_executor
+from src.core.metrics import Counter, Gauge
+
+# Blocking helpers, run on the I/O executor
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write a file so that readers never see it partially written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def _scan_cache(root: Path) -> list[tuple[Path, int, float]]:
+    """List cached files as (path, size, mtime), removing interrupted writes."""
+    entries = []
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = Path(directory) / filename
+            try:
+                if filename.startswith(".tmp-"):
+                    path.unlink()
+                    continue
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+    return entries
+
+
+def _delete_file(path: Path) -> None:
+    path.unlink(missing_ok=True)
+
+
+class DiskCache:
+    """
+    Files under a directory, deleted least recently used first once their
+    total size exceeds ``max_bytes``.
+
+    Files are named by a hex key and sharded by its first two digits.
+    Recency is tracked in memory; files left by a previous run are indexed
+    on first use and ordered by modification time.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_bytes: int,
+        bytes_gauge: Gauge | None = None,
+        evictions: Counter | None = None,
+        **metric_labels: Any,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._bytes_gauge = bytes_gauge
+        self._evictions = evictions
+        self._metric_labels = metric_labels
+
+        self._entries: OrderedDict[Path, int] = OrderedDict()
+        self._size = 0
+        self._loading: asyncio.Task | None = None
+
+    def path_for(self, key: str, extension: str) -> Path:
+        """File for a key."""
+        return self.root / key[:2] / f"{key}.{extension}"
+
+    def _report_size(self) -> None:
+        if self._bytes_gauge is not None:
+            self._bytes_gauge.set(self._size, **self._metric_labels)
+
+    async def _load(self) -> None:
+        """Index files left in the cache by a previous run."""
+        entries = await get_io_executor().run(_scan_cache, self.root)
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            self._entries[path] = size
+            self._size += size
+        self._report_size()
+        await self._evict()
+
+    async def ensure_loaded(self) -> None:
+        """Index the cache directory once; concurrent callers share the scan."""
+        if self._loading is None:
+            self._loading = asyncio.create_task(self._load())
+        await asyncio.shield(self._loading)
+
+    async def _evict(self) -> None:
+        """Delete least recently used files until the cache fits its limit."""
+        evicted = []
+        # The newest file stays even if it alone exceeds the limit
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            path, size = self._entries.popitem(last=False)
+            self._size -= size
+            evicted.append(path)
+
+        if evicted:
+            self._report_size()
+            if self._evictions is not None:
+                self._evictions.inc(len(evicted), **self._metric_labels)
+            for path in evicted:
+                await get_io_executor().run(_delete_file, path)
+
+    def touch(self, path: Path) -> bool:
+        """
+        Mark a cached file as recently used.
+
+        Returns:
+            Whether the file is cached
+        """
+        if path not in self._entries:
+            return False
+        if not path.exists():
+            # Removed behind our back
+            self._size -= self._entries.pop(path)
+            self._report_size()
+            return False
+        self._entries.move_to_end(path)
+        return True
+
+    async def put(self, path: Path, data: bytes) -> None:
+        """Write a file into the cache, evicting older files if needed."""
+        await get_io_executor().run(_write_atomic, path, data)
+        self._size += len(data) - self._entries.pop(path, 0)
+        self._entries[path] = len(data)
+        self._report_size()
+        await self._evict()
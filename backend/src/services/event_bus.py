@@ -0,0 +1,301 @@
+"""Publish/subscribe bus for job events."""
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from src.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Events buffered per subscriber before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# PostgreSQL NOTIFY channel shared by all logical channels
+PG_NOTIFY_CHANNEL = "imageplayground_events"
+
+# NOTIFY payloads must be shorter than 8000 bytes
+PG_NOTIFY_MAX_PAYLOAD = 7999
+
+# Delay before reconnecting a dropped connection, doubled after each failure
+RECONNECT_DELAY_MIN = 1.0
+RECONNECT_DELAY_MAX = 30.0
+
+# How often an idle listening connection is checked for silent drops
+LISTEN_HEALTH_CHECK_INTERVAL = 30.0
+
+
+def user_channel(user_id: str) -> str:
+    """Channel carrying events for all of a user's jobs."""
+    return f"user:{user_id}"
+
+
+class InMemoryEventBus:
+    """
+    Event bus that delivers events to subscribers in the same process.
+
+    Each subscriber gets its own bounded queue; if a subscriber falls behind,
+    its oldest events are dropped rather than blocking publishers.
+    """
+
+    def __init__(self):
+        # Subscriber queues of each channel, with the job IDs they are limited to
+        self._subscribers: dict[str, dict[asyncio.Queue[dict[str, Any]], set[str] | None]] = {}
+
+    async def start(self) -> None:
+        """Start the bus."""
+
+    async def stop(self) -> None:
+        """Stop the bus."""
+
+    async def publish(self, channel: str, event: dict[str, Any]) -> None:
+        """Publish an event to every subscriber of a channel."""
+        self._deliver(channel, event)
+
+    def _deliver(self, channel: str, event: dict[str, Any]) -> None:
+        """Hand an event to local subscribers."""
+        for queue, job_ids in self._subscribers.get(channel, {}).items():
+            if job_ids is not None and event.get("job_id") not in job_ids:
+                continue
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(
+        self,
+        channel: str,
+        job_ids: set[str] | None = None,
+    ) -> AsyncIterator[asyncio.Queue[dict[str, Any]]]:
+        """
+        Subscribe to a channel for the duration of the block.
+
+        Args:
+            channel: Channel to subscribe to
+            job_ids: Only queue events of these jobs, so other jobs cannot
+                push them out of the queue; may be filled in after
+                subscribing
+        """
+        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(channel, {})[queue] = job_ids
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.pop(queue, None)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+
+class PostgresEventBus(InMemoryEventBus):
+    """
+    Event bus that fans out across processes with PostgreSQL LISTEN/NOTIFY.
+
+    Events are published with ``pg_notify`` and every process, including the
+    publisher, receives them on a dedicated listening connection and hands
+    them to its local subscribers. Requires the ``asyncpg`` driver.
+
+    A dropped listening connection is reopened in the background with
+    backoff and LISTENs again; events published while it is down are not
+    delivered. A dropped publishing connection is reopened by the next
+    publish, at most once per backoff delay.
+    """
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self.dsn = dsn
+        self._asyncpg = None
+        self._listen_conn = None
+        self._listen_lost = asyncio.Event()
+        self._listen_task: asyncio.Task | None = None
+        self._notify_conn = None
+        self._notify_lock = asyncio.Lock()
+        self._notify_delay = RECONNECT_DELAY_MIN
+        self._notify_retry_at = 0.0
+
+    async def start(self) -> None:
+        """Open the listening and publishing connections."""
+        try:
+            import asyncpg
+        except ImportError as e:
+            raise RuntimeError(
+                "The PostgreSQL event bus requires asyncpg (pip install asyncpg)"
+            ) from e
+
+        self._asyncpg = asyncpg
+        await self._listen()
+        self._notify_conn = await asyncpg.connect(self.dsn)
+        self._listen_task = asyncio.create_task(self._keep_listening())
+        logger.info("PostgreSQL event bus listening")
+
+    async def stop(self) -> None:
+        """Stop reconnecting and close the connections."""
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except asyncio.CancelledError:
+                pass
+            self._listen_task = None
+        for conn in (self._listen_conn, self._notify_conn):
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        self._listen_conn = None
+        self._notify_conn = None
+
+    async def _listen(self) -> None:
+        """Open the listening connection and LISTEN on the notify channel."""
+        conn = await self._asyncpg.connect(self.dsn)
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _: lost.set())
+        try:
+            await conn.add_listener(PG_NOTIFY_CHANNEL, self._on_notify)
+        except BaseException:
+            conn.terminate()
+            raise
+        self._listen_conn = conn
+        self._listen_lost = lost
+
+    async def _keep_listening(self) -> None:
+        """Reopen the listening connection whenever it drops."""
+        while True:
+            await self._wait_for_listen_loss()
+            logger.warning("Event bus listening connection lost, reconnecting")
+            self._listen_conn.terminate()
+
+            delay = RECONNECT_DELAY_MIN
+            while True:
+                try:
+                    await self._listen()
+                    break
+                except Exception as e:
+                    logger.error(f"Event bus reconnect failed, retrying in {delay:.0f}s: {e}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, RECONNECT_DELAY_MAX)
+            logger.info("PostgreSQL event bus listening again")
+
+    async def _wait_for_listen_loss(self) -> None:
+        """Wait until the listening connection closes or stops answering."""
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._listen_lost.wait(), timeout=LISTEN_HEALTH_CHECK_INTERVAL
+                )
+                return
+            except TimeoutError:
+                pass
+            try:
+                await self._listen_conn.execute("SELECT 1", timeout=LISTEN_HEALTH_CHECK_INTERVAL)
+            except Exception as e:
+                logger.warning(f"Event bus listening connection failed a health check: {e}")
+                return
+
+    async def _get_notify_conn(self):
+        """Get the publishing connection, reopening it if it was closed."""
+        if self._notify_conn is not None and not self._notify_conn.is_closed():
+            return self._notify_conn
+        if time.monotonic() < self._notify_retry_at:
+            raise ConnectionError("Event bus publishing connection is down")
+
+        try:
+            self._notify_conn = await self._asyncpg.connect(self.dsn)
+        except Exception:
+            self._notify_retry_at = time.monotonic() + self._notify_delay
+            self._notify_delay = min(self._notify_delay * 2, RECONNECT_DELAY_MAX)
+            raise
+        self._notify_delay = RECONNECT_DELAY_MIN
+        logger.info("Event bus publishing connection reopened")
+        return self._notify_conn
+
+    async def publish(self, channel: str, event: dict[str, Any]) -> None:
+        """Publish an event to subscribers in every process."""
+        payload = encode_notification(channel, event)
+        async with self._notify_lock:
+            conn = await self._get_notify_conn()
+            try:
+                await conn.execute("SELECT pg_notify($1, $2)", PG_NOTIFY_CHANNEL, payload)
+            except Exception:
+                if not conn.is_closed():
+                    raise
+                # The connection dropped; retry once on a new one
+                conn = await self._get_notify_conn()
+                await conn.execute("SELECT pg_notify($1, $2)", PG_NOTIFY_CHANNEL, payload)
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        """Deliver a notification received from PostgreSQL."""
+        try:
+            message = json.loads(payload)
+            self._deliver(message["channel"], message["event"])
+        except Exception as e:
+            logger.error(f"Dropping malformed event notification: {e}")
+
+
+def encode_notification(channel: str, event: dict[str, Any]) -> str:
+    """
+    Encode an event as a NOTIFY payload.
+
+    Long error messages are truncated to keep the payload within
+    PostgreSQL's limit; subscribers can read the full message from the job.
+
+    Raises:
+        ValueError: If the event is too large even without its error message
+    """
+
+    def encode(event: dict[str, Any]) -> str | None:
+        payload = json.dumps({"channel": channel, "event": event}, default=str)
+        return payload if len(payload.encode()) <= PG_NOTIFY_MAX_PAYLOAD else None
+
+    payload = encode(event)
+    if payload is not None:
+        return payload
+
+    message = event.get("error_message") or ""
+    payload = encode({**event, "error_message": "..."})
+    if payload is None:
+        raise ValueError(f"Event too large for NOTIFY on channel {channel}")
+    # Keep the longest prefix of the message that fits
+    low, high = 1, len(message)
+    while low <= high:
+        middle = (low + high) // 2
+        truncated = encode({**event, "error_message": f"{message[:middle]}..."})
+        if truncated is None:
+            high = middle - 1
+        else:
+            payload, low = truncated, middle + 1
+    return payload
+
+
+EventBus = InMemoryEventBus
+
+
+def create_event_bus() -> EventBus:
+    """Create the event bus configured by ``event_bus_backend``."""
+    backend = settings.event_bus_backend
+    if backend == "auto":
+        backend = "postgres" if settings.database_url.startswith("postgresql") else "memory"
+
+    if backend == "memory":
+        return InMemoryEventBus()
+    if backend == "postgres":
+        dsn = settings.event_bus_url or settings.database_url
+        return PostgresEventBus(dsn.replace("postgresql+asyncpg://", "postgresql://"))
+
+    raise ValueError(f"Unknown event bus backend: {backend}")
+
+
+# Singleton instance
+_event_bus: EventBus | None = None
+
+
+def get_event_bus() -> EventBus:
+    """Get or create event bus instance."""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = create_event_bus()
+    return _event_bus
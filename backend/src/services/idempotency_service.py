@@ -0,0 +1,124 @@
+"""Idempotency key service for job creation."""
+
+import hashlib
+import logging
+from datetime import UTC, datetime, timedelta
+
+from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import get_settings
+from src.core.database import async_session_maker
+from src.models.idempotency_key import IdempotencyKey
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyMismatchError(ValueError):
+    """Raised when a key is reused with a different request."""
+
+
+def request_hash(scope: str, request: BaseModel) -> str:
+    """Fingerprint of a request body, used to detect a key reused for another request."""
+    body = request.model_dump_json(exclude_none=True)
+    return hashlib.sha256(f"{scope}:{body}".encode()).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Service for idempotency keys.
+
+    A key is recorded in the same transaction as the jobs its request
+    creates, so a retry either sees the committed jobs or, if it raced the
+    original request, fails on the key's primary key and can then replay.
+    Keys expire after ``idempotency_key_ttl_hours``; a user's expired keys
+    are removed whenever they record a new one, and all expired keys at
+    startup.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def lookup(
+        self,
+        user_id: str,
+        key: str,
+        scope: str,
+        fingerprint: str,
+    ) -> IdempotencyKey | None:
+        """
+        Find an unexpired key from an earlier request.
+
+        Raises:
+            IdempotencyKeyMismatchError: If the key was used for another request
+        """
+        result = await self.db.execute(
+            select(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.expires_at > datetime.now(UTC),
+            )
+        )
+        record = result.scalar_one_or_none()
+        if record and (record.scope != scope or record.request_hash != fingerprint):
+            raise IdempotencyKeyMismatchError(
+                "Idempotency-Key has already been used with a different request"
+            )
+        return record
+
+    async def record(
+        self,
+        user_id: str,
+        key: str,
+        scope: str,
+        fingerprint: str,
+        job_id: str | None = None,
+        batch_id: str | None = None,
+    ) -> None:
+        """
+        Record a key for the jobs created by a request.
+
+        Raises:
+            IntegrityError: If a concurrent request recorded the key first
+        """
+        now = datetime.now(UTC)
+        # Clear the user's expired keys, which also lets an expired key be reused
+        await self.db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.expires_at <= now,
+            )
+        )
+        self.db.add(
+            IdempotencyKey(
+                user_id=user_id,
+                key=key,
+                scope=scope,
+                request_hash=fingerprint,
+                job_id=job_id,
+                batch_id=batch_id,
+                created_at=now,
+                expires_at=now + timedelta(hours=settings.idempotency_key_ttl_hours),
+            )
+        )
+        await self.db.flush()
+
+    async def purge_expired(self) -> int:
+        """Delete expired keys; returns the number removed."""
+        result = await self.db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.now(UTC))
+        )
+        return result.rowcount or 0
+
+
+async def purge_expired_keys() -> None:
+    """Delete every expired idempotency key in its own transaction."""
+    async with async_session_maker() as session:
+        removed = await IdempotencyService(session).purge_expired()
+        await session.commit()
+    if removed:
+        logger.info(f"Purged {removed} expired idempotency keys")
@@ -0,0 +1,155 @@
+"""Encoding of images into their stored file formats."""
+
+import logging
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ImageFormat:
+    """A file format images can be stored in."""
+
+    name: str  # setting value, e.g. "webp"
+    pil_format: str
+    mime_type: str
+    extension: str
+    feature: str | None = None  # Pillow feature that must be compiled in
+    alpha: bool = True  # whether the format keeps an alpha channel
+
+    @property
+    def available(self) -> bool:
+        """Whether this Pillow build can encode the format."""
+        return self.feature is None or bool(features.check(self.feature))
+
+
+FORMATS: dict[str, ImageFormat] = {
+    "png": ImageFormat("png", "PNG", "image/png", "png"),
+    "webp": ImageFormat("webp", "WEBP", "image/webp", "webp", feature="webp"),
+    "jpeg": ImageFormat("jpeg", "JPEG", "image/jpeg", "jpg", alpha=False),
+    "avif": ImageFormat("avif", "AVIF", "image/avif", "avif", feature="avif"),
+}
+
+_MIME_TYPES_BY_EXTENSION = {fmt.extension: fmt.mime_type for fmt in FORMATS.values()}
+_MIME_TYPES_BY_EXTENSION["jpeg"] = "image/jpeg"
+
+
+@dataclass(frozen=True)
+class EncodingOptions:
+    """
+    How to encode an image.
+
+    ``quality`` applies to the lossy formats and to WebP when ``lossless`` is
+    off. ``effort`` trades encoding time for size: the WebP method (0-6),
+    the PNG zlib level (0-9) and, inverted, the AVIF speed (0-10).
+    """
+
+    format: str = "png"
+    quality: int = 90
+    lossless: bool = False
+    effort: int = 4
+
+    @property
+    def image_format(self) -> ImageFormat:
+        return FORMATS[self.format]
+
+
+def resolve_format(name: str) -> str:
+    """
+    Validate a configured format, falling back to PNG if Pillow cannot encode it.
+
+    Raises:
+        ValueError: If the format is not one of ``FORMATS``
+    """
+    name = name.lower()
+    if name == "jpg":
+        name = "jpeg"
+    if name not in FORMATS:
+        raise ValueError(f"Unknown image format {name!r}; use one of {', '.join(FORMATS)}")
+    if not FORMATS[name].available:
+        logger.warning(f"Pillow cannot encode {name}; storing images as PNG instead")
+        return "png"
+    return name
+
+
+def _save_params(options: EncodingOptions) -> dict[str, Any]:
+    """Pillow ``save`` parameters for the encoding options."""
+    if options.format == "png":
+        return {"compress_level": max(0, min(options.effort, 9))}
+    if options.format == "webp":
+        params: dict[str, Any] = {"method": max(0, min(options.effort, 6))}
+        if options.lossless:
+            # For lossless WebP, quality is the compression effort
+            params.update(lossless=True, quality=100)
+        else:
+            params["quality"] = options.quality
+        return params
+    if options.format == "jpeg":
+        return {"quality": options.quality, "optimize": options.effort >= 6}
+    if options.format == "avif":
+        return {"quality": options.quality, "speed": max(0, min(10 - options.effort, 10))}
+    return {}
+
+
+def decode_image(data: bytes) -> Image.Image:
+    """Decode image bytes into a fully loaded image."""
+    image = Image.open(BytesIO(data))
+    image.load()
+    return image
+
+
+def encode_image(image: Image.Image, options: EncodingOptions) -> bytes:
+    """Encode an image with the given options."""
+    image_format = options.image_format
+    if not image_format.alpha and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = BytesIO()
+    image.save(buffer, format=image_format.pil_format, **_save_params(options))
+    return buffer.getvalue()
+
+
+def extension_for_mime_type(mime_type: str) -> str:
+    """File extension for an image MIME type, without the dot."""
+    for image_format in FORMATS.values():
+        if image_format.mime_type == mime_type:
+            return image_format.extension
+    return "bin"
+
+
+def mime_type_for_path(path: str | Path) -> str:
+    """MIME type of a stored image file, from its extension."""
+    extension = Path(path).suffix.lstrip(".").lower()
+    return _MIME_TYPES_BY_EXTENSION.get(extension, "application/octet-stream")
+
+
+def negotiate_format(accept: str | None, default: str) -> str:
+    """
+    Pick a format for a response from an ``Accept`` header.
+
+    The default format wins whenever the client accepts it, explicitly or
+    through a wildcard; otherwise the first available format the client
+    lists explicitly is used. Clients that accept none of them get the
+    default anyway.
+    """
+    if not accept:
+        return default
+
+    accepted = set()
+    for part in accept.split(","):
+        media_type, *params = (item.strip() for item in part.split(";"))
+        if any(param.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000") for param in params):
+            continue
+        accepted.add(media_type.lower())
+
+    if FORMATS[default].mime_type in accepted or accepted & {"*/*", "image/*"}:
+        return default
+    for name in ("avif", "webp", "png", "jpeg"):
+        if FORMATS[name].available and FORMATS[name].mime_type in accepted:
+            return name
+    return default
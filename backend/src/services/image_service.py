@@ -3,26 +3,306 @@
 import base64
 import json
 import logging
-import os
+import math
 from datetime import datetime, timedelta, timezone
 from io import BytesIO
 from pathlib import Path
-from uuid import uuid4
+from typing import BinaryIO
 
-from PIL import Image, ImageFilter
+from PIL import Image, ImageDraw
 
 from src.core.config import get_settings
-from src.models.image import DEFAULT_EXPIRATION_HOURS
+from src.core.executors import InstrumentedExecutor, get_cpu_executor, get_io_executor
+from src.core.metrics import image_bytes_written_total, images_saved_total
+from src.models.image import DEFAULT_EXPIRATION_HOURS, GeneratedImage
+from src.schemas.job import MaskPolygon, MaskRect, VectorMask
+from src.services import mask_engine
+from src.services.blob_store import get_blob_store
+from src.services.image_encoding import (
+    EncodingOptions,
+    decode_image,
+    encode_image,
+    resolve_format,
+)
+from src.services.mask_engine import MaskStats
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
-# Thumbnail size
-THUMBNAIL_SIZE = (256, 256)
+UPLOAD_FORMATS = {"JPEG", "PNG", "WEBP"}
+
+
+# Blocking helpers, run on the CPU or I/O executor
+
+
+def _encode_png(image: Image.Image, optimize: bool = True) -> bytes:
+    """Encode an image as PNG."""
+    buffer = BytesIO()
+    image.save(buffer, format="PNG", optimize=optimize)
+    return buffer.getvalue()
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """Convert an image to RGB, flattening transparency onto white."""
+    if image.mode in ("RGBA", "P", "LA"):
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        if image.mode == "P":
+            image = image.convert("RGBA")
+        background.paste(image, mask=image.split()[-1] if "A" in image.mode else None)
+        return background
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    return image
+
+
+def _reduced_size(size: tuple[int, int], short_edge: int) -> tuple[int, int]:
+    """Size scaled down so its shorter side is ``short_edge``; unchanged if already smaller."""
+    width, height = size
+    scale = short_edge / min(width, height)
+    if scale >= 1:
+        return size
+    return math.ceil(width * scale), math.ceil(height * scale)
+
+
+def _prepare_upload(file: BinaryIO) -> tuple[Image.Image, bytes]:
+    """
+    Validate an uploaded image, decode it within the pixel budget and
+    re-encode it as RGB PNG.
+
+    Only the header is read before the budget check. Images whose shorter
+    side exceeds ``upload_max_short_edge`` are decoded at reduced size:
+    JPEGs by DCT scaling in draft mode, which skips most of the decoding
+    work, other formats by ``reduce()`` right after decoding. The result
+    keeps its shorter side at or above the limit, which is set above every
+    model resolution.
+
+    Raises:
+        ValueError: If the data is not a readable image or has too many pixels
+    """
+    try:
+        image = Image.open(file)
+    except Image.DecompressionBombError as e:
+        raise ValueError(str(e)) from e
+    except Exception as e:
+        raise ValueError("Invalid or corrupted image file") from e
+    if image.format not in UPLOAD_FORMATS:
+        raise ValueError(f"Unsupported image format: {image.format}")
+
+    short_edge = settings.upload_max_short_edge
+    if image.format == "JPEG":
+        image.draft("RGB", _reduced_size(image.size, short_edge))
+
+    width, height = image.size
+    if width * height > settings.upload_max_pixels:
+        raise ValueError(
+            f"Image too large: {width}x{height} exceeds {settings.upload_max_pixels} pixels"
+        )
+
+    try:
+        image.load()
+    except Exception as e:
+        raise ValueError("Invalid or corrupted image file") from e
+
+    factor = min(image.size) // short_edge
+    if factor > 1:
+        image = image.reduce(factor)
+
+    image = _to_rgb(image)
+    # optimize=True makes several extra compression passes for a few percent
+    return image, _encode_png(image, optimize=False)
+
+
+def _write_files(files: list[tuple[Path, bytes]]) -> None:
+    """Write files, creating their directories."""
+    for path, data in files:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+
+def _read_file(path: Path) -> bytes | None:
+    """Read a file, or return None if it does not exist."""
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def _delete_file(path: Path) -> bool:
+    """Delete a file, returning whether it existed."""
+    try:
+        path.unlink()
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _crop_box(size: tuple[int, int], target_size: tuple[int, int]) -> tuple[int, int, int, int]:
+    """Centered box of ``size`` with the aspect ratio of ``target_size``."""
+    width, height = size
+    target_ratio = target_size[0] / target_size[1]
+
+    if width / height > target_ratio:
+        # Image is wider - crop width
+        new_width = int(height * target_ratio)
+        left = (width - new_width) // 2
+        return left, 0, left + new_width, height
+
+    # Image is taller - crop height
+    new_height = int(width / target_ratio)
+    top = (height - new_height) // 2
+    return 0, top, width, top + new_height
+
+
+def _resize_image(
+    image: Image.Image,
+    target_width: int,
+    target_height: int,
+    mode: str,
+) -> Image.Image:
+    """Crop or pad an image to the target size."""
+    if mode == "crop":
+        # Crop to aspect ratio then resize
+        image = image.crop(_crop_box(image.size, (target_width, target_height)))
+        return image.resize((target_width, target_height), Image.Resampling.LANCZOS)
+
+    elif mode == "pad":
+        # Resize maintaining aspect ratio and pad
+        image.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
+
+        # Create new image with padding
+        new_image = Image.new("RGB", (target_width, target_height), (0, 0, 0))
+        paste_x = (target_width - image.width) // 2
+        paste_y = (target_height - image.height) // 2
+        new_image.paste(image, (paste_x, paste_y))
+
+        return new_image
+
+    return image
+
+
+def _load_mask(mask_bytes: bytes) -> Image.Image:
+    """Decode a mask image as grayscale."""
+    mask_image = Image.open(BytesIO(mask_bytes))
+    if mask_image.width * mask_image.height > settings.upload_max_pixels:
+        raise ValueError(f"Mask is too large ({mask_image.width}x{mask_image.height})")
+    mask_image.load()
+
+    # Convert to grayscale (L mode) for mask operations
+    if mask_image.mode != "L":
+        mask_image = mask_image.convert("L")
+
+    return mask_image
+
+
+def _inspect_mask(
+    mask_bytes: bytes,
+    level: int,
+    target_size: tuple[int, int] | None = None,
+) -> MaskStats:
+    """Decode a mask and measure its painted area, as prepared for ``target_size`` if given."""
+    pixels = mask_engine.to_array(_load_mask(mask_bytes))
+    if target_size is None:
+        return mask_engine.stats(mask_engine.threshold(pixels, level))
+
+    left, top, right, bottom = _crop_box((pixels.shape[1], pixels.shape[0]), target_size)
+    binary = mask_engine.threshold(pixels[top:bottom, left:right], level)
+    painted = mask_engine.stats(binary)
+    if painted.empty:
+        return painted
+    return mask_engine.stats(mask_engine.resize(binary, target_size, bbox=painted.bbox))
+
+
+def _prepare_mask(
+    mask: Image.Image,
+    target_size: tuple[int, int],
+    blur_radius: float,
+    invert: bool,
+    dilate: int,
+    level: int,
+) -> Image.Image:
+    """Crop like the source, then binarize, resize, grow and feather a mask."""
+    left, top, right, bottom = _crop_box(mask.size, target_size)
+    pixels = mask_engine.prepare(
+        mask_engine.to_array(mask)[top:bottom, left:right],
+        target_size,
+        level=level,
+        invert=invert,
+        dilate_radius=dilate,
+        feather_sigma=blur_radius,
+    )
+    return mask_engine.to_image(pixels)
+
+
+def _rasterize_mask(mask: VectorMask, target_size: tuple[int, int]) -> Image.Image:
+    """Draw a vector mask at ``target_size``, cropped like the source image."""
+    left, top, right, bottom = _crop_box((mask.width, mask.height), target_size)
+    scale_x = target_size[0] / (right - left)
+    scale_y = target_size[1] / (bottom - top)
+
+    def transform(points: list[tuple[float, float]]) -> list[tuple[float, float]]:
+        return [((x - left) * scale_x, (y - top) * scale_y) for x, y in points]
+
+    image = Image.new("L", target_size, 0)
+    draw = ImageDraw.Draw(image)
+    for shape in mask.shapes:
+        fill = 0 if shape.erase else 255
+        if isinstance(shape, MaskRect):
+            (x0, y0), (x1, y1) = transform([(shape.x, shape.y), shape.bounds()[2:]])
+            draw.rectangle((x0, y0, x1, y1), fill=fill)
+        elif isinstance(shape, MaskPolygon):
+            draw.polygon(transform(shape.points), fill=fill)
+        else:
+            points = transform(shape.points)
+            radius = shape.radius * (scale_x + scale_y) / 2
+            if len(points) > 1:
+                draw.line(points, fill=fill, width=max(round(2 * radius), 1), joint="curve")
+            # Round caps, and the dab of a single-point stroke
+            for x, y in (points[0], points[-1]):
+                draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=fill)
+    return image
+
+
+def _inspect_vector_mask(mask: VectorMask, target_size: tuple[int, int]) -> MaskStats:
+    """Rasterize a vector mask like a job would and measure its painted area."""
+    return mask_engine.stats(mask_engine.to_array(_rasterize_mask(mask, target_size)))
+
+
+def _composite(original: Image.Image, generated: Image.Image, mask: Image.Image) -> Image.Image:
+    """Blend generated content into the original where the mask is white."""
+    # Ensure all images are same size
+    if generated.size != original.size:
+        generated = generated.resize(original.size, Image.Resampling.LANCZOS)
+    if mask.size != original.size:
+        mask = mask.resize(original.size, Image.Resampling.LANCZOS)
+
+    # Ensure mask is grayscale
+    if mask.mode != "L":
+        mask = mask.convert("L")
+
+    # Ensure images are RGB
+    if original.mode != "RGB":
+        original = original.convert("RGB")
+    if generated.mode != "RGB":
+        generated = generated.convert("RGB")
+
+    return Image.composite(generated, original, mask)
 
 
 class ImageService:
-    """Service for image storage and processing."""
+    """
+    Service for image storage and processing.
+
+    Decoding, encoding, resizing and mask operations run on the CPU executor
+    and file reads and writes on the I/O executor, so no method blocks the
+    event loop.
+
+    Uploaded and generated images are written to the content-addressed blob
+    store, so identical bytes are stored once; a generated image's
+    ``file_path`` is its storage key rather than a local path. Callers record the reference
+    with ``BlobService.store`` in the transaction that creates the row
+    pointing at the blob, which writes the payload again if it was
+    collected in between.
+    """
 
     def __init__(self):
         """Initialize image service and ensure directories exist."""
@@ -33,17 +313,32 @@ class ImageService:
         self.upload_dir.mkdir(parents=True, exist_ok=True)
         self.generated_dir.mkdir(parents=True, exist_ok=True)
 
+        self.blob_store = get_blob_store()
+        self.output_encoding = EncodingOptions(
+            format=resolve_format(settings.output_format),
+            quality=settings.output_quality,
+            lossless=settings.output_lossless,
+            effort=settings.output_effort,
+        )
+
+    @property
+    def cpu_executor(self) -> InstrumentedExecutor:
+        """Pool for decoding, encoding and resizing."""
+        return get_cpu_executor()
+
+    @property
+    def io_executor(self) -> InstrumentedExecutor:
+        """Pool for file reads and writes."""
+        return get_io_executor()
+
     def _get_user_dir(self, user_id: str, base_dir: Path) -> Path:
-        """Get user-specific directory."""
-        user_dir = base_dir / user_id
-        user_dir.mkdir(parents=True, exist_ok=True)
-        return user_dir
+        """Get user-specific directory; it is created when a file is written."""
+        return base_dir / user_id
 
-    def _generate_filename(self, extension: str = "png") -> str:
-        """Generate unique filename."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_id = str(uuid4())[:8]
-        return f"{timestamp}_{unique_id}.{extension}"
+    def _record_write(self, kind: str, size: int) -> None:
+        """Count an image file written to storage."""
+        images_saved_total.inc(kind=kind)
+        image_bytes_written_total.inc(size, kind=kind)
 
     async def save_generated_image(
         self,
@@ -53,9 +348,12 @@ class ImageService:
         prompt: str,
         negative_prompt: str | None = None,
         parameters: dict | None = None,
-    ) -> dict:
+    ) -> tuple[dict, bytes]:
         """
-        Save a generated image and create thumbnail.
+        Save a generated image.
+
+        Thumbnails and other derivatives are rendered on request by the
+        render service, so saving does not wait for them.
 
         Args:
             image: PIL Image to save
@@ -66,89 +364,99 @@ class ImageService:
             parameters: Full generation parameters
 
         Returns:
-            Dictionary with image metadata
+            Dictionary with image metadata, and the encoded image to
+            reference with ``BlobService.store``
         """
-        user_dir = self._get_user_dir(user_id, self.generated_dir)
-
-        # Generate filenames
-        filename = self._generate_filename("png")
-        thumb_filename = f"thumb_{filename}"
-
-        file_path = user_dir / filename
-        thumb_path = user_dir / thumb_filename
-
-        # Save main image
-        image.save(file_path, format="PNG", optimize=True)
-        file_size = file_path.stat().st_size
-
-        # Create and save thumbnail
-        thumbnail = image.copy()
-        thumbnail.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
-        thumbnail.save(thumb_path, format="PNG", optimize=True)
-
-        logger.info(f"Saved image: {file_path} ({file_size} bytes)")
-
-        return {
-            "file_path": str(file_path),
-            "thumbnail_path": str(thumb_path),
+        output_format = self.output_encoding.image_format
+        data = await self.cpu_executor.run(encode_image, image, self.output_encoding)
+        digest = await self.blob_store.put(data, output_format.mime_type)
+        file_size = len(data)
+
+        self._record_write("generated", file_size)
+        logger.info(f"Saved image for job {job_id}: {digest} ({file_size} bytes)")
+
+        metadata = {
+            "file_path": self.blob_store.key_for(digest),
+            "blob_hash": digest,
+            "thumbnail_path": None,
             "width": image.width,
             "height": image.height,
             "file_size": file_size,
-            "mime_type": "image/png",
+            "mime_type": output_format.mime_type,
             "prompt": prompt,
             "negative_prompt": negative_prompt,
             "parameters_json": json.dumps(parameters) if parameters else None,
             "expires_at": datetime.now(timezone.utc) + timedelta(hours=DEFAULT_EXPIRATION_HOURS),
         }
+        return metadata, data
 
-    async def save_uploaded_image(
-        self,
-        image_data: bytes,
-        user_id: str,
-        filename: str | None = None,
-    ) -> dict:
+    async def save_uploaded_image(self, file: BinaryIO) -> tuple[dict, bytes]:
         """
-        Save an uploaded image.
+        Save an uploaded image as RGB PNG.
 
         Args:
-            image_data: Raw image bytes
-            user_id: User ID
-            filename: Original filename (optional)
+            file: Uploaded image file, read from its current position
 
         Returns:
-            Dictionary with image metadata
-        """
-        user_dir = self._get_user_dir(user_id, self.upload_dir)
-
-        # Open image to validate and get metadata
-        image = Image.open(BytesIO(image_data))
-
-        # Convert to RGB if necessary
-        if image.mode in ("RGBA", "P"):
-            image = image.convert("RGB")
-
-        # Generate filename
-        extension = "png"
-        save_filename = self._generate_filename(extension)
-        file_path = user_dir / save_filename
+            Dictionary with image metadata, and the PNG to reference with
+            ``BlobService.store``
 
-        # Save image
-        image.save(file_path, format="PNG", optimize=True)
-        file_size = file_path.stat().st_size
+        Raises:
+            ValueError: If the data is not a readable image or has too many pixels
+        """
+        image, data = await self.cpu_executor.run(_prepare_upload, file)
+        digest = await self.blob_store.put(data, "image/png")
 
-        logger.info(f"Saved uploaded image: {file_path}")
+        self._record_write("upload", len(data))
+        logger.info(f"Saved uploaded image: {digest}")
 
-        return {
-            "file_path": str(file_path),
+        metadata = {
+            "blob_hash": digest,
             "width": image.width,
             "height": image.height,
-            "file_size": file_size,
+            "file_size": len(data),
             "mime_type": "image/png",
         }
+        return metadata, data
 
-    async def load_image(self, file_path: str) -> Image.Image:
-        """Load an image from file path."""
-        return Image.open(file_path)
+    async def load_blob_image(self, digest: str) -> Image.Image:
+        """
+        Load an image from the blob store.
+
+        Raises:
+            FileNotFoundError: If no blob has this digest
+        """
+        data = await self.blob_store.get(digest)
+        return await self.cpu_executor.run(decode_image, data)
+
+    async def read_generated_image(self, image: GeneratedImage) -> bytes:
+        """
+        Read the encoded bytes of a generated image.
+
+        Images saved before blob storage have no ``blob_hash`` and are read
+        from their local ``file_path``.
+
+        Raises:
+            FileNotFoundError: If the image's file or blob is missing
+        """
+        if image.blob_hash:
+            return await self.blob_store.get(image.blob_hash)
+        data = await self.io_executor.run(_read_file, Path(image.file_path))
+        if data is None:
+            raise FileNotFoundError(image.file_path)
+        return data
+
+    async def load_image(self, file_path: str | Path) -> Image.Image:
+        """
+        Load an image from file path.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        data = await self.io_executor.run(_read_file, Path(file_path))
+        if data is None:
+            raise FileNotFoundError(file_path)
+        return await self.cpu_executor.run(decode_image, data)
 
     async def resize_image(
         self,
@@ -169,44 +477,14 @@ class ImageService:
         Returns:
             Resized image
         """
-        if mode == "crop":
-            # Crop to aspect ratio then resize
-            target_ratio = target_width / target_height
-            img_ratio = image.width / image.height
-
-            if img_ratio > target_ratio:
-                # Image is wider - crop width
-                new_width = int(image.height * target_ratio)
-                left = (image.width - new_width) // 2
-                image = image.crop((left, 0, left + new_width, image.height))
-            else:
-                # Image is taller - crop height
-                new_height = int(image.width / target_ratio)
-                top = (image.height - new_height) // 2
-                image = image.crop((0, top, image.width, top + new_height))
-
-            return image.resize((target_width, target_height), Image.Resampling.LANCZOS)
-
-        elif mode == "pad":
-            # Resize maintaining aspect ratio and pad
-            image.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
-
-            # Create new image with padding
-            new_image = Image.new("RGB", (target_width, target_height), (0, 0, 0))
-            paste_x = (target_width - image.width) // 2
-            paste_y = (target_height - image.height) // 2
-            new_image.paste(image, (paste_x, paste_y))
-
-            return new_image
-
-        return image
+        return await self.cpu_executor.run(
+            _resize_image, image, target_width, target_height, mode
+        )
 
     async def delete_image(self, file_path: str) -> bool:
         """Delete an image file."""
         try:
-            path = Path(file_path)
-            if path.exists():
-                path.unlink()
+            if await self.io_executor.run(_delete_file, Path(file_path)):
                 logger.info(f"Deleted image: {file_path}")
                 return True
             return False
@@ -217,10 +495,7 @@ class ImageService:
     async def get_image_bytes(self, file_path: str) -> bytes | None:
         """Get image as bytes for download."""
         try:
-            path = Path(file_path)
-            if path.exists():
-                return path.read_bytes()
-            return None
+            return await self.io_executor.run(_read_file, Path(file_path))
         except Exception as e:
             logger.error(f"Failed to read image {file_path}: {e}")
             return None
@@ -239,89 +514,109 @@ class ImageService:
         if mask_data.startswith("data:"):
             mask_data = mask_data.split(",", 1)[1]
 
-        # Decode base64
-        mask_bytes = base64.b64decode(mask_data)
-        mask_image = Image.open(BytesIO(mask_bytes))
+        return await self.load_mask_image(base64.b64decode(mask_data))
 
-        # Convert to grayscale (L mode) for mask operations
-        if mask_image.mode != "L":
-            mask_image = mask_image.convert("L")
+    async def load_mask_image(self, mask_bytes: bytes) -> Image.Image:
+        """
+        Load a mask image from encoded image bytes.
 
-        return mask_image
+        Args:
+            mask_bytes: Encoded mask image, e.g. PNG
+
+        Returns:
+            PIL Image in grayscale mode
+        """
+        return await self.cpu_executor.run(_load_mask, mask_bytes)
+
+    async def inspect_mask(
+        self,
+        mask_bytes: bytes,
+        target_size: tuple[int, int] | None = None,
+    ) -> MaskStats:
+        """
+        Measure the painted area of an encoded mask.
+
+        With ``target_size``, the mask is measured as it would be prepared
+        for that size: center-cropped like the source and resized.
+
+        Raises:
+            ValueError: If the mask cannot be decoded or is too large
+        """
+        try:
+            return await self.cpu_executor.run(
+                _inspect_mask, mask_bytes, settings.inpaint_mask_threshold, target_size
+            )
+        except (OSError, Image.DecompressionBombError):
+            raise ValueError("Mask is not a readable image") from None
 
     async def prepare_mask_for_inpainting(
         self,
         mask: Image.Image,
         target_size: tuple[int, int],
-        blur_radius: int = 5,
+        blur_radius: float | None = None,
         invert: bool = False,
+        dilate: int | None = None,
     ) -> Image.Image:
         """
         Prepare mask for inpainting operation.
 
+        The mask is center-cropped to the target aspect ratio like the
+        source image, binarized at ``INPAINT_MASK_THRESHOLD``, resized
+        without ringing (area averaging when shrinking, nearest otherwise),
+        grown by ``dilate`` pixels and feathered.
+
         Args:
             mask: Input mask image
             target_size: Target (width, height) tuple
-            blur_radius: Radius for edge blurring (smoother transitions)
+            blur_radius: Feathering blur standard deviation; defaults to
+                ``INPAINT_MASK_FEATHER``
             invert: Whether to invert the mask
+            dilate: Pixels to grow the painted area by; defaults to
+                ``INPAINT_MASK_DILATE``
 
         Returns:
             Processed mask image
-        """
-        # Resize mask to match target size
-        if mask.size != target_size:
-            mask = mask.resize(target_size, Image.Resampling.LANCZOS)
 
-        # Ensure grayscale
-        if mask.mode != "L":
-            mask = mask.convert("L")
-
-        # Invert if needed (depends on convention: white = inpaint area)
-        if invert:
-            from PIL import ImageOps
-            mask = ImageOps.invert(mask)
-
-        # Apply Gaussian blur for smoother edges
-        if blur_radius > 0:
-            mask = mask.filter(ImageFilter.GaussianBlur(radius=blur_radius))
-
-        return mask
+        Raises:
+            ValueError: If nothing is painted
+        """
+        return await self.cpu_executor.run(
+            _prepare_mask,
+            mask,
+            target_size,
+            settings.inpaint_mask_feather if blur_radius is None else blur_radius,
+            invert,
+            settings.inpaint_mask_dilate if dilate is None else dilate,
+            settings.inpaint_mask_threshold,
+        )
+
+    async def inspect_vector_mask(
+        self,
+        mask: VectorMask,
+        target_size: tuple[int, int],
+    ) -> MaskStats:
+        """Measure the painted area of a vector mask rasterized at ``target_size``."""
+        return await self.cpu_executor.run(_inspect_vector_mask, mask, target_size)
 
-    async def create_mask_from_region(
+    async def rasterize_mask(
         self,
-        width: int,
-        height: int,
-        region: dict,
+        mask: VectorMask,
+        target_size: tuple[int, int],
     ) -> Image.Image:
         """
-        Create a mask from a region definition.
+        Draw a vector mask at the model's resolution.
+
+        The shapes' coordinate space is cropped to the target aspect ratio
+        the same way as the source image, so the mask lines up with it.
 
         Args:
-            width: Image width
-            height: Image height
-            region: Region dict with 'x', 'y', 'width', 'height' or 'points'
+            mask: Shapes drawn over the source image
+            target_size: Target (width, height) tuple
 
         Returns:
-            Mask image with white area for the region
+            Mask image with white painted areas
         """
-        from PIL import ImageDraw
-
-        # Create black mask
-        mask = Image.new("L", (width, height), 0)
-        draw = ImageDraw.Draw(mask)
-
-        if "points" in region:
-            # Polygon region
-            points = [(p["x"], p["y"]) for p in region["points"]]
-            if len(points) >= 3:
-                draw.polygon(points, fill=255)
-        elif all(k in region for k in ["x", "y", "width", "height"]):
-            # Rectangle region
-            x, y = region["x"], region["y"]
-            w, h = region["width"], region["height"]
-            draw.rectangle([x, y, x + w, y + h], fill=255)
-
-        return mask
+        return await self.cpu_executor.run(_rasterize_mask, mask, target_size)
 
     async def composite_inpainted_result(
         self,
@@ -340,26 +635,7 @@ class ImageService:
         Returns:
             Composited image
         """
-        # Ensure all images are same size
-        if generated.size != original.size:
-            generated = generated.resize(original.size, Image.Resampling.LANCZOS)
-        if mask.size != original.size:
-            mask = mask.resize(original.size, Image.Resampling.LANCZOS)
-
-        # Ensure mask is grayscale
-        if mask.mode != "L":
-            mask = mask.convert("L")
-
-        # Ensure images are RGB
-        if original.mode != "RGB":
-            original = original.convert("RGB")
-        if generated.mode != "RGB":
-            generated = generated.convert("RGB")
-
-        # Composite
-        result = Image.composite(generated, original, mask)
-
-        return result
+        return await self.cpu_executor.run(_composite, original, generated, mask)
 
     async def save_mask_image(
         self,
@@ -382,7 +658,9 @@ class ImageService:
         filename = f"mask_{job_id}.png"
         file_path = user_dir / filename
 
-        mask.save(file_path, format="PNG")
+        data = await self.cpu_executor.run(_encode_png, mask, False)
+        await self.io_executor.run(_write_files, [(file_path, data)])
+        self._record_write("mask", len(data))
         logger.info(f"Saved mask: {file_path}")
 
         return str(file_path)
@@ -0,0 +1,187 @@
+"""Archival of finished jobs."""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import DateTime, delete, exists, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.config import get_settings
+from src.core.database import async_session_maker
+from src.core.metrics import jobs_archived_total
+from src.models.image import GeneratedImage
+from src.models.job import TERMINAL_STATUSES, Job
+from src.models.job_archive import ArchivedJob
+from src.models.webhook_delivery import WebhookDelivery, WebhookDeliveryStatus
+from src.services.blob_service import BlobService
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = [job_status.value for job_status in TERMINAL_STATUSES]
+
+
+def _month_start(moment: datetime) -> datetime:
+    """First instant of a datetime's month in UTC."""
+    if moment.tzinfo:
+        moment = moment.astimezone(UTC)
+    return datetime(moment.year, moment.month, 1, tzinfo=UTC)
+
+
+def _next_month(moment: datetime) -> datetime:
+    """First instant of the following month."""
+    if moment.month == 12:
+        return moment.replace(year=moment.year + 1, month=1)
+    return moment.replace(month=moment.month + 1)
+
+
+class JobArchiveService:
+    """
+    Move finished jobs out of the jobs table so hot queries stay small.
+
+    Jobs that completed, failed or were cancelled more than
+    ``job_archive_after_days`` ago are copied to ``jobs_archive`` and deleted
+    from ``jobs`` in batches, one transaction per batch. Jobs that still have
+    a generated image or a webhook delivery in progress are left in place,
+    since those rows reference the job; their finished delivery log is
+    deleted with them. Archived jobs are never run again, so their mask blob
+    references are released and ``mask_hash`` is kept only as a record.
+
+    On PostgreSQL ``jobs_archive`` is partitioned by month, and partitions
+    are created as rows for a new month are archived.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = async_session_maker):
+        self.session_factory = session_factory
+        self._archive_task: asyncio.Task | None = None
+
+    def _archivable(self, cutoff: datetime, limit: int):
+        """Select the oldest archivable jobs created before ``cutoff``."""
+        return (
+            select(Job.id, Job.created_at)
+            .where(
+                Job.status.in_(ARCHIVABLE_STATUSES),
+                Job.created_at < cutoff,
+                ~exists().where(GeneratedImage.job_id == Job.id),
+                ~exists().where(
+                    WebhookDelivery.job_id == Job.id,
+                    WebhookDelivery.status == WebhookDeliveryStatus.PENDING.value,
+                ),
+            )
+            .order_by(Job.created_at)
+            .limit(limit)
+        )
+
+    async def _ensure_partitions(self, session: AsyncSession, created_ats: list[datetime]) -> None:
+        """Create the monthly archive partitions that rows will be written to."""
+        for month in sorted({_month_start(created_at) for created_at in created_ats}):
+            name = f"jobs_archive_y{month.year}m{month.month:02d}"
+            await session.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF jobs_archive "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+                )
+            )
+
+    async def archive_batch(self, cutoff: datetime, limit: int | None = None) -> int:
+        """
+        Archive up to ``limit`` jobs created before ``cutoff``.
+
+        Returns:
+            Number of jobs archived
+        """
+        limit = limit or settings.job_archive_batch_size
+        async with self.session_factory() as session:
+            rows = (await session.execute(self._archivable(cutoff, limit))).all()
+            if not rows:
+                return 0
+            job_ids = [row.id for row in rows]
+
+            if session.bind.dialect.name == "postgresql":
+                await self._ensure_partitions(session, [row.created_at for row in rows])
+
+            columns = [column.name for column in Job.__table__.columns]
+            archived_at = literal(datetime.now(UTC), DateTime(timezone=True))
+            await session.execute(
+                insert(ArchivedJob).from_select(
+                    [*columns, "archived_at"],
+                    select(*(Job.__table__.c[name] for name in columns), archived_at).where(
+                        Job.id.in_(job_ids)
+                    ),
+                )
+            )
+            await session.execute(delete(WebhookDelivery).where(WebhookDelivery.job_id.in_(job_ids)))
+            # RETURNING reports only the rows this transaction deleted, so a
+            # concurrent archiver cannot release the same references twice
+            result = await session.execute(
+                delete(Job).where(Job.id.in_(job_ids)).returning(Job.mask_hash)
+            )
+            blob_service = BlobService(session)
+            for digest, count in Counter(digest for digest in result.scalars() if digest).items():
+                await blob_service.release(digest, count)
+            await session.commit()
+
+        jobs_archived_total.inc(len(job_ids))
+        return len(job_ids)
+
+    async def archive_old_jobs(self) -> int:
+        """
+        Archive every eligible job, batch by batch.
+
+        Returns:
+            Number of jobs archived
+        """
+        if settings.job_archive_after_days <= 0:
+            return 0
+
+        cutoff = datetime.now(UTC) - timedelta(days=settings.job_archive_after_days)
+        total = 0
+        while True:
+            archived = await self.archive_batch(cutoff)
+            total += archived
+            if archived < settings.job_archive_batch_size:
+                break
+            # Let request handlers use the database between batches
+            await asyncio.sleep(0)
+
+        if total:
+            logger.info(f"Archived {total} jobs created before {cutoff.isoformat()}")
+        return total
+
+    async def _archive_periodically(self) -> None:
+        """Background loop that archives old jobs."""
+        while True:
+            try:
+                await self.archive_old_jobs()
+            except Exception as e:
+                logger.error(f"Failed to archive jobs: {e}")
+            await asyncio.sleep(settings.job_archive_interval_seconds)
+
+    def start(self) -> None:
+        """Start the archive loop."""
+        if self._archive_task is None and settings.job_archive_after_days > 0:
+            self._archive_task = asyncio.create_task(self._archive_periodically())
+
+    async def stop(self) -> None:
+        """Stop the archive loop."""
+        if self._archive_task is not None:
+            self._archive_task.cancel()
+            try:
+                await self._archive_task
+            except asyncio.CancelledError:
+                pass
+            self._archive_task = None
+
+
+# Singleton instance
+_job_archive_service: JobArchiveService | None = None
+
+
+def get_job_archive_service() -> JobArchiveService:
+    """Get or create job archive service instance."""
+    global _job_archive_service
+    if _job_archive_service is None:
+        _job_archive_service = JobArchiveService()
+    return _job_archive_service
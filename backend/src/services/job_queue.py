@@ -0,0 +1,244 @@
+"""In-process job queue and workers."""
+
+import asyncio
+import logging
+import math
+import time
+from functools import partial
+
+from sqlalchemy import select
+
+from src.core.config import get_settings
+from src.core.database import async_session_maker
+from src.core.metrics import job_queue_depth
+from src.models.job import Job, JobStatus
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Weight of the latest measurement in the moving average of job durations
+DURATION_SMOOTHING = 0.2
+
+# Completed jobs used to seed the average duration on startup
+DURATION_HISTORY_SIZE = 100
+
+
+class QueueFullError(Exception):
+    """Raised when the estimated queue wait exceeds the admission threshold."""
+
+    def __init__(self, estimated_wait: float, retry_after: int):
+        super().__init__(
+            f"Job queue is full (estimated wait {estimated_wait:.0f}s); "
+            f"retry in {retry_after}s"
+        )
+        self.estimated_wait = estimated_wait
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """
+    Queue of pending jobs consumed by a fixed number of workers.
+
+    Each queue entry is a group of jobs: a single job for ``POST /api/jobs``,
+    or every job of a batch, ordered so that jobs sharing a pipeline are
+    scheduled together. Groups take turns: a worker runs a slice of up to
+    ``batch_slice_size`` jobs (at least ``inference_batch_size``) from the
+    next group and requeues the rest at the back, so a large batch cannot
+    hold back jobs submitted after it.
+
+    The queue also estimates how long new jobs will wait, from the number of
+    queued and running jobs and a moving average of recent job durations,
+    and refuses new work once that estimate passes ``max_queue_wait_seconds``.
+    """
+
+    def __init__(self, concurrency: int | None = None):
+        self.concurrency = concurrency or settings.job_worker_concurrency
+        self._queue: asyncio.Queue[list[tuple[str, str | None]]] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+        self._queued_jobs = 0
+        self._active_jobs = 0
+        self.average_duration = settings.default_job_duration_seconds
+
+    @property
+    def depth(self) -> int:
+        """Number of queued groups not yet picked up by a worker."""
+        return self._queue.qsize()
+
+    @property
+    def queued_jobs(self) -> int:
+        """Number of jobs waiting in the queue."""
+        return self._queued_jobs
+
+    def estimate_wait(self) -> float:
+        """Estimate seconds until a newly queued job would start."""
+        return (self._queued_jobs + self._active_jobs) * self.average_duration / self.concurrency
+
+    def admit(self, count: int = 1) -> None:
+        """
+        Check whether the queue can take a group of new jobs.
+
+        Raises:
+            QueueFullError: If the last of the jobs would wait longer than
+                ``max_queue_wait_seconds``
+        """
+        limit = settings.max_queue_wait_seconds
+        if limit <= 0:
+            return
+
+        # Slices of a group are spread over the workers
+        last_wait = self.estimate_wait() + (count - 1) * self.average_duration / self.concurrency
+        if last_wait > limit:
+            # The estimate drops by about a second per second as the queue drains
+            raise QueueFullError(last_wait, max(math.ceil(last_wait - limit), 1))
+
+    async def enqueue(self, jobs: list[Job]) -> list[float]:
+        """
+        Queue a group of jobs to be scheduled together.
+
+        Anything with ``id`` and ``model`` attributes can be queued, such as
+        Job instances or rows selecting those columns.
+
+        Returns:
+            The estimated wait in seconds before each job starts
+        """
+        # Sorting is stable, so jobs of a model keep their order
+        entries = sorted(
+            ((job.id, job.model) for job in jobs),
+            key=lambda entry: entry[1] or settings.default_model,
+        )
+        if not entries:
+            return []
+
+        first_wait = self.estimate_wait()
+        step = self.average_duration / self.concurrency
+        waits = {job_id: first_wait + index * step for index, (job_id, _) in enumerate(entries)}
+
+        for _, model in entries:
+            job_queue_depth.inc(model=model or settings.default_model)
+        self._queued_jobs += len(entries)
+        await self._queue.put(entries)
+        return [waits[job.id] for job in jobs]
+
+    def _record_duration(self, seconds: float) -> None:
+        """Fold a job's run time into the moving average."""
+        self.average_duration += DURATION_SMOOTHING * (seconds - self.average_duration)
+
+    async def _worker(self, index: int) -> None:
+        """Process slices of queued job groups until cancelled."""
+        from src.services.job_service import JobService
+
+        slice_size = max(settings.batch_slice_size, settings.inference_batch_size, 1)
+        while True:
+            group = await self._queue.get()
+            entries, rest = group[:slice_size], group[slice_size:]
+            if rest:
+                # Back of the queue, behind groups that arrived meanwhile
+                self._queue.put_nowait(rest)
+
+            # Jobs leave the queue one by one as they start
+            waiting = dict(entries)
+            job_ids = [job_id for job_id, _ in entries]
+            start = time.monotonic()
+            try:
+                await JobService().process_jobs(job_ids, partial(self._started, waiting))
+                # Skipped jobs take no time and would drag the average down
+                started = len(entries) - len(waiting)
+                if started:
+                    self._record_duration((time.monotonic() - start) / started)
+            except Exception as e:
+                logger.error(f"Worker {index} failed to process jobs {job_ids}: {e}")
+            finally:
+                self._active_jobs -= len(entries) - len(waiting)
+                # Jobs that were skipped, e.g. cancelled while queued
+                for model in waiting.values():
+                    self._dequeued(model)
+                self._queue.task_done()
+
+    def _started(self, waiting: dict[str, str | None], job_id: str) -> None:
+        """Move a job of a running slice from the queue to the active jobs."""
+        if job_id in waiting:
+            self._dequeued(waiting.pop(job_id))
+            self._active_jobs += 1
+
+    def _dequeued(self, model: str | None) -> None:
+        """Count a job as no longer waiting in the queue."""
+        job_queue_depth.dec(model=model or settings.default_model)
+        self._queued_jobs -= 1
+
+    async def _load_average_duration(self) -> None:
+        """Seed the average job duration from recently completed jobs."""
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Job.started_at, Job.completed_at)
+                .where(
+                    Job.status == JobStatus.COMPLETED.value,
+                    Job.started_at.is_not(None),
+                    Job.completed_at.is_not(None),
+                )
+                .order_by(Job.completed_at.desc())
+                .limit(DURATION_HISTORY_SIZE)
+            )
+            durations = [
+                (completed_at - started_at).total_seconds()
+                for started_at, completed_at in result.all()
+            ]
+
+        if durations:
+            self.average_duration = sum(durations) / len(durations)
+
+    async def _requeue_pending(self) -> None:
+        """Queue jobs left pending by a previous run, grouped by batch."""
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Job.id, Job.batch_id, Job.model)
+                .where(Job.status == JobStatus.PENDING.value)
+                .order_by(Job.created_at, Job.id)
+            )
+            rows = result.all()
+
+        batches: dict[str, list] = {}
+        for row in rows:
+            if row.batch_id:
+                batches.setdefault(row.batch_id, []).append(row)
+            else:
+                await self.enqueue([row])
+        for batch_rows in batches.values():
+            await self.enqueue(batch_rows)
+
+        if rows:
+            logger.info(f"Requeued {len(rows)} pending jobs")
+
+    async def start(self) -> None:
+        """Seed the duration estimate, requeue pending jobs and start the workers."""
+        if self._workers:
+            return
+        await self._load_average_duration()
+        await self._requeue_pending()
+        self._workers = [
+            asyncio.create_task(self._worker(index)) for index in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """Stop the workers; queued jobs stay pending and are requeued on restart."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        while not self._queue.empty():
+            for _, model in self._queue.get_nowait():
+                job_queue_depth.dec(model=model or settings.default_model)
+        self._queued_jobs = 0
+        self._active_jobs = 0
+
+
+# Singleton instance
+_job_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create job queue instance."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
@@ -1,96 +1,437 @@
 """Job processing service."""
 
+import json
 import logging
-from datetime import date, datetime, timezone
-from pathlib import Path
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from uuid import uuid4
 
 from PIL import Image
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select, func, insert, inspect, literal, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import undefer
 
 from src.core.config import get_settings
-from src.models.daily_usage import DailyUsage
+from src.core.database import async_session_maker
+from src.core.metrics import job_phase_duration_seconds, jobs_finished_total
+from src.core.pagination import after_cursor, encode_cursor
+from src.core.profiling import JobProfile, current_profile, profile_phase, use_profile
 from src.models.image import GeneratedImage
-from src.models.job import Job, JobStatus, JobType
-from src.schemas.job import CreateJobRequest, JobResponse
-from src.services.local_inference import get_local_client, get_dimensions_for_model
+from src.models.job import JOB_TRANSITIONS, TERMINAL_STATUSES, Job, JobStatus, JobType
+from src.models.job_archive import ArchivedJob
+from src.models.uploaded_image import UploadedImage
+from src.models.uploaded_mask import UploadedMask
+from src.schemas.job import (
+    CreateBatchRequest,
+    CreateJobRequest,
+    JobEvent,
+    JobResponse,
+    VectorMask,
+    decode_base64_data,
+)
+from src.services.blob_service import BlobService
+from src.services.blob_store import get_blob_store
+from src.services.event_bus import get_event_bus, user_channel
+from src.services.idempotency_service import IdempotencyService, request_hash
 from src.services.image_service import get_image_service
+from src.services.job_queue import get_job_queue
+from src.services.local_inference import get_dimensions_for_model, get_local_client
+from src.services.quota_service import get_quota_service
+from src.services.source_cache import get_source_cache
+from src.services.user_stats_service import UserStatsService
+from src.services.webhook_service import get_webhook_service
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
 
+def _mask_key(request: CreateJobRequest) -> tuple[str, str] | None:
+    """Identity of a job request's mask; equal for requests passing the same mask."""
+    if request.mask is not None:
+        return "shapes", request.mask.model_dump_json()
+    if request.mask_id is not None:
+        return "id", request.mask_id
+    if request.mask_data:
+        return "data", request.mask_data
+    return None
+
+
+def _is_vector_mask(data: bytes) -> bool:
+    """Whether a stored mask holds shapes; encoded images never start with ``{``."""
+    return data.startswith(b"{")
+
+
+class PendingJobLimitError(ValueError):
+    """Raised when a user already has the maximum number of pending jobs."""
+
+
+class InvalidMaskError(ValueError):
+    """Raised when an inpainting mask cannot be decoded or has nothing painted."""
+
+
+class JobTransitionError(ValueError):
+    """Raised when a job is not in a status it can move to the requested one from."""
+
+    def __init__(self, job_id: str, status: JobStatus):
+        super().__init__(f"Job {job_id} cannot move to {status.value}")
+        self.job_id = job_id
+        self.status = status
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """Treat naive datetimes (as returned by SQLite) as UTC."""
+    return moment if moment.tzinfo else moment.replace(tzinfo=UTC)
+
+
+def _loaded_timings(job: Job) -> dict[str, float] | None:
+    """Phase timings of a job, or None if they were not loaded with it."""
+    if "timings_json" in inspect(job).unloaded or not job.timings_json:
+        return None
+    return json.loads(job.timings_json)
+
+
 class JobService:
-    """Service for managing image generation jobs."""
+    """
+    Service for managing image generation jobs.
+
+    Request handlers pass their session as ``db``. Job processing does not use
+    it: claiming, completing and failing a job each run in their own short
+    session from ``session_factory``, and inference runs with no session held,
+    so connection usage does not grow with the number of running jobs.
+    """
 
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession | None = None,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_maker,
+    ):
         self.db = db
+        self.session_factory = session_factory
         self.inference_client = get_local_client()
         self.image_service = get_image_service()
+        self.quota_service = get_quota_service()
+        self.event_bus = get_event_bus()
+        self.job_queue = get_job_queue()
+        self.webhook_service = get_webhook_service()
+        self.blob_store = get_blob_store()
 
     async def get_daily_usage(self, user_id: str) -> int:
-        """Get user's generation count for today."""
-        today = date.today()
-        result = await self.db.execute(
-            select(DailyUsage).where(
-                DailyUsage.user_id == user_id,
-                DailyUsage.usage_date == today,
+        """Get user's generation count for today, including reserved jobs."""
+        return await self.quota_service.get_usage(user_id)
+
+    async def check_usage_limit(self, user_id: str) -> bool:
+        """Check if user has exceeded daily limit."""
+        current_usage = await self.get_daily_usage(user_id)
+        return current_usage < settings.daily_generation_limit
+
+    async def _get_uploaded_mask(self, user_id: str, mask_id: str) -> UploadedMask:
+        """
+        Get a mask the user uploaded.
+
+        Raises:
+            InvalidMaskError: If the user has no mask with this ID
+        """
+        uploaded_mask = await self.db.scalar(
+            select(UploadedMask).where(
+                UploadedMask.id == mask_id,
+                UploadedMask.user_id == user_id,
             )
         )
-        usage = result.scalar_one_or_none()
-        return usage.generation_count if usage else 0
+        if uploaded_mask is None:
+            raise InvalidMaskError("Unknown mask_id; upload the mask again")
+        return uploaded_mask
+
+    async def _check_mask(self, user_id: str, request: CreateJobRequest) -> None:
+        """
+        Check that a job request's mask paints part of the image the job uses.
+
+        The mask is measured at the job's target size after the same center
+        crop as the source, so masks whose paint is cropped away, erased or
+        too thin to survive resizing are rejected before the job is queued.
+
+        Raises:
+            InvalidMaskError: If the mask is not an image or paints nothing
+        """
+        target_size = get_dimensions_for_model(
+            request.aspect_ratio, request.model or settings.default_model
+        )
+        try:
+            if request.mask is not None:
+                mask_stats = await self.image_service.inspect_vector_mask(request.mask, target_size)
+            elif request.mask_id is not None:
+                uploaded_mask = await self._get_uploaded_mask(user_id, request.mask_id)
+                mask_bytes = await self.blob_store.get(uploaded_mask.blob_hash)
+                mask_stats = await self.image_service.inspect_mask(mask_bytes, target_size)
+            elif request.mask_data:
+                mask_bytes = decode_base64_data(request.mask_data)
+                mask_stats = await self.image_service.inspect_mask(mask_bytes, target_size)
+            else:
+                return
+        except InvalidMaskError:
+            raise
+        except ValueError as e:
+            raise InvalidMaskError(str(e)) from None
+        if mask_stats.empty:
+            raise InvalidMaskError("Mask is empty; paint the area to inpaint")
+
+    async def _store_mask(
+        self,
+        user_id: str,
+        request: CreateJobRequest,
+        refs: int = 1,
+    ) -> str | None:
+        """
+        Store a job's mask referenced by ``refs`` jobs and return its digest.
+
+        Vector masks are stored as their JSON and rasterized when the job
+        runs. A ``mask_id`` refers to a mask the user uploaded; the jobs
+        reference its blob, so they keep it after the upload expires.
+
+        Raises:
+            InvalidMaskError: If the user has no mask with this ID
+        """
+        if request.mask_id is not None:
+            uploaded_mask = await self._get_uploaded_mask(user_id, request.mask_id)
+            await BlobService(self.db).add_ref(
+                uploaded_mask.blob_hash, uploaded_mask.file_size, refs
+            )
+            return uploaded_mask.blob_hash
+        if request.mask is not None:
+            return await BlobService(self.db).store(request.mask.model_dump_json().encode(), refs)
+        if not request.mask_data:
+            return None
+
+        return await BlobService(self.db).store(decode_base64_data(request.mask_data), refs)
+
+    def _job_values(self, request: CreateJobRequest, mask_hash: str | None = None) -> dict:
+        """Map a job request to Job column values."""
+        return {
+            "type": request.type.value,
+            "status": JobStatus.PENDING.value,
+            "prompt": request.prompt,
+            "negative_prompt": request.negative_prompt,
+            "aspect_ratio": request.aspect_ratio,
+            "seed": request.seed,
+            "steps": request.steps,
+            "strength": request.strength,
+            "model": request.model or settings.default_model,
+            "source_image_id": request.source_image_id,
+            "mask_hash": mask_hash,
+            "callback_url": str(request.callback_url) if request.callback_url else None,
+        }
+
+    async def check_pending_limit(self, user_id: str, count: int = 1) -> None:
+        """
+        Check that a user may queue more jobs.
+
+        Raises:
+            PendingJobLimitError: If the new jobs would exceed the user's
+                pending-job cap
+        """
+        limit = settings.max_pending_jobs_per_user
+        if limit <= 0:
+            return
 
-    async def increment_daily_usage(self, user_id: str) -> int:
-        """Increment user's daily usage count."""
-        today = date.today()
         result = await self.db.execute(
-            select(DailyUsage).where(
-                DailyUsage.user_id == user_id,
-                DailyUsage.usage_date == today,
-            )
+            select(func.count())
+            .select_from(Job)
+            .where(Job.user_id == user_id, Job.status == JobStatus.PENDING.value)
         )
-        usage = result.scalar_one_or_none()
+        pending = result.scalar_one()
+        if pending + count > limit:
+            raise PendingJobLimitError(
+                f"Too many pending jobs ({pending} pending, limit {limit}); "
+                "wait for some to start or cancel them"
+            )
 
-        if usage:
-            usage.generation_count += 1
-        else:
-            usage = DailyUsage(
-                user_id=user_id,
-                usage_date=today,
-                generation_count=1,
+    async def create_job(
+        self,
+        user_id: str,
+        request: CreateJobRequest,
+        idempotency_key: str | None = None,
+    ) -> Job:
+        """
+        Create and commit a new generation job.
+
+        Quota for the job is reserved up front and refunded if the job cannot
+        be committed, or if it later fails or is cancelled. With an
+        idempotency key, the key is recorded in the same transaction as the
+        job.
+
+        Raises:
+            QueueFullError: If the job queue's estimated wait is too long
+            PendingJobLimitError: If the user has too many pending jobs
+            UnsafeCallbackError: If the callback URL's host is not public
+            QuotaExceededError: If the user has reached the daily limit
+        """
+        self.job_queue.admit()
+        await self.check_pending_limit(user_id)
+        if request.callback_url:
+            await self.webhook_service.check_callback_url(str(request.callback_url))
+        await self.quota_service.reserve(user_id)
+
+        try:
+            await self._check_mask(user_id, request)
+            mask_hash = await self._store_mask(user_id, request)
+            job = Job(user_id=user_id, **self._job_values(request, mask_hash))
+            self.db.add(job)
+            await self.db.flush()
+            await self.db.refresh(job)
+            await UserStatsService(self.db).increment(user_id, jobs=1)
+            if idempotency_key:
+                await IdempotencyService(self.db).record(
+                    user_id,
+                    idempotency_key,
+                    "job",
+                    request_hash("job", request),
+                    job_id=job.id,
+                )
+            await self.db.commit()
+        except Exception:
+            await self.quota_service.refund(user_id)
+            raise
+
+        logger.info(f"Created job {job.id} for user {user_id}")
+        return job
+
+    async def create_batch(
+        self,
+        user_id: str,
+        request: CreateBatchRequest,
+        idempotency_key: str | None = None,
+    ) -> tuple[str, list[Job]]:
+        """
+        Create all jobs of a batch with a single bulk INSERT and commit them.
+
+        Quota for every job is reserved up front and refunded if the batch
+        cannot be committed.
+
+        Returns:
+            Tuple of (batch ID, created jobs)
+
+        Raises:
+            ValueError: If the batch exceeds the configured size limit
+            QueueFullError: If the job queue's estimated wait is too long
+            PendingJobLimitError: If the batch would exceed the pending-job cap
+            UnsafeCallbackError: If a callback URL's host is not public
+            QuotaExceededError: If the user does not have quota for every job
+        """
+        if request.job_count > settings.max_batch_size:
+            raise ValueError(
+                f"Batch has {request.job_count} jobs; the maximum is {settings.max_batch_size}"
             )
-            self.db.add(usage)
+        self.job_queue.admit(request.job_count)
+        await self.check_pending_limit(user_id, request.job_count)
+        job_requests = request.expand()
+        for callback_url in {str(r.callback_url) for r in job_requests if r.callback_url}:
+            await self.webhook_service.check_callback_url(callback_url)
 
-        await self.db.flush()
-        return usage.generation_count
+        await self.quota_service.reserve(user_id, len(job_requests))
 
-    async def check_usage_limit(self, user_id: str) -> bool:
-        """Check if user has exceeded daily limit."""
-        current_usage = await self.get_daily_usage(user_id)
-        return current_usage < settings.daily_generation_limit
+        batch_id = str(uuid4())
+        created_at = datetime.now(UTC)
 
-    async def create_job(self, user_id: str, request: CreateJobRequest) -> Job:
-        """Create a new generation job."""
-        job = Job(
-            user_id=user_id,
-            type=request.type.value,
-            status=JobStatus.PENDING.value,
-            prompt=request.prompt,
-            negative_prompt=request.negative_prompt,
-            aspect_ratio=request.aspect_ratio,
-            seed=request.seed,
-            steps=request.steps,
-            strength=request.strength,
-            model=request.model or settings.default_model,
-            source_image_id=request.source_image_id,
-            mask_data=request.mask_data,
+        try:
+            # Check each distinct mask once per target size it is used at
+            mask_checks = {
+                (_mask_key(job_request), job_request.aspect_ratio, job_request.model): job_request
+                for job_request in job_requests
+            }
+            for job_request in mask_checks.values():
+                await self._check_mask(user_id, job_request)
+            # Jobs of a batch usually share one mask; store each distinct mask once
+            mask_uses = Counter(_mask_key(job_request) for job_request in job_requests)
+            mask_requests = {_mask_key(job_request): job_request for job_request in job_requests}
+            mask_hashes = {
+                key: await self._store_mask(user_id, mask_requests[key], refs)
+                for key, refs in mask_uses.items()
+            }
+            rows = [
+                {
+                    "id": str(uuid4()),
+                    "user_id": user_id,
+                    "batch_id": batch_id,
+                    "created_at": created_at,
+                    **self._job_values(job_request, mask_hashes[_mask_key(job_request)]),
+                }
+                for job_request in job_requests
+            ]
+
+            result = await self.db.scalars(insert(Job).returning(Job), rows)
+            jobs = list(result.all())
+            await UserStatsService(self.db).increment(user_id, jobs=len(jobs))
+            if idempotency_key:
+                await IdempotencyService(self.db).record(
+                    user_id,
+                    idempotency_key,
+                    "batch",
+                    request_hash("batch", request),
+                    batch_id=batch_id,
+                )
+            await self.db.commit()
+        except Exception:
+            await self.quota_service.refund(user_id, amount=len(job_requests))
+            raise
+
+        logger.info(f"Created batch {batch_id} with {len(jobs)} jobs for user {user_id}")
+        return batch_id, jobs
+
+    async def get_batch_jobs(
+        self,
+        batch_id: str,
+        user_id: str,
+    ) -> list[tuple[Job | ArchivedJob, str | None]]:
+        """
+        Get all jobs of a batch with their result image IDs, in submission order.
+
+        Jobs of the batch that were archived are included.
+        """
+        result = await self.db.execute(
+            self._with_result_image_id(select(Job))
+            .where(Job.batch_id == batch_id, Job.user_id == user_id)
+            .order_by(Job.created_at, Job.id)
+        )
+        rows: list[tuple[Job | ArchivedJob, str | None]] = list(result.tuples().all())
+
+        archived = await self.db.scalars(
+            select(ArchivedJob).where(
+                ArchivedJob.batch_id == batch_id,
+                ArchivedJob.user_id == user_id,
+            )
         )
+        rows.extend((job, None) for job in archived.all())
+        rows.sort(key=lambda row: (_as_utc(row[0].created_at), row[0].id))
+        return rows
 
-        self.db.add(job)
-        await self.db.flush()
-        await self.db.refresh(job)
+    async def cancel_job(self, job_id: str, user_id: str) -> Job | None:
+        """
+        Cancel a job that has not started processing yet.
 
-        logger.info(f"Created job {job.id} for user {user_id}")
+        The cancellation is committed before the job's quota is refunded, so
+        a failed commit cannot refund a job that still runs.
+
+        Returns:
+            The cancelled job, or None if the job does not exist
+
+        Raises:
+            ValueError: If the job is no longer pending
+        """
+        job = await self.transition_job(job_id, JobStatus.CANCELLED, user_id)
+        if not job:
+            current = await self.get_job(job_id, user_id) or await self.get_archived_job(
+                job_id, user_id
+            )
+            if not current:
+                return None
+            raise ValueError(f"Job is {current.status} and can no longer be cancelled")
+
+        await self.db.commit()
+        await self.quota_service.refund(job.user_id, job.created_at)
+        self._observe_finished(job)
+
+        logger.info(f"Cancelled job {job.id}")
         return job
 
     async def get_job(self, job_id: str, user_id: str | None = None) -> Job | None:
@@ -102,295 +443,670 @@ class JobService:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_archived_job(self, job_id: str, user_id: str | None = None) -> ArchivedJob | None:
+        """Get an archived job, including its timings, by ID, optionally filtered by user."""
+        query = (
+            select(ArchivedJob)
+            .options(undefer(ArchivedJob.timings_json))
+            .where(ArchivedJob.id == job_id)
+        )
+        if user_id:
+            query = query.where(ArchivedJob.user_id == user_id)
+
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def get_job_with_result(
+        self,
+        job_id: str,
+        user_id: str | None = None,
+        refresh: bool = False,
+    ) -> tuple[Job | ArchivedJob, str | None] | None:
+        """
+        Get a job, including its timings, and its result image ID in one query.
+
+        Falls back to the archive for jobs that are no longer in the jobs
+        table; archived jobs have no result image. With ``refresh``, a job
+        already loaded in the session is updated from the database.
+        """
+        query = (
+            self._with_result_image_id(select(Job))
+            .options(undefer(Job.timings_json))
+            .where(Job.id == job_id)
+            .execution_options(populate_existing=refresh)
+        )
+        if user_id:
+            query = query.where(Job.user_id == user_id)
+
+        result = await self.db.execute(query)
+        row = result.first()
+        if row:
+            return row[0], row[1]
+
+        archived = await self.get_archived_job(job_id, user_id)
+        return (archived, None) if archived else None
+
+    def _job_keys(
+        self,
+        model: type[Job] | type[ArchivedJob],
+        user_id: str,
+        status: JobStatus | None,
+        cursor: str | None,
+        limit: int,
+    ) -> Select:
+        """Select the sort keys of one table's candidates for a job listing page."""
+        query = select(
+            model.id,
+            model.created_at,
+            literal(model is ArchivedJob).label("archived"),
+        ).where(model.user_id == user_id)
+
+        if status:
+            query = query.where(model.status == status.value)
+        if cursor:
+            query = query.where(after_cursor(model.created_at, model.id, cursor))
+
+        return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+
     async def get_jobs(
         self,
         user_id: str,
         page: int = 1,
         page_size: int = 20,
         status: JobStatus | None = None,
-    ) -> tuple[list[Job], int]:
-        """Get paginated list of jobs for a user."""
-        query = select(Job).where(Job.user_id == user_id)
-
+        cursor: str | None = None,
+    ) -> tuple[list[tuple[Job | ArchivedJob, str | None]], int, str | None]:
+        """
+        Get a page of a user's jobs, newest first, including archived jobs.
+
+        The page is chosen from the (created_at, id) keys of both the jobs
+        table and the archive, each read in index order from the
+        (user_id, created_at DESC, id) index, and the rows on the page are
+        then loaded from their table. With ``cursor`` the page starts after
+        the cursor's position; otherwise ``page`` is applied as an OFFSET.
+        Jobs are returned with their result image ID, and the total is read
+        from the user's counter (or counted for a status filter) in the same
+        query as the keys.
+
+        Returns:
+            Tuple of ((job, result image ID) pairs, total, cursor of the next page)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
         if status:
-            query = query.where(Job.status == status.value)
+            total_column = (
+                select(func.count())
+                .select_from(Job)
+                .where(Job.user_id == user_id, Job.status == status.value)
+                .scalar_subquery()
+            ) + (
+                select(func.count())
+                .select_from(ArchivedJob)
+                .where(ArchivedJob.user_id == user_id, ArchivedJob.status == status.value)
+                .scalar_subquery()
+            )
+        else:
+            total_column = UserStatsService.job_count(user_id)
 
-        # Count total
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar() or 0
+        offset = 0 if cursor else (page - 1) * page_size
+        candidates = offset + page_size + 1
+        keys = union_all(
+            select(self._job_keys(Job, user_id, status, cursor, candidates).subquery()),
+            select(self._job_keys(ArchivedJob, user_id, status, cursor, candidates).subquery()),
+        ).subquery()
 
-        # Get paginated results
-        query = query.order_by(Job.created_at.desc())
-        query = query.offset((page - 1) * page_size).limit(page_size)
+        result = await self.db.execute(
+            select(keys.c.id, keys.c.created_at, keys.c.archived, total_column)
+            .order_by(keys.c.created_at.desc(), keys.c.id.desc())
+            .offset(offset)
+            .limit(page_size + 1)
+        )
+        keys_page = result.all()
 
-        result = await self.db.execute(query)
-        jobs = list(result.scalars().all())
+        if keys_page:
+            total = keys_page[0][3]
+        else:
+            # Past the last page there is no row to carry the total
+            total = (await self.db.execute(select(total_column))).scalar() or 0
+
+        next_cursor = None
+        if len(keys_page) > page_size:
+            keys_page = keys_page[:page_size]
+            next_cursor = encode_cursor(keys_page[-1].created_at, keys_page[-1].id)
+
+        jobs: dict[str, tuple[Job | ArchivedJob, str | None]] = {}
+        job_ids = [row.id for row in keys_page if not row.archived]
+        if job_ids:
+            result = await self.db.execute(
+                self._with_result_image_id(select(Job)).where(Job.id.in_(job_ids))
+            )
+            jobs.update((job.id, (job, result_image_id)) for job, result_image_id in result.all())
+        archived_ids = [row.id for row in keys_page if row.archived]
+        if archived_ids:
+            result = await self.db.scalars(
+                select(ArchivedJob).where(ArchivedJob.id.in_(archived_ids))
+            )
+            jobs.update((job.id, (job, None)) for job in result.all())
 
-        return jobs, total
+        # Jobs archived between the two queries are left out of this page
+        items = [jobs[row.id] for row in keys_page if row.id in jobs]
+        return items, total, next_cursor
 
-    async def update_job_status(
+    async def transition_job(
         self,
         job_id: str,
         status: JobStatus,
-        error_message: str | None = None,
+        user_id: str | None = None,
+        **values,
     ) -> Job | None:
-        """Update job status."""
-        job = await self.get_job(job_id)
-        if not job:
-            return None
-
-        job.status = status.value
-
+        """
+        Move a job to a new status with a single conditional UPDATE.
+
+        The update only matches while the job is in a status that may move to
+        ``status`` (see ``JOB_TRANSITIONS``), so invalid or duplicate
+        transitions, such as two workers claiming the same job, change
+        nothing. ``values`` are written in the same statement, and the start
+        or completion time is set automatically.
+
+        Returns:
+            The updated job, or None if no job with this ID (and user) is in a
+            status it can make the transition from
+        """
+        sources = [source.value for source, targets in JOB_TRANSITIONS.items() if status in targets]
+        now = datetime.now(UTC)
         if status == JobStatus.PROCESSING:
-            job.started_at = datetime.now(timezone.utc)
-        elif status in (JobStatus.COMPLETED, JobStatus.FAILED):
-            job.completed_at = datetime.now(timezone.utc)
+            values.setdefault("started_at", now)
+        elif status in TERMINAL_STATUSES:
+            values.setdefault("completed_at", now)
 
-        if error_message:
-            job.error_message = error_message
-
-        await self.db.flush()
-        return job
+        query = update(Job).where(Job.id == job_id, Job.status.in_(sources))
+        if user_id:
+            query = query.where(Job.user_id == user_id)
 
-    async def process_text_to_image(self, job: Job) -> GeneratedImage | None:
-        """Process a text-to-image job."""
-        try:
-            # Update status to processing
-            await self.update_job_status(job.id, JobStatus.PROCESSING)
-            await self.db.commit()
+        result = await self.db.scalars(
+            query.values(status=status.value, **values)
+            .returning(Job)
+            .options(undefer(Job.timings_json))
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        return result.one_or_none()
+
+    @asynccontextmanager
+    async def _phase(self) -> AsyncIterator[AsyncSession]:
+        """
+        Bind a short-lived session to this service for one processing phase.
+
+        The session is committed when the block exits normally and rolled back
+        otherwise, so a connection is only checked out for the duration of the
+        block and never across inference.
+        """
+        async with self.session_factory() as session:
+            previous_db, self.db = self.db, session
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                self.db = previous_db
+
+    async def process_job(self, job_id: str, user_id: str | None = None) -> GeneratedImage | None:
+        """Claim a pending job and run it through the pipeline for its type."""
+        with use_profile(JobProfile()):
+            job = await self.claim_job(job_id, user_id)
+            if not job:
+                return None
+
+            if job.type == JobType.TEXT2IMG.value:
+                return await self.process_text_to_image(job)
+            if job.type == JobType.IMG2IMG.value:
+                return await self.process_image_to_image(job)
+            if job.type == JobType.INPAINT.value:
+                return await self.process_inpaint(job)
+
+            await self._fail_job(job, f"Unknown job type: {job.type}")
+            return None
 
-            # Generate image
-            image = await self.inference_client.text_to_image(
-                prompt=job.prompt,
-                negative_prompt=job.negative_prompt,
-                aspect_ratio=job.aspect_ratio,
-                seed=job.seed,
-                num_inference_steps=job.steps,
-                model=job.model,
+    async def process_jobs(
+        self,
+        job_ids: list[str],
+        on_start: Callable[[str], None] | None = None,
+    ) -> None:
+        """
+        Run a group of jobs, such as a batch, back to back.
+
+        Jobs are ordered so that those sharing a pipeline run consecutively,
+        and compatible text-to-image jobs are generated together in
+        micro-batches of up to ``inference_batch_size`` images.
+
+        Args:
+            job_ids: Jobs to run; those no longer pending are skipped
+            on_start: Called with each job's ID as it is about to run
+        """
+        async with self._phase():
+            result = await self.db.execute(
+                select(Job).where(
+                    Job.id.in_(job_ids),
+                    Job.status == JobStatus.PENDING.value,
+                )
             )
-
-            # Save image
-            image_data = await self.image_service.save_generated_image(
-                image=image,
-                user_id=job.user_id,
-                job_id=job.id,
-                prompt=job.prompt,
-                negative_prompt=job.negative_prompt,
-                parameters={
-                    "type": job.type,
-                    "aspect_ratio": job.aspect_ratio,
-                    "seed": job.seed,
-                    "steps": job.steps,
-                },
+            jobs = sorted(
+                result.scalars().all(),
+                key=lambda j: (j.model or "", j.type, j.aspect_ratio, j.steps, j.created_at, j.id),
             )
 
-            # Create database record
-            generated_image = GeneratedImage(
-                user_id=job.user_id,
-                job_id=job.id,
-                **image_data,
-            )
-            self.db.add(generated_image)
+        for group in self._micro_batches(jobs):
+            if on_start is not None:
+                for job in group:
+                    on_start(job.id)
+            if len(group) == 1:
+                await self.process_job(group[0].id)
+            else:
+                await self._process_text_to_image_batch(group)
+
+    def _micro_batches(self, jobs: list[Job]) -> list[list[Job]]:
+        """Split ordered jobs into groups that can share one pipeline call."""
+        groups: list[list[Job]] = []
+        for job in jobs:
+            current = groups[-1] if groups else None
+            if (
+                current is not None
+                and job.type == JobType.TEXT2IMG.value
+                and len(current) < settings.inference_batch_size
+                and all(
+                    (j.type, j.model, j.aspect_ratio, j.steps)
+                    == (job.type, job.model, job.aspect_ratio, job.steps)
+                    for j in current
+                )
+            ):
+                current.append(job)
+            else:
+                groups.append([job])
+        return groups
+
+    async def _process_text_to_image_batch(self, jobs: list[Job]) -> None:
+        """
+        Generate several compatible text-to-image jobs in one pipeline call.
+
+        Every job of the call is recorded with the profile of the shared
+        pipeline call plus its own image encoding and database write.
+        """
+        profile = JobProfile()
+        with use_profile(profile):
+            claimed = [job for job in [await self.claim_job(j.id) for j in jobs] if job]
+            if not claimed:
+                return
+
+            first = claimed[0]
+            try:
+                images = await self.inference_client.text_to_image_batch(
+                    prompts=[job.prompt for job in claimed],
+                    negative_prompts=[job.negative_prompt for job in claimed],
+                    seeds=[job.seed for job in claimed],
+                    aspect_ratio=first.aspect_ratio,
+                    num_inference_steps=first.steps,
+                    model=first.model,
+                )
+            except Exception as e:
+                logger.error(f"Batched generation of {len(claimed)} jobs failed: {e}")
+                for job in claimed:
+                    await self._fail_job(job, str(e))
+                return
+
+        for job, image in zip(claimed, images, strict=True):
+            with use_profile(profile.copy()):
+                await self._finish_job(job, image, self._text_to_image_parameters(job))
+
+    async def claim_job(self, job_id: str, user_id: str | None = None) -> Job | None:
+        """
+        Move a pending job to processing.
+
+        Returns:
+            The claimed job, detached from its session, or None if the job does
+            not exist or has already been picked up.
+        """
+        with profile_phase(current_profile(), "claim"):
+            async with self._phase():
+                job = await self.transition_job(job_id, JobStatus.PROCESSING, user_id)
+        if not job:
+            return None
 
-            # Update job status
-            await self.update_job_status(job.id, JobStatus.COMPLETED)
+        await self.publish_job_event(job)
+        return job
 
-            # Increment usage
-            await self.increment_daily_usage(job.user_id)
+    async def process_text_to_image(self, job: Job) -> GeneratedImage | None:
+        """Process a claimed text-to-image job."""
+        return await self._run_job(job, self._generate_text_to_image)
 
-            await self.db.commit()
-            await self.db.refresh(generated_image)
+    async def process_image_to_image(self, job: Job) -> GeneratedImage | None:
+        """Process a claimed image-to-image job."""
+        return await self._run_job(job, self._generate_image_to_image)
 
-            logger.info(f"Job {job.id} completed successfully")
-            return generated_image
+    async def process_inpaint(self, job: Job) -> GeneratedImage | None:
+        """Process a claimed inpainting job."""
+        return await self._run_job(job, self._generate_inpaint)
 
+    async def _run_job(
+        self,
+        job: Job,
+        generate: Callable[[Job], Awaitable[tuple[Image.Image, dict]]],
+    ) -> GeneratedImage | None:
+        """
+        Run inference for a claimed job and persist the outcome.
+
+        Inference and file writes happen with no session bound; the result is
+        then recorded in a single short transaction.
+        """
+        try:
+            image, parameters = await generate(job)
         except Exception as e:
-            logger.error(f"Job {job.id} failed: {e}")
-            await self.update_job_status(job.id, JobStatus.FAILED, str(e))
-            await self.db.commit()
+            logger.error(f"{job.type} job {job.id} failed: {e}")
+            await self._fail_job(job, str(e))
             return None
 
-    async def process_image_to_image(self, job: Job) -> GeneratedImage | None:
-        """Process an image-to-image job."""
-        try:
-            # Update status to processing
-            await self.update_job_status(job.id, JobStatus.PROCESSING)
-            await self.db.commit()
-
-            # Load source image
-            if not job.source_image_id:
-                raise ValueError("source_image_id is required for img2img")
+        return await self._finish_job(job, image, parameters)
 
-            source_path = Path(settings.upload_dir) / job.user_id / f"{job.source_image_id}.png"
-            if not source_path.exists():
-                raise ValueError(f"Source image not found: {job.source_image_id}")
-
-            source_image = Image.open(source_path)
+    async def _finish_job(
+        self,
+        job: Job,
+        image: Image.Image,
+        parameters: dict,
+    ) -> GeneratedImage | None:
+        """Save a generated image and mark its job as completed."""
+        try:
+            with profile_phase(current_profile(), "image_encode"):
+                image_data, payload = await self.image_service.save_generated_image(
+                    image=image,
+                    user_id=job.user_id,
+                    job_id=job.id,
+                    prompt=job.prompt,
+                    negative_prompt=job.negative_prompt,
+                    parameters=parameters,
+                )
+
+            generated_image = await self._complete_job(job, image_data, payload)
+
+            logger.info(f"{job.type} job {job.id} completed successfully")
+            return generated_image
 
-            # Resize source image to target aspect ratio if specified
-            target_width, target_height = get_dimensions_for_model(job.aspect_ratio, job.model)
-            source_image = await self.image_service.resize_image(
-                source_image,
-                target_width,
-                target_height,
-                mode="crop",
-            )
+        except Exception as e:
+            logger.error(f"{job.type} job {job.id} failed: {e}")
+            await self._fail_job(job, str(e))
+            return None
 
-            # Transform image
-            result_image = await self.inference_client.image_to_image(
-                image=source_image,
-                prompt=job.prompt,
-                negative_prompt=job.negative_prompt,
-                strength=job.strength or 0.8,
-                seed=job.seed,
-                num_inference_steps=job.steps,
-                model=job.model,
+    async def _complete_job(self, job: Job, image_data: dict, payload: bytes) -> GeneratedImage:
+        """
+        Record the result image, image count and completion in one transaction.
+
+        Raises:
+            JobTransitionError: If the job is no longer processing; nothing is
+                written in that case
+        """
+        profile = current_profile()
+        async with self._phase():
+            with profile_phase(profile, "db_write"):
+                await BlobService(self.db).store(payload, content_type=image_data["mime_type"])
+                generated_image = GeneratedImage(
+                    user_id=job.user_id,
+                    job_id=job.id,
+                    **image_data,
+                )
+                self.db.add(generated_image)
+                await self.db.flush()
+                await UserStatsService(self.db).increment(job.user_id, images=1)
+
+            completed_job = await self.transition_job(
+                job.id,
+                JobStatus.COMPLETED,
+                **self._profile_values(job, profile),
             )
+            if completed_job is None:
+                raise JobTransitionError(job.id, JobStatus.COMPLETED)
 
-            # Save result image
-            image_data = await self.image_service.save_generated_image(
-                image=result_image,
-                user_id=job.user_id,
-                job_id=job.id,
-                prompt=job.prompt,
-                negative_prompt=job.negative_prompt,
-                parameters={
-                    "type": job.type,
-                    "aspect_ratio": job.aspect_ratio,
-                    "seed": job.seed,
-                    "steps": job.steps,
-                    "strength": job.strength,
-                    "source_image_id": job.source_image_id,
-                },
-            )
+        self._observe_finished(completed_job)
+        await self.publish_job_event(completed_job, generated_image.id)
+        await self.notify_callback(completed_job, generated_image)
+        return generated_image
 
-            # Create database record
-            generated_image = GeneratedImage(
-                user_id=job.user_id,
-                job_id=job.id,
-                **image_data,
+    async def _fail_job(self, job: Job, error_message: str) -> None:
+        """Mark a job as failed in its own transaction and refund its quota."""
+        try:
+            async with self._phase():
+                failed_job = await self.transition_job(
+                    job.id,
+                    JobStatus.FAILED,
+                    error_message=error_message,
+                    **self._profile_values(job, current_profile()),
+                )
+        except Exception as e:
+            logger.error(f"Could not mark job {job.id} as failed: {e}")
+            return
+        if failed_job is None:
+            logger.warning(f"Job {job.id} is no longer processing; not marking it as failed")
+            return
+
+        await self.quota_service.refund(job.user_id, job.created_at)
+        self._observe_finished(failed_job)
+        await self.publish_job_event(failed_job)
+        await self.notify_callback(failed_job)
+
+    def _profile_values(self, job: Job, profile: JobProfile | None) -> dict:
+        """Column values recording the execution profile of a finishing job."""
+        if profile is None:
+            return {}
+
+        timings = profile.to_dict()
+        if job.started_at and job.created_at:
+            queue_wait = _as_utc(job.started_at) - _as_utc(job.created_at)
+            timings = {"queue_wait": round(queue_wait.total_seconds(), 4), **timings}
+
+        return {
+            "timings_json": json.dumps(timings),
+            "cpu_seconds": round(profile.cpu_seconds, 4),
+            "peak_rss_bytes": profile.peak_rss_bytes,
+            "pipeline_cache_hit": profile.pipeline_cache_hit,
+        }
+
+    def _observe_finished(self, job: Job) -> None:
+        """Record metrics for a job that reached a final state."""
+        jobs_finished_total.inc(type=job.type, status=job.status)
+        timings = _loaded_timings(job)
+        if timings:
+            model = job.model or settings.default_model
+            for phase, seconds in timings.items():
+                job_phase_duration_seconds.observe(seconds, model=model, type=job.type, phase=phase)
+
+    async def _load_source_image(self, job: Job, width: int, height: int) -> Image.Image:
+        """
+        Load the uploaded source image of an img2img or inpaint job, cropped
+        and resized to ``width`` x ``height``.
+
+        Preprocessed sources are cached, so repeat jobs on the same upload
+        and size skip decoding and resampling.
+        """
+        if not job.source_image_id:
+            raise ValueError(f"source_image_id is required for {job.type}")
+
+        async with self._phase() as session:
+            blob_hash = await session.scalar(
+                select(UploadedImage.blob_hash).where(
+                    UploadedImage.id == job.source_image_id,
+                    UploadedImage.user_id == job.user_id,
+                )
             )
-            self.db.add(generated_image)
-
-            # Update job status
-            await self.update_job_status(job.id, JobStatus.COMPLETED)
+        if blob_hash is None:
+            raise ValueError(f"Source image not found: {job.source_image_id}")
 
-            # Increment usage
-            await self.increment_daily_usage(job.user_id)
+        async def prepare() -> Image.Image:
+            image = await self.image_service.load_blob_image(blob_hash)
+            return await self.image_service.resize_image(image, width, height, mode="crop")
 
-            await self.db.commit()
-            await self.db.refresh(generated_image)
-
-            logger.info(f"Img2img job {job.id} completed successfully")
-            return generated_image
-
-        except Exception as e:
-            logger.error(f"Img2img job {job.id} failed: {e}")
-            await self.update_job_status(job.id, JobStatus.FAILED, str(e))
-            await self.db.commit()
-            return None
-
-    async def process_inpaint(self, job: Job) -> GeneratedImage | None:
-        """Process an inpainting job."""
         try:
-            # Update status to processing
-            await self.update_job_status(job.id, JobStatus.PROCESSING)
-            await self.db.commit()
-
-            # Load source image
-            if not job.source_image_id:
-                raise ValueError("source_image_id is required for inpaint")
+            return await get_source_cache().get(blob_hash, width, height, "crop", prepare)
+        except FileNotFoundError:
+            raise ValueError(f"Source image not found: {job.source_image_id}") from None
+
+    async def _load_mask(self, job: Job, width: int, height: int) -> Image.Image:
+        """
+        Load the mask of an inpaint job, prepared at ``width`` x ``height``.
+
+        Jobs of a batch share their mask, so prepared masks are cached like
+        sources and decoded once.
+        """
+        if not job.mask_hash:
+            raise ValueError("mask_data is required for inpaint")
+        mask_hash = job.mask_hash
+
+        async def prepare() -> Image.Image:
+            mask_bytes = await self.blob_store.get(mask_hash)
+            if _is_vector_mask(mask_bytes):
+                # Drawn straight at the model's resolution, already cropped like the source
+                vector_mask = VectorMask.model_validate_json(mask_bytes)
+                mask = await self.image_service.rasterize_mask(vector_mask, (width, height))
+            else:
+                mask = await self.image_service.load_mask_image(mask_bytes)
+            return await self.image_service.prepare_mask_for_inpainting(
+                mask, target_size=(width, height)
+            )
 
-            source_path = Path(settings.upload_dir) / job.user_id / f"{job.source_image_id}.png"
-            if not source_path.exists():
-                raise ValueError(f"Source image not found: {job.source_image_id}")
+        fit = (
+            f"mask:{settings.inpaint_mask_threshold}:{settings.inpaint_mask_dilate}"
+            f":{settings.inpaint_mask_feather}"
+        )
+        try:
+            return await get_source_cache().get(mask_hash, width, height, fit, prepare)
+        except FileNotFoundError:
+            raise ValueError(f"Mask not found: {mask_hash}") from None
 
-            source_image = Image.open(source_path)
+    async def _generate_text_to_image(self, job: Job) -> tuple[Image.Image, dict]:
+        """Generate the image for a text-to-image job."""
+        image = await self.inference_client.text_to_image(
+            prompt=job.prompt,
+            negative_prompt=job.negative_prompt,
+            aspect_ratio=job.aspect_ratio,
+            seed=job.seed,
+            num_inference_steps=job.steps,
+            model=job.model,
+        )
 
-            # Decode and prepare mask
-            if not job.mask_data:
-                raise ValueError("mask_data is required for inpaint")
+        return image, self._text_to_image_parameters(job)
+
+    def _text_to_image_parameters(self, job: Job) -> dict:
+        """Parameters recorded with a text-to-image result."""
+        return {
+            "type": job.type,
+            "aspect_ratio": job.aspect_ratio,
+            "seed": job.seed,
+            "steps": job.steps,
+        }
+
+    async def _generate_image_to_image(self, job: Job) -> tuple[Image.Image, dict]:
+        """Generate the image for an image-to-image job."""
+        with profile_phase(current_profile(), "preprocess"):
+            # Crop and resize the source to the model's size for the aspect ratio
+            target_width, target_height = get_dimensions_for_model(job.aspect_ratio, job.model)
+            source_image = await self._load_source_image(job, target_width, target_height)
 
-            mask = await self.image_service.decode_mask_from_base64(job.mask_data)
+        # Transform image
+        result_image = await self.inference_client.image_to_image(
+            image=source_image,
+            prompt=job.prompt,
+            negative_prompt=job.negative_prompt,
+            strength=job.strength or 0.8,
+            seed=job.seed,
+            num_inference_steps=job.steps,
+            model=job.model,
+        )
 
-            # Resize source image and mask to target aspect ratio
+        return result_image, {
+            "type": job.type,
+            "aspect_ratio": job.aspect_ratio,
+            "seed": job.seed,
+            "steps": job.steps,
+            "strength": job.strength,
+            "source_image_id": job.source_image_id,
+        }
+
+    async def _generate_inpaint(self, job: Job) -> tuple[Image.Image, dict]:
+        """Generate the image for an inpainting job."""
+        with profile_phase(current_profile(), "preprocess"):
+            # Crop and resize the source to the model's size for the aspect ratio
             target_width, target_height = get_dimensions_for_model(job.aspect_ratio, job.model)
-            source_image = await self.image_service.resize_image(
-                source_image,
-                target_width,
-                target_height,
-                mode="crop",
-            )
-            mask = await self.image_service.prepare_mask_for_inpainting(
-                mask,
-                target_size=(target_width, target_height),
-                blur_radius=3,
-            )
+            source_image = await self._load_source_image(job, target_width, target_height)
+
+            mask = await self._load_mask(job, target_width, target_height)
 
             # Save mask for reference
             await self.image_service.save_mask_image(mask, job.user_id, job.id)
 
-            # Perform inpainting
-            result_image = await self.inference_client.inpaint(
-                image=source_image,
-                mask=mask,
-                prompt=job.prompt,
-                negative_prompt=job.negative_prompt,
-                seed=job.seed,
-                num_inference_steps=job.steps,
-                model=job.model,
-            )
-
-            # Save result image
-            image_data = await self.image_service.save_generated_image(
-                image=result_image,
-                user_id=job.user_id,
-                job_id=job.id,
-                prompt=job.prompt,
-                negative_prompt=job.negative_prompt,
-                parameters={
-                    "type": job.type,
-                    "aspect_ratio": job.aspect_ratio,
-                    "seed": job.seed,
-                    "steps": job.steps,
-                    "source_image_id": job.source_image_id,
-                    "has_mask": True,
-                },
-            )
-
-            # Create database record
-            generated_image = GeneratedImage(
-                user_id=job.user_id,
-                job_id=job.id,
-                **image_data,
-            )
-            self.db.add(generated_image)
+        # Perform inpainting
+        result_image = await self.inference_client.inpaint(
+            image=source_image,
+            mask=mask,
+            prompt=job.prompt,
+            negative_prompt=job.negative_prompt,
+            seed=job.seed,
+            num_inference_steps=job.steps,
+            model=job.model,
+        )
 
-            # Update job status
-            await self.update_job_status(job.id, JobStatus.COMPLETED)
+        return result_image, {
+            "type": job.type,
+            "aspect_ratio": job.aspect_ratio,
+            "seed": job.seed,
+            "steps": job.steps,
+            "source_image_id": job.source_image_id,
+            "has_mask": True,
+        }
+
+    def _with_result_image_id(self, query: Select, *columns) -> Select:
+        """Add the result image ID of each job to a job query via an outer join."""
+        return query.add_columns(GeneratedImage.id, *columns).outerjoin(
+            GeneratedImage,
+            GeneratedImage.job_id == Job.id,
+        )
 
-            # Increment usage
-            await self.increment_daily_usage(job.user_id)
+    async def publish_job_event(self, job: Job, result_image_id: str | None = None) -> None:
+        """
+        Publish a job's current state to its owner's event channel.
 
-            await self.db.commit()
-            await self.db.refresh(generated_image)
+        Must be called after the state change is committed. Failures are
+        logged and never affect job processing.
+        """
+        try:
+            event = self.to_event(job, result_image_id)
+            await self.event_bus.publish(user_channel(job.user_id), event.model_dump(mode="json"))
+        except Exception as e:
+            logger.error(f"Failed to publish event for job {job.id}: {e}")
 
-            logger.info(f"Inpaint job {job.id} completed successfully")
-            return generated_image
+    async def notify_callback(self, job: Job, image: GeneratedImage | None = None) -> None:
+        """
+        Schedule the webhook callback of a finished job, if it has one.
 
+        Must be called after the state change is committed. Failures are
+        logged and never affect job processing.
+        """
+        if not job.callback_url:
+            return
+        try:
+            response = self.to_response(job, image.id if image else None)
+            await self.webhook_service.notify(job.callback_url, response, image)
         except Exception as e:
-            logger.error(f"Inpaint job {job.id} failed: {e}")
-            await self.update_job_status(job.id, JobStatus.FAILED, str(e))
-            await self.db.commit()
-            return None
+            logger.error(f"Failed to schedule callback for job {job.id}: {e}")
 
-    async def get_job_result_image(self, job_id: str) -> GeneratedImage | None:
-        """Get the result image for a completed job."""
-        result = await self.db.execute(
-            select(GeneratedImage).where(GeneratedImage.job_id == job_id)
+    def to_event(self, job: Job, result_image_id: str | None = None) -> JobEvent:
+        """Convert Job model to a state change event."""
+        return JobEvent(
+            job_id=job.id,
+            batch_id=job.batch_id,
+            status=JobStatus(job.status),
+            result_image_id=result_image_id,
+            error_message=job.error_message,
+            started_at=job.started_at,
+            completed_at=job.completed_at,
         )
-        return result.scalar_one_or_none()
 
     def to_response(self, job: Job, result_image_id: str | None = None) -> JobResponse:
         """Convert Job model to response schema."""
@@ -407,9 +1123,15 @@ class JobService:
             strength=job.strength,
             model=job.model,
             source_image_id=job.source_image_id,
+            batch_id=job.batch_id,
+            callback_url=job.callback_url,
             error_message=job.error_message,
             created_at=job.created_at,
             started_at=job.started_at,
             completed_at=job.completed_at,
             result_image_id=result_image_id,
+            timings=_loaded_timings(job),
+            cpu_seconds=job.cpu_seconds,
+            peak_rss_bytes=job.peak_rss_bytes,
+            pipeline_cache_hit=job.pipeline_cache_hit,
         )
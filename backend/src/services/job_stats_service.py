@@ -0,0 +1,122 @@
+"""Aggregated job execution statistics."""
+
+import json
+import math
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import Select, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.job import Job, JobStatus
+from src.models.job_archive import ArchivedJob
+from src.schemas.admin import JobTimingStats, Percentiles
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list (q in 0-100)."""
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(values: list[float]) -> Percentiles | None:
+    """Summarize measurements as percentiles, or None if there are none."""
+    if not values:
+        return None
+    values = sorted(values)
+    return Percentiles(
+        count=len(values),
+        p50=percentile(values, 50),
+        p90=percentile(values, 90),
+        p99=percentile(values, 99),
+        max=values[-1],
+    )
+
+
+class JobStatsService:
+    """Service for aggregating job execution profiles."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _profiled(
+        self,
+        model: type[Job] | type[ArchivedJob],
+        status: JobStatus,
+        since: datetime,
+        limit: int,
+    ) -> Select:
+        """Select one table's most recent profiled jobs for timing stats."""
+        return (
+            select(
+                model.model,
+                model.type,
+                model.timings_json,
+                model.cpu_seconds,
+                model.peak_rss_bytes,
+                model.pipeline_cache_hit,
+                model.created_at,
+                model.completed_at,
+            )
+            .where(
+                model.status == status.value,
+                model.completed_at >= since,
+                model.timings_json.is_not(None),
+            )
+            .order_by(model.completed_at.desc())
+            .limit(limit)
+        )
+
+    async def get_timing_stats(
+        self,
+        days: int = 7,
+        status: JobStatus = JobStatus.COMPLETED,
+        limit: int = 10000,
+    ) -> list[JobTimingStats]:
+        """
+        Percentiles of phase timings and resource usage per model and task.
+
+        Covers the most recent ``limit`` profiled jobs with the given status
+        that finished within the last ``days`` days, archived jobs included.
+        """
+        since = datetime.now(UTC) - timedelta(days=days)
+        profiled = union_all(
+            select(self._profiled(Job, status, since, limit).subquery()),
+            select(self._profiled(ArchivedJob, status, since, limit).subquery()),
+        ).subquery()
+        result = await self.db.execute(
+            select(profiled).order_by(profiled.c.completed_at.desc()).limit(limit)
+        )
+
+        groups: dict[tuple[str | None, str], list] = {}
+        for row in result.all():
+            groups.setdefault((row.model, row.type), []).append(row)
+
+        stats = []
+        for (model, job_type), rows in sorted(groups.items(), key=lambda g: (g[0][0] or "", g[0][1])):
+            phases: dict[str, list[float]] = {}
+            for row in rows:
+                for name, seconds in json.loads(row.timings_json).items():
+                    phases.setdefault(name, []).append(seconds)
+
+            cache_hits = [row.pipeline_cache_hit for row in rows if row.pipeline_cache_hit is not None]
+            stats.append(
+                JobTimingStats(
+                    model=model,
+                    type=job_type,
+                    jobs=len(rows),
+                    pipeline_cache_hit_rate=(
+                        sum(cache_hits) / len(cache_hits) if cache_hits else None
+                    ),
+                    total_seconds=summarize([
+                        (row.completed_at - row.created_at).total_seconds()
+                        for row in rows
+                        if row.completed_at and row.created_at
+                    ]),
+                    cpu_seconds=summarize([r.cpu_seconds for r in rows if r.cpu_seconds is not None]),
+                    peak_rss_bytes=summarize(
+                        [r.peak_rss_bytes for r in rows if r.peak_rss_bytes is not None]
+                    ),
+                    phases={name: summarize(values) for name, values in phases.items()},
+                )
+            )
+        return stats
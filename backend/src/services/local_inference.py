@@ -1,7 +1,10 @@
 """Local inference client for image generation using local GPU/CPU."""
 
 import asyncio
+import inspect
 import logging
+import random
+import time
 from io import BytesIO
 from typing import Any
 
@@ -9,6 +12,8 @@ import torch
 from PIL import Image
 
 from src.core.config import get_settings
+from src.core.metrics import pipeline_cache_requests_total, pipeline_load_duration_seconds
+from src.core.profiling import JobProfile, current_profile, profile_phase
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -190,6 +195,63 @@ class LocalInferenceClient:
         self.pipelines[cache_key] = pipeline
         return pipeline
 
+    def _load_pipeline(self, model_id: str, task: str, profile: JobProfile | None) -> Any:
+        """Get a pipeline, recording the load time and cache hit on the job profile."""
+        cache_hit = f"{model_id}_{task}" in self.pipelines
+        pipeline_cache_requests_total.inc(
+            model=model_id, task=task, result="hit" if cache_hit else "miss"
+        )
+        if profile is not None:
+            profile.pipeline_cache_hit = cache_hit
+
+        start = time.perf_counter()
+        with profile_phase(profile, "pipeline_load"):
+            pipeline = self._get_pipeline(model_id, task)
+        if not cache_hit:
+            pipeline_load_duration_seconds.observe(
+                time.perf_counter() - start, model=model_id, task=task
+            )
+        return pipeline
+
+    def _run_pipeline(self, pipeline: Any, profile: JobProfile | None, **kwargs: Any) -> Any:
+        """
+        Call a pipeline, splitting its run time into phases on the job profile.
+
+        Step-end callbacks mark where denoising starts and ends: time before
+        the first step (less one step) is counted as text encoding and latent
+        preparation, and time after the last step as VAE decoding. Pipelines
+        without step callbacks are timed as a single inference phase.
+        """
+        if profile is None:
+            return pipeline(**kwargs)
+
+        step_ends: list[float] = []
+        supports_callback = "callback_on_step_end" in inspect.signature(pipeline.__call__).parameters
+        if supports_callback:
+            def on_step_end(pipe: Any, step: int, timestep: Any, callback_kwargs: dict) -> dict:
+                step_ends.append(time.perf_counter())
+                return callback_kwargs
+
+            kwargs["callback_on_step_end"] = on_step_end
+
+        start = time.perf_counter()
+        result = pipeline(**kwargs)
+        end = time.perf_counter()
+        profile.sample_memory()
+
+        if not step_ends:
+            profile.add("inference", end - start)
+            return result
+
+        step_time = (
+            (step_ends[-1] - step_ends[0]) / (len(step_ends) - 1) if len(step_ends) > 1 else 0.0
+        )
+        text_encode = max(step_ends[0] - start - step_time, 0.0)
+        profile.add("text_encode", text_encode)
+        profile.add("denoise", step_ends[-1] - start - text_encode)
+        profile.add("vae_decode", end - step_ends[-1])
+        return result
+
     def _load_sd15_pipeline(self, model_id: str, task: str) -> Any:
         """Load Stable Diffusion 1.5 pipeline."""
         from diffusers import (
@@ -411,14 +473,18 @@ class LocalInferenceClient:
 
         logger.info(f"Generating image with model={model_id}, size={width}x{height}")
 
+        profile = current_profile()
+
         def generate():
-            pipeline = self._get_pipeline(model_id, "text2img")
+            pipeline = self._load_pipeline(model_id, "text2img", profile)
 
             generator = None
             if seed is not None:
                 generator = torch.Generator(device=self.device).manual_seed(seed)
 
-            result = pipeline(
+            result = self._run_pipeline(
+                pipeline,
+                profile,
                 prompt=prompt,
                 negative_prompt=negative_prompt,
                 width=width,
@@ -436,6 +502,67 @@ class LocalInferenceClient:
         logger.info("Image generation completed")
         return image
 
+    async def text_to_image_batch(
+        self,
+        prompts: list[str],
+        negative_prompts: list[str | None],
+        seeds: list[int | None],
+        aspect_ratio: str = "1:1",
+        num_inference_steps: int = 30,
+        model: str | None = None,
+    ) -> list[Image.Image]:
+        """
+        Generate several images that share a model, size and step count.
+
+        Args:
+            prompts: Text prompt per image
+            negative_prompts: Negative prompt per image
+            seeds: Random seed per image (None for a random seed)
+            aspect_ratio: Aspect ratio shared by all images
+            num_inference_steps: Number of denoising steps
+            model: Model ID to use
+
+        Returns:
+            List of PIL Images in the same order as the prompts
+        """
+        model_id = model or DEFAULT_MODEL_ID
+        width, height = self._get_dimensions(aspect_ratio, model_id)
+
+        logger.info(
+            f"Generating {len(prompts)} images with model={model_id}, size={width}x{height}"
+        )
+
+        profile = current_profile()
+
+        def generate():
+            pipeline = self._load_pipeline(model_id, "text2img", profile)
+
+            generators = [
+                torch.Generator(device=self.device).manual_seed(
+                    seed if seed is not None else random.randint(0, 2**31 - 1)
+                )
+                for seed in seeds
+            ]
+
+            result = self._run_pipeline(
+                pipeline,
+                profile,
+                prompt=prompts,
+                negative_prompt=[negative or "" for negative in negative_prompts],
+                width=width,
+                height=height,
+                num_inference_steps=num_inference_steps,
+                generator=generators,
+            )
+
+            return result.images
+
+        loop = asyncio.get_event_loop()
+        images = await loop.run_in_executor(None, generate)
+
+        logger.info("Batched image generation completed")
+        return images
+
     async def image_to_image(
         self,
         image: Image.Image,
@@ -475,14 +602,18 @@ class LocalInferenceClient:
 
         logger.info(f"Transforming image with model={model_id}, strength={strength}")
 
+        profile = current_profile()
+
         def transform():
-            pipeline = self._get_pipeline(model_id, "img2img")
+            pipeline = self._load_pipeline(model_id, "img2img", profile)
 
             generator = None
             if seed is not None:
                 generator = torch.Generator(device=self.device).manual_seed(seed)
 
-            result = pipeline(
+            result = self._run_pipeline(
+                pipeline,
+                profile,
                 prompt=prompt,
                 negative_prompt=negative_prompt,
                 image=image,
@@ -527,14 +658,18 @@ class LocalInferenceClient:
         # Inpainting always uses the dedicated SDXL inpaint model
         logger.info(f"Inpainting image with steps={num_inference_steps}")
 
+        profile = current_profile()
+
         def inpaint_fn():
-            pipeline = self._get_pipeline(DEFAULT_MODEL_ID, "inpaint")
+            pipeline = self._load_pipeline(DEFAULT_MODEL_ID, "inpaint", profile)
 
             generator = None
             if seed is not None:
                 generator = torch.Generator(device=self.device).manual_seed(seed)
 
-            result = pipeline(
+            result = self._run_pipeline(
+                pipeline,
+                profile,
                 prompt=prompt,
                 negative_prompt=negative_prompt,
                 image=image,
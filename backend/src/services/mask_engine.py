@@ -0,0 +1,223 @@
+"""Inpainting mask processing on NumPy arrays."""
+
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PIL import Image
+
+# Masks are 8-bit, single channel arrays: 255 marks the area to repaint
+
+
+@dataclass(frozen=True)
+class MaskStats:
+    """Extent of the painted area of a mask."""
+
+    width: int
+    height: int
+    bbox: tuple[int, int, int, int] | None  # (left, top, right, bottom), exclusive; None if empty
+    coverage: float  # fraction of pixels painted
+
+    @property
+    def empty(self) -> bool:
+        return self.bbox is None
+
+
+def to_array(mask: Image.Image) -> np.ndarray:
+    """Grayscale pixels of a mask as an (height, width) uint8 array."""
+    if mask.mode != "L":
+        mask = mask.convert("L")
+    return np.asarray(mask)
+
+
+def to_image(mask: np.ndarray) -> Image.Image:
+    """Mask array as an ``L`` image; a contiguous array is shared, not copied."""
+    return Image.fromarray(np.ascontiguousarray(mask), mode="L")
+
+
+def threshold(mask: np.ndarray, level: int = 128, invert: bool = False) -> np.ndarray:
+    """Binarize a mask to 0 and 255, painted where the value is at least ``level``."""
+    binary = (mask < level) if invert else (mask >= level)
+    # Reinterpret the booleans as 0/1 bytes in place, then scale them to 0/255
+    binary = binary.view(np.uint8)
+    binary *= 255
+    return binary
+
+
+def stats(mask: np.ndarray) -> MaskStats:
+    """Bounding box and coverage of the nonzero pixels of a mask."""
+    height, width = mask.shape
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return MaskStats(width, height, None, 0.0)
+    cols = np.flatnonzero(mask.any(axis=0))
+    bbox = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+    return MaskStats(width, height, bbox, np.count_nonzero(mask) / mask.size)
+
+
+def _area_last_axis(mask: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Sum the pixels between consecutive ``bounds`` along the last axis."""
+    # Each bin is a difference of two prefix sums; uint32 wraparound cancels out in it
+    prefix = np.zeros((*mask.shape[:-1], mask.shape[-1] + 1), dtype=np.uint32)
+    np.cumsum(mask, axis=-1, dtype=np.uint32, out=prefix[..., 1:])
+    return prefix[..., bounds[1:]] - prefix[..., bounds[:-1]]
+
+
+def _bin_span(length: int, size: int, start: int, stop: int) -> tuple[int, int]:
+    """Range of the ``size`` equal bins over ``length`` pixels that overlap [start, stop)."""
+    return start * size // length, -(-stop * size // length)
+
+
+def resize(
+    mask: np.ndarray,
+    size: tuple[int, int],
+    method: str = "auto",
+    bbox: tuple[int, int, int, int] | None = None,
+) -> np.ndarray:
+    """
+    Resize a mask to ``size`` (width, height).
+
+    ``area`` averages the source pixels under each target pixel, which
+    anti-aliases edges without the ringing of Lanczos; it only shrinks.
+    ``nearest`` picks one source pixel and keeps a binary mask binary.
+    ``auto`` uses area when shrinking along both axes and nearest otherwise.
+    With the painted area's ``bbox``, only the target pixels over it are
+    computed; the rest are zero.
+    """
+    width, height = size
+    source_height, source_width = mask.shape
+    if (source_width, source_height) == (width, height):
+        return mask
+
+    shrinking = width <= source_width and height <= source_height
+    if method == "auto":
+        method = "area" if shrinking else "nearest"
+    if method == "area" and not shrinking:
+        raise ValueError("Area resizing can only shrink a mask")
+    if method not in ("area", "nearest"):
+        raise ValueError(f"Unknown resize method {method!r}")
+
+    left, top, right, bottom = bbox or (0, 0, source_width, source_height)
+    x0, x1 = _bin_span(source_width, width, left, right)
+    y0, y1 = _bin_span(source_height, height, top, bottom)
+
+    if method == "area":
+        # Target column x0 + i averages source columns column_bounds[i] to column_bounds[i + 1]
+        column_bounds = np.arange(x0, x1 + 1, dtype=np.intp) * source_width // width
+        row_bounds = np.arange(y0, y1 + 1, dtype=np.intp) * source_height // height
+        region = mask[row_bounds[0] : row_bounds[-1], column_bounds[0] : column_bounds[-1]]
+        column_sums = _area_last_axis(region, column_bounds - column_bounds[0])
+        sums = _area_last_axis(column_sums.T, row_bounds - row_bounds[0]).T
+        areas = np.multiply.outer(np.diff(row_bounds), np.diff(column_bounds))
+        pixels = ((sums + areas // 2) // areas).astype(np.uint8)
+    else:
+        rows = ((np.arange(y0, y1) + 0.5) * source_height / height).astype(np.intp)
+        cols = ((np.arange(x0, x1) + 0.5) * source_width / width).astype(np.intp)
+        pixels = mask[rows[:, None], cols]
+
+    if (x0, y0, x1, y1) == (0, 0, width, height):
+        return pixels
+    result = np.zeros((height, width), dtype=np.uint8)
+    result[y0:y1, x0:x1] = pixels
+    return result
+
+
+def _along(axis: int, start: int, stop: int) -> tuple[slice, ...]:
+    """Index of the [start, stop) slice along ``axis`` of a 2D array."""
+    return (slice(None), slice(start, stop)) if axis == 1 else (slice(start, stop),)
+
+
+def _max_filter_axis(mask: np.ndarray, radius: int, axis: int) -> np.ndarray:
+    """Maximum over a window of ``2 * radius + 1`` pixels along an axis."""
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (radius, radius)
+    result = np.pad(mask, pad)
+
+    # Double the window each step, then cover the remainder with two overlapping windows
+    window = 2 * radius + 1
+    covered = 1
+    while covered * 2 <= window:
+        length = result.shape[axis] - covered
+        result = np.maximum(
+            result[_along(axis, 0, length)], result[_along(axis, covered, covered + length)]
+        )
+        covered *= 2
+    shift = window - covered
+    if shift:
+        length = result.shape[axis] - shift
+        result = np.maximum(
+            result[_along(axis, 0, length)], result[_along(axis, shift, shift + length)]
+        )
+    return result
+
+
+def dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+    """Grow the painted area by ``radius`` pixels with a square, separable max filter."""
+    if radius <= 0:
+        return mask
+    return _max_filter_axis(_max_filter_axis(mask, radius, axis=1), radius, axis=0)
+
+
+def _gaussian_kernel(sigma: float) -> np.ndarray:
+    radius = max(int(np.ceil(3 * sigma)), 1)
+    offsets = np.arange(-radius, radius + 1, dtype=np.float32)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    return kernel / kernel.sum()
+
+
+def _convolve_axis(mask: np.ndarray, kernel: np.ndarray, axis: int) -> np.ndarray:
+    radius = len(kernel) // 2
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (radius, radius)
+    padded = np.pad(mask, pad, mode="edge")
+    return sliding_window_view(padded, len(kernel), axis=axis) @ kernel
+
+
+def feather(mask: np.ndarray, sigma: float) -> np.ndarray:
+    """Soften mask edges with a separable Gaussian blur of standard deviation ``sigma``."""
+    if sigma <= 0:
+        return mask
+    kernel = _gaussian_kernel(sigma)
+    blurred = _convolve_axis(_convolve_axis(mask.astype(np.float32), kernel, 1), kernel, 0)
+    return np.clip(blurred + 0.5, 0, 255).astype(np.uint8)
+
+
+def prepare(
+    mask: np.ndarray,
+    size: tuple[int, int],
+    level: int = 128,
+    invert: bool = False,
+    dilate_radius: int = 0,
+    feather_sigma: float = 0,
+) -> np.ndarray:
+    """
+    Turn a painted mask into an inpainting mask of ``size`` (width, height).
+
+    The mask is binarized, resized, grown by ``dilate_radius`` pixels and
+    feathered. Only the window around the painted area is processed; the
+    rest of the result is zero.
+
+    Raises:
+        ValueError: If nothing is painted
+    """
+    binary = threshold(mask, level, invert)
+    painted = stats(binary)
+    if painted.empty:
+        raise ValueError("Mask is empty")
+
+    resized = resize(binary, size, bbox=painted.bbox)
+    bbox = stats(resized).bbox
+    if bbox is None:
+        raise ValueError("Mask is empty at the target size")
+    left, top, right, bottom = bbox
+
+    # Dilation and blurring spread paint this far; past it the result stays zero
+    margin = dilate_radius + (len(_gaussian_kernel(feather_sigma)) // 2 if feather_sigma > 0 else 0)
+    width, height = size
+    top, left = max(top - margin, 0), max(left - margin, 0)
+    bottom, right = min(bottom + margin, height), min(right + margin, width)
+
+    result = np.zeros((height, width), dtype=np.uint8)
+    window = resized[top:bottom, left:right]
+    result[top:bottom, left:right] = feather(dilate(window, dilate_radius), feather_sigma)
+    return result
@@ -0,0 +1,230 @@
+"""Daily generation quota service."""
+
+import asyncio
+import logging
+import time
+from datetime import UTC, date, datetime
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.config import get_settings
+from src.core.database import async_session_maker, dialect_insert
+from src.models.daily_usage import DailyUsage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+UsageKey = tuple[str, date]
+
+
+class QuotaExceededError(ValueError):
+    """Raised when a reservation would exceed the daily generation limit."""
+
+
+def usage_date(moment: datetime | None = None) -> date:
+    """Return the UTC quota day for a moment (defaults to now)."""
+    if moment is None:
+        return datetime.now(UTC).date()
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC)
+    return moment.date()
+
+
+class QuotaService:
+    """
+    Reserve and refund daily generation quota.
+
+    Counters are kept in process memory and changes are written back to
+    ``daily_usages`` in the background with a single upsert-increment per
+    counter, so checking and reserving quota normally costs no database
+    round trip. A counter is (re)loaded from the database on first use and
+    again once it is older than ``quota_cache_ttl_seconds`` with no unflushed
+    changes, which picks up usage recorded by other processes.
+
+    Each counter has its own lock, so loading one user's counter never holds
+    up another user's reservation.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = async_session_maker):
+        self.session_factory = session_factory
+        self._counts: dict[UsageKey, int] = {}
+        self._loaded_at: dict[UsageKey, float] = {}
+        self._pending: dict[UsageKey, int] = {}
+        self._flushing: dict[UsageKey, int] = {}
+        self._locks: dict[UsageKey, asyncio.Lock] = {}
+        self._flush_lock = asyncio.Lock()
+        # Bumped when a flush starts and ends, to detect loads that overlap one
+        self._flush_generation = 0
+        self._flush_task: asyncio.Task | None = None
+
+    def _lock(self, key: UsageKey) -> asyncio.Lock:
+        """Lock guarding a counter."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    async def _load(self, key: UsageKey) -> int:
+        """
+        Return the cached counter for a key, loading it if missing or stale.
+
+        Must be called holding the key's lock.
+        """
+        loaded_at = self._loaded_at.get(key)
+        is_fresh = (
+            loaded_at is not None
+            and time.monotonic() - loaded_at < settings.quota_cache_ttl_seconds
+        )
+        has_unwritten = bool(self._pending.get(key) or self._flushing.get(key))
+        if key in self._counts and (is_fresh or has_unwritten):
+            return self._counts[key]
+
+        user_id, day = key
+        while True:
+            generation = self._flush_generation
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    select(DailyUsage.generation_count).where(
+                        DailyUsage.user_id == user_id,
+                        DailyUsage.usage_date == day,
+                    )
+                )
+                stored = result.scalar_one_or_none() or 0
+            # A flush during the read may or may not be included in it; read again
+            if generation == self._flush_generation:
+                break
+
+        self._counts[key] = stored + self._pending.get(key, 0) + self._flushing.get(key, 0)
+        self._loaded_at[key] = time.monotonic()
+        return self._counts[key]
+
+    async def get_usage(self, user_id: str) -> int:
+        """Get user's generation count for today, including reservations."""
+        key = (user_id, usage_date())
+        async with self._lock(key):
+            return await self._load(key)
+
+    async def reserve(self, user_id: str, amount: int = 1) -> int:
+        """
+        Reserve quota for new jobs.
+
+        Returns:
+            The user's usage for today after the reservation
+
+        Raises:
+            QuotaExceededError: If the reservation would exceed the daily limit
+        """
+        key = (user_id, usage_date())
+        async with self._lock(key):
+            current = await self._load(key)
+            if current + amount > settings.daily_generation_limit:
+                remaining = max(settings.daily_generation_limit - current, 0)
+                raise QuotaExceededError(
+                    f"Daily generation limit reached ({settings.daily_generation_limit} per day, "
+                    f"{remaining} remaining)"
+                )
+            self._counts[key] = current + amount
+            self._pending[key] = self._pending.get(key, 0) + amount
+            return self._counts[key]
+
+    async def refund(self, user_id: str, reserved_at: datetime | None = None, amount: int = 1) -> None:
+        """Return quota reserved for a job that failed or was cancelled."""
+        key = (user_id, usage_date(reserved_at))
+        async with self._lock(key):
+            current = await self._load(key)
+            amount = min(amount, current)
+            if amount <= 0:
+                return
+            self._counts[key] = current - amount
+            self._pending[key] = self._pending.get(key, 0) - amount
+
+    async def flush(self) -> None:
+        """
+        Write pending counter changes to the database.
+
+        Changes that fail to write are kept and retried on the next flush.
+        """
+        async with self._flush_lock:
+            pending = {key: delta for key, delta in self._pending.items() if delta}
+            self._pending = {}
+            self._flushing = pending
+            # Forget counters from previous days once they are written back
+            today = usage_date()
+            for key in [k for k in self._counts if k[1] < today and k not in pending]:
+                if not self._lock(key).locked():
+                    self._counts.pop(key, None)
+                    self._loaded_at.pop(key, None)
+                    self._locks.pop(key, None)
+
+            if not pending:
+                return
+
+            self._flush_generation += 1
+            try:
+                async with self.session_factory() as session:
+                    for (user_id, day), delta in pending.items():
+                        await session.execute(self._upsert_increment(session, user_id, day, delta))
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Failed to flush usage counters: {e}")
+                for key, delta in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + delta
+            finally:
+                self._flushing = {}
+                self._flush_generation += 1
+
+    def _upsert_increment(self, session: AsyncSession, user_id: str, day: date, delta: int):
+        """Build a single-statement insert-or-increment for a usage counter."""
+        insert = dialect_insert(session)
+        now = datetime.now(UTC)
+        statement = insert(DailyUsage).values(
+            id=str(uuid4()),
+            user_id=user_id,
+            usage_date=day,
+            generation_count=max(delta, 0),
+            created_at=now,
+            updated_at=now,
+        )
+        return statement.on_conflict_do_update(
+            index_elements=[DailyUsage.user_id, DailyUsage.usage_date],
+            set_={
+                "generation_count": DailyUsage.generation_count + delta,
+                "updated_at": now,
+            },
+        )
+
+    async def _flush_periodically(self) -> None:
+        """Background loop that writes counters back to the database."""
+        while True:
+            await asyncio.sleep(settings.quota_flush_interval_seconds)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the write-behind flush loop."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write any remaining changes."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+
+# Singleton instance
+_quota_service: QuotaService | None = None
+
+
+def get_quota_service() -> QuotaService:
+    """Get or create quota service instance."""
+    global _quota_service
+    if _quota_service is None:
+        _quota_service = QuotaService()
+    return _quota_service
@@ -0,0 +1,186 @@
+"""On-demand rendering of image derivatives such as thumbnails and previews."""
+
+import asyncio
+import hashlib
+import logging
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from src.core.config import get_settings
+from src.core.executors import get_cpu_executor, get_io_executor
+from src.core.metrics import (
+    image_bytes_written_total,
+    images_saved_total,
+    render_cache_bytes,
+    render_cache_evictions_total,
+    render_cache_requests_total,
+)
+from src.services.disk_cache import DiskCache
+from src.services.image_encoding import EncodingOptions, decode_image, encode_image
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+FITS = ("contain", "cover", "fill")
+
+
+# Blocking helpers, run on the CPU executor
+
+
+def _render(
+    data: bytes,
+    width: int | None,
+    height: int | None,
+    fit: str,
+    options: EncodingOptions,
+) -> bytes:
+    """
+    Resize and encode an image.
+
+    ``contain`` scales the image to fit inside the box without upscaling,
+    ``cover`` fills the box and crops the overflow, and ``fill`` stretches
+    to the box. With only one dimension given every fit behaves like
+    ``contain``.
+    """
+    image = decode_image(data)
+    if image.mode not in ("RGB", "RGBA", "L"):
+        image = image.convert("RGB")
+
+    if width and height and fit == "cover":
+        image = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    elif width and height and fit == "fill":
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+    elif width or height:
+        image.thumbnail((width or image.width, height or image.height), Image.Resampling.LANCZOS)
+
+    return encode_image(image, options)
+
+
+class RenderService:
+    """
+    Render resized, re-encoded derivatives of stored images on request.
+
+    Renders are cached on disk under ``render_cache_dir`` and evicted least
+    recently used first once they exceed ``render_cache_max_mb``. Concurrent
+    requests for the same derivative share a single render. Recency is
+    tracked in memory; after a restart, files are ordered by modification
+    time.
+
+    Renders are returned as bytes rather than cache paths, since a cached
+    file can be evicted at any time after it is looked up.
+    """
+
+    def __init__(self, root: str | Path | None = None, max_bytes: int | None = None):
+        self.cache = DiskCache(
+            root or settings.render_cache_dir,
+            max_bytes if max_bytes is not None else settings.render_cache_max_mb * 1024 * 1024,
+            bytes_gauge=render_cache_bytes,
+            evictions=render_cache_evictions_total,
+        )
+        self._renders: dict[Path, asyncio.Task] = {}
+
+    def encoding(self, format: str) -> EncodingOptions:
+        """Encoding options for derivatives in a format."""
+        return EncodingOptions(
+            format=format,
+            quality=settings.thumbnail_quality,
+            effort=settings.output_effort,
+        )
+
+    def path_for(
+        self,
+        source_id: str,
+        width: int | None,
+        height: int | None,
+        fit: str,
+        options: EncodingOptions,
+    ) -> Path:
+        """Cache file of a derivative; the name covers everything that affects its bytes."""
+        key = hashlib.sha256(
+            f"{source_id}:{width}:{height}:{fit}:{options.format}:{options.quality}:{options.effort}".encode()
+        ).hexdigest()
+        return self.cache.path_for(key, options.image_format.extension)
+
+    async def _render_to(
+        self,
+        path: Path,
+        load_source: Callable[[], Awaitable[bytes]],
+        width: int | None,
+        height: int | None,
+        fit: str,
+        options: EncodingOptions,
+    ) -> bytes:
+        """Render a derivative into the cache."""
+        data = await load_source()
+        rendered = await get_cpu_executor().run(_render, data, width, height, fit, options)
+        await self.cache.put(path, rendered)
+        images_saved_total.inc(kind="derivative")
+        image_bytes_written_total.inc(len(rendered), kind="derivative")
+        return rendered
+
+    async def render(
+        self,
+        source_id: str,
+        load_source: Callable[[], Awaitable[bytes]],
+        width: int | None,
+        height: int | None,
+        fit: str,
+        format: str,
+    ) -> bytes:
+        """
+        Get the cached derivative of an image, rendering it if needed.
+
+        Args:
+            source_id: Stable ID of the source image, part of the cache key
+            load_source: Reads the encoded source image; called only on a miss
+            width: Target width, or None to follow the height
+            height: Target height, or None to follow the width
+            fit: One of ``FITS``
+            format: Output format name
+
+        Returns:
+            The encoded derivative
+
+        Raises:
+            FileNotFoundError: If the source image is missing
+        """
+        await self.cache.ensure_loaded()
+        options = self.encoding(format)
+        path = self.path_for(source_id, width, height, fit, options)
+
+        if self.cache.touch(path):
+            try:
+                data = await get_io_executor().run(path.read_bytes)
+                render_cache_requests_total.inc(result="hit")
+                return data
+            except FileNotFoundError:
+                # Evicted since the lookup; render it again
+                pass
+
+        task = self._renders.get(path)
+        if task is None:
+            render_cache_requests_total.inc(result="miss")
+            task = asyncio.create_task(
+                self._render_to(path, load_source, width, height, fit, options)
+            )
+            self._renders[path] = task
+            task.add_done_callback(lambda _: self._renders.pop(path, None))
+        else:
+            render_cache_requests_total.inc(result="shared")
+
+        # A client going away must not cancel the render for others waiting on it
+        return await asyncio.shield(task)
+
+
+# Singleton instance
+_render_service: RenderService | None = None
+
+
+def get_render_service() -> RenderService:
+    """Get or create render service instance."""
+    global _render_service
+    if _render_service is None:
+        _render_service = RenderService()
+    return _render_service
@@ -0,0 +1,177 @@
+"""Cache of source images preprocessed for img2img and inpainting."""
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from io import BytesIO
+
+from PIL import Image
+
+from src.core.config import get_settings
+from src.core.executors import get_cpu_executor, get_io_executor
+from src.core.metrics import (
+    source_cache_bytes,
+    source_cache_evictions_total,
+    source_cache_requests_total,
+)
+from src.services.disk_cache import DiskCache
+from src.services.image_encoding import decode_image
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+# Blocking helpers, run on the CPU executor
+
+
+def _encode_fast_png(image: Image.Image) -> bytes:
+    """Encode losslessly with the cheapest compression; these files are read back often."""
+    buffer = BytesIO()
+    image.save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def _image_bytes(image: Image.Image) -> int:
+    """Approximate memory held by a decoded image."""
+    return image.width * image.height * len(image.getbands())
+
+
+class SourceCache:
+    """
+    Keep source images already cropped and resized for a job.
+
+    Users iterate on the same upload and aspect ratio many times; each entry
+    is keyed by the source blob, the target size and the fit mode, so a
+    repeat job skips decoding the upload and resampling it. Decoded images
+    are kept in memory up to ``source_cache_memory_mb``; every entry is also
+    written to ``source_cache_dir`` as fast-compressed PNG, up to
+    ``source_cache_max_mb``, so entries outlive memory eviction and
+    restarts. Concurrent requests for the same entry share one preparation.
+    Prepared inpainting masks are cached the same way, keyed by the mask
+    blob and the mask settings.
+    """
+
+    def __init__(self, memory_max_bytes: int | None = None, disk_cache: DiskCache | None = None):
+        self.memory_max_bytes = (
+            memory_max_bytes
+            if memory_max_bytes is not None
+            else settings.source_cache_memory_mb * 1024 * 1024
+        )
+        self.disk = disk_cache
+        if self.disk is None and settings.source_cache_max_mb > 0:
+            self.disk = DiskCache(
+                settings.source_cache_dir,
+                settings.source_cache_max_mb * 1024 * 1024,
+                bytes_gauge=source_cache_bytes,
+                evictions=source_cache_evictions_total,
+                tier="disk",
+            )
+
+        self._memory: OrderedDict[str, Image.Image] = OrderedDict()
+        self._memory_size = 0
+        self._pending: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def key_for(digest: str, width: int, height: int, fit: str) -> str:
+        """Cache key of a preprocessed source."""
+        return hashlib.sha256(f"{digest}:{width}x{height}:{fit}".encode()).hexdigest()
+
+    def _remember(self, key: str, image: Image.Image) -> None:
+        """Add an image to the memory tier, evicting least recently used ones."""
+        size = _image_bytes(image)
+        if size > self.memory_max_bytes:
+            return
+        if key in self._memory:
+            self._memory_size -= _image_bytes(self._memory.pop(key))
+        self._memory[key] = image
+        self._memory_size += size
+
+        evicted = 0
+        while self._memory_size > self.memory_max_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_size -= _image_bytes(old)
+            evicted += 1
+        if evicted:
+            source_cache_evictions_total.inc(evicted, tier="memory")
+        source_cache_bytes.set(self._memory_size, tier="memory")
+
+    async def _load(self, key: str, prepare: Callable[[], Awaitable[Image.Image]]) -> Image.Image:
+        """Read an entry from the disk tier, or prepare and store it."""
+        if self.disk is not None:
+            await self.disk.ensure_loaded()
+            path = self.disk.path_for(key, "png")
+            if self.disk.touch(path):
+                try:
+                    data = await get_io_executor().run(path.read_bytes)
+                    image = await get_cpu_executor().run(decode_image, data)
+                    source_cache_requests_total.inc(result="disk")
+                    self._remember(key, image)
+                    return image
+                except OSError as e:
+                    logger.warning(f"Unreadable cached source {path}: {e}")
+
+        source_cache_requests_total.inc(result="miss")
+        image = await prepare()
+        self._remember(key, image)
+        if self.disk is not None:
+            # The cache is an optimization; a failed write must not fail the job
+            try:
+                data = await get_cpu_executor().run(_encode_fast_png, image)
+                await self.disk.put(self.disk.path_for(key, "png"), data)
+            except OSError as e:
+                logger.warning(f"Failed to cache preprocessed source: {e}")
+        return image
+
+    async def get(
+        self,
+        digest: str,
+        width: int,
+        height: int,
+        fit: str,
+        prepare: Callable[[], Awaitable[Image.Image]],
+    ) -> Image.Image:
+        """
+        Get a preprocessed source image, preparing it on a miss.
+
+        Args:
+            digest: Blob hash of the uploaded source
+            width: Target width
+            height: Target height
+            fit: How the source was fitted to the target, e.g. ``crop``
+            prepare: Loads and preprocesses the source; called only on a miss
+
+        Returns:
+            A copy of the cached image, which the caller may modify
+        """
+        key = self.key_for(digest, width, height, fit)
+        image = self._memory.get(key)
+        if image is not None:
+            self._memory.move_to_end(key)
+            source_cache_requests_total.inc(result="memory")
+            return image.copy()
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, prepare))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            source_cache_requests_total.inc(result="shared")
+
+        # A cancelled job must not cancel the preparation for others waiting on it
+        image = await asyncio.shield(task)
+        return image.copy()
+
+
+# Singleton instance
+_source_cache: SourceCache | None = None
+
+
+def get_source_cache() -> SourceCache:
+    """Get or create source cache instance."""
+    global _source_cache
+    if _source_cache is None:
+        _source_cache = SourceCache()
+    return _source_cache
@@ -0,0 +1,538 @@
+"""Object storage backends for blobs: local filesystem and S3-compatible."""
+
+import hashlib
+import hmac
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterable, AsyncIterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import quote, urlsplit
+from xml.etree import ElementTree
+
+import httpx
+
+from src.core.config import get_settings
+from src.core.executors import get_io_executor
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3's minimum size for all but the last part
+
+
+class StorageBackend(ABC):
+    """
+    Store objects under slash-separated keys such as ``ab/cd/<digest>``.
+
+    Objects can be written from bytes or streamed from an async iterable,
+    and read whole, streamed, or by byte range. Ranges are inclusive at
+    both ends, as in HTTP ``Range`` headers.
+    """
+
+    @abstractmethod
+    async def put(
+        self,
+        key: str,
+        data: bytes | AsyncIterable[bytes],
+        content_type: str = "application/octet-stream",
+    ) -> int:
+        """Write an object, replacing any existing one; returns its size."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        """
+        Read an object.
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+        """
+
+    @abstractmethod
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        """
+        Read bytes ``start`` through ``end`` of an object.
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+        """
+
+    @abstractmethod
+    def stream(self, key: str, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        """
+        Stream an object, or bytes ``start`` through ``end`` of it, in chunks.
+
+        Raises:
+            FileNotFoundError: When iterated, if the object does not exist
+        """
+
+    @abstractmethod
+    async def size(self, key: str) -> int | None:
+        """Size of an object in bytes, or None if it does not exist."""
+
+    async def exists(self, key: str) -> bool:
+        """Check whether an object exists."""
+        return await self.size(key) is not None
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete an object if it exists."""
+
+    async def presign(
+        self,
+        key: str,
+        expires_seconds: int,
+        filename: str | None = None,
+        content_type: str | None = None,
+    ) -> str | None:
+        """URL clients can download an object from directly, if the backend has one."""
+        return None
+
+    def local_path(self, key: str) -> Path | None:
+        """Filesystem path of an object, if the backend stores objects as local files."""
+        return None
+
+    async def close(self) -> None:
+        """Release connections held by the backend."""
+        return None
+
+
+# Blocking helpers for the local backend, run on the I/O executor
+
+
+def _open_temp(directory: Path) -> tuple[BinaryIO, str]:
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    return os.fdopen(fd, "wb"), temp_path
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    temp_file, temp_path = _open_temp(path.parent)
+    try:
+        with temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def _read_range(path: Path, start: int, length: int) -> bytes:
+    with path.open("rb") as file:
+        file.seek(start)
+        return file.read(length)
+
+
+def _file_size(path: Path) -> int | None:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return None
+
+
+class LocalStorageBackend(StorageBackend):
+    """Objects stored as files under a root directory; file I/O runs on the I/O executor."""
+
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root or settings.blob_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def local_path(self, key: str) -> Path:
+        if key.startswith("/") or ".." in key.split("/"):
+            raise ValueError(f"Invalid storage key: {key!r}")
+        return self.root / key
+
+    async def put(
+        self,
+        key: str,
+        data: bytes | AsyncIterable[bytes],
+        content_type: str = "application/octet-stream",
+    ) -> int:
+        path = self.local_path(key)
+        io_executor = get_io_executor()
+        if isinstance(data, bytes):
+            await io_executor.run(_write_atomic, path, data)
+            return len(data)
+
+        # Stream into a temporary file so readers never see a partial object
+        temp_file, temp_path = await io_executor.run(_open_temp, path.parent)
+        size = 0
+        try:
+            async for chunk in data:
+                await io_executor.run(temp_file.write, chunk)
+                size += len(chunk)
+            await io_executor.run(temp_file.close)
+            await io_executor.run(os.replace, temp_path, path)
+        except BaseException:
+            temp_file.close()
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        return size
+
+    async def get(self, key: str) -> bytes:
+        return await get_io_executor().run(self.local_path(key).read_bytes)
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        return await get_io_executor().run(_read_range, self.local_path(key), start, end - start + 1)
+
+    async def stream(self, key: str, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        path = self.local_path(key)
+        io_executor = get_io_executor()
+        file = await io_executor.run(path.open, "rb")
+        try:
+            await io_executor.run(file.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+                chunk = await io_executor.run(file.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            file.close()
+
+    async def size(self, key: str) -> int | None:
+        return await get_io_executor().run(_file_size, self.local_path(key))
+
+    async def delete(self, key: str) -> None:
+        await get_io_executor().run(self.local_path(key).unlink, missing_ok=True)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _quote(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Objects stored in an S3-compatible bucket (AWS S3, MinIO, Ceph, R2...).
+
+    Requests are signed with AWS Signature Version 4 and sent with httpx, so
+    no AWS SDK is needed. Buckets are addressed path-style
+    (``{endpoint}/{bucket}/{key}``), which every S3-compatible server
+    accepts. Streamed uploads larger than one part use multipart upload.
+    """
+
+    def __init__(
+        self,
+        bucket: str | None = None,
+        endpoint_url: str | None = None,
+        region: str | None = None,
+        access_key_id: str | None = None,
+        secret_access_key: str | None = None,
+        prefix: str | None = None,
+        part_size: int | None = None,
+        client: httpx.AsyncClient | None = None,
+    ):
+        self.bucket = bucket or settings.s3_bucket
+        if not self.bucket:
+            raise ValueError("S3 storage requires S3_BUCKET")
+        self.region = region or settings.s3_region
+        self.endpoint_url = (
+            endpoint_url or settings.s3_endpoint_url or f"https://s3.{self.region}.amazonaws.com"
+        ).rstrip("/")
+        self.access_key_id = access_key_id or settings.s3_access_key_id
+        self.secret_access_key = secret_access_key or settings.s3_secret_access_key
+        self.prefix = (prefix if prefix is not None else settings.s3_prefix).strip("/")
+        self.part_size = max(
+            part_size or settings.s3_multipart_part_size_mb * 1024 * 1024,
+            MIN_PART_SIZE,
+        )
+        self.client = client or httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+
+        endpoint = urlsplit(self.endpoint_url)
+        self._host = endpoint.netloc
+        self._base_path = endpoint.path.rstrip("/")
+
+    # Signing
+
+    def _path(self, key: str) -> str:
+        object_key = f"{self.prefix}/{key}" if self.prefix else key
+        return f"{self._base_path}/{self.bucket}/{object_key}"
+
+    def _signing_key(self, date: str) -> bytes:
+        key = _hmac(f"AWS4{self.secret_access_key}".encode(), date)
+        for part in (self.region, "s3", "aws4_request"):
+            key = _hmac(key, part)
+        return key
+
+    def _signature(
+        self,
+        method: str,
+        path: str,
+        query: dict[str, str],
+        headers: dict[str, str],
+        payload_hash: str,
+        timestamp: str,
+    ) -> tuple[str, str, str]:
+        """Sign a request; returns (credential scope, signed headers, signature)."""
+        canonical_query = "&".join(
+            f"{_quote(name)}={_quote(value)}" for name, value in sorted(query.items())
+        )
+        canonical_headers = "".join(
+            f"{name}:{' '.join(value.split())}\n" for name, value in sorted(headers.items())
+        )
+        signed_headers = ";".join(sorted(headers))
+        canonical_request = "\n".join(
+            [
+                method,
+                _quote(path, safe="/-_.~"),
+                canonical_query,
+                canonical_headers,
+                signed_headers,
+                payload_hash,
+            ]
+        )
+
+        date = timestamp[:8]
+        scope = f"{date}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join(
+            ["AWS4-HMAC-SHA256", timestamp, scope, _sha256(canonical_request.encode())]
+        )
+        signature = hmac.new(
+            self._signing_key(date), string_to_sign.encode(), hashlib.sha256
+        ).hexdigest()
+        return scope, signed_headers, signature
+
+    async def _request(
+        self,
+        method: str,
+        key: str,
+        query: dict[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+        content: bytes = b"",
+        stream: bool = False,
+    ) -> httpx.Response:
+        """Send a signed request for an object."""
+        query = query or {}
+        path = self._path(key)
+        timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+        payload_hash = _sha256(content)
+
+        signed = {
+            "host": self._host,
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": timestamp,
+            **{name.lower(): value for name, value in (headers or {}).items()},
+        }
+        scope, signed_headers, signature = self._signature(
+            method, path, query, signed, payload_hash, timestamp
+        )
+        signed["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        del signed["host"]
+
+        url = f"{self.endpoint_url.split('://')[0]}://{self._host}{_quote(path, safe='/-_.~')}"
+        request = self.client.build_request(
+            method,
+            url,
+            params=query or None,
+            headers=signed,
+            content=content or None,
+        )
+        return await self.client.send(request, stream=stream)
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response, key: str) -> None:
+        if response.status_code == 404:
+            raise FileNotFoundError(f"Object not found: {key}")
+        if response.is_error:
+            raise OSError(
+                f"S3 {response.request.method} {key} failed with {response.status_code}: "
+                f"{response.text[:200]}"
+            )
+
+    # Objects
+
+    async def put(
+        self,
+        key: str,
+        data: bytes | AsyncIterable[bytes],
+        content_type: str = "application/octet-stream",
+    ) -> int:
+        if isinstance(data, bytes):
+            await self._put_object(key, data, content_type)
+            return len(data)
+
+        # Buffer the stream part by part; only switch to multipart once the
+        # object turns out to be bigger than one part
+        buffer = bytearray()
+        upload_id: str | None = None
+        parts: list[str] = []
+        size = 0
+        try:
+            async for chunk in data:
+                buffer += chunk
+                size += len(chunk)
+                # A full part is only sent once more data follows it
+                while len(buffer) > self.part_size:
+                    if upload_id is None:
+                        upload_id = await self._create_multipart_upload(key, content_type)
+                    part = bytes(buffer[: self.part_size])
+                    del buffer[: self.part_size]
+                    parts.append(await self._upload_part(key, upload_id, len(parts) + 1, part))
+
+            if upload_id is None:
+                await self._put_object(key, bytes(buffer), content_type)
+                return size
+
+            if buffer:
+                parts.append(await self._upload_part(key, upload_id, len(parts) + 1, bytes(buffer)))
+            await self._complete_multipart_upload(key, upload_id, parts)
+        except BaseException:
+            if upload_id is not None:
+                try:
+                    await self._request("DELETE", key, query={"uploadId": upload_id})
+                except Exception as e:
+                    logger.warning(f"Failed to abort multipart upload of {key}: {e}")
+            raise
+        return size
+
+    async def _put_object(self, key: str, data: bytes, content_type: str) -> None:
+        response = await self._request(
+            "PUT", key, headers={"content-type": content_type}, content=data
+        )
+        self._raise_for_status(response, key)
+
+    async def _create_multipart_upload(self, key: str, content_type: str) -> str:
+        response = await self._request(
+            "POST", key, query={"uploads": ""}, headers={"content-type": content_type}
+        )
+        self._raise_for_status(response, key)
+        root = ElementTree.fromstring(response.content)
+        return next(element.text for element in root.iter() if element.tag.endswith("UploadId"))
+
+    async def _upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        """Upload one part; returns its ETag."""
+        response = await self._request(
+            "PUT",
+            key,
+            query={"partNumber": str(number), "uploadId": upload_id},
+            content=data,
+        )
+        self._raise_for_status(response, key)
+        return response.headers["etag"]
+
+    async def _complete_multipart_upload(self, key: str, upload_id: str, etags: list[str]) -> None:
+        body = "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+            for number, etag in enumerate(etags, start=1)
+        )
+        response = await self._request(
+            "POST",
+            key,
+            query={"uploadId": upload_id},
+            content=f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>".encode(),
+        )
+        self._raise_for_status(response, key)
+        # S3 can report a failed completion in a 200 response body
+        if b"<Error>" in response.content:
+            raise OSError(f"S3 multipart upload of {key} failed: {response.text[:200]}")
+
+    async def get(self, key: str) -> bytes:
+        response = await self._request("GET", key)
+        self._raise_for_status(response, key)
+        return response.content
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        response = await self._request("GET", key, headers={"range": f"bytes={start}-{end}"})
+        self._raise_for_status(response, key)
+        return response.content
+
+    async def stream(self, key: str, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["range"] = f"bytes={start}-{'' if end is None else end}"
+        response = await self._request("GET", key, headers=headers, stream=True)
+        try:
+            if response.is_error:
+                await response.aread()
+                self._raise_for_status(response, key)
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def size(self, key: str) -> int | None:
+        response = await self._request("HEAD", key)
+        if response.status_code == 404:
+            return None
+        self._raise_for_status(response, key)
+        return int(response.headers["content-length"])
+
+    async def delete(self, key: str) -> None:
+        response = await self._request("DELETE", key)
+        if response.status_code != 404:
+            self._raise_for_status(response, key)
+
+    async def presign(
+        self,
+        key: str,
+        expires_seconds: int,
+        filename: str | None = None,
+        content_type: str | None = None,
+    ) -> str:
+        path = self._path(key)
+        timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{timestamp[:8]}/{self.region}/s3/aws4_request"
+        query = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key_id}/{scope}",
+            "X-Amz-Date": timestamp,
+            "X-Amz-Expires": str(expires_seconds),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if filename:
+            query["response-content-disposition"] = f'attachment; filename="{filename}"'
+        if content_type:
+            query["response-content-type"] = content_type
+
+        _, _, signature = self._signature(
+            "GET", path, query, {"host": self._host}, "UNSIGNED-PAYLOAD", timestamp
+        )
+        query["X-Amz-Signature"] = signature
+        query_string = "&".join(f"{_quote(name)}={_quote(value)}" for name, value in query.items())
+        return f"{self.endpoint_url.split('://')[0]}://{self._host}{_quote(path, safe='/-_.~')}?{query_string}"
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+# Singleton instance
+_storage_backend: StorageBackend | None = None
+
+
+def get_storage_backend() -> StorageBackend:
+    """Get or create the configured storage backend."""
+    global _storage_backend
+    if _storage_backend is None:
+        if settings.storage_backend == "s3":
+            _storage_backend = S3StorageBackend()
+        elif settings.storage_backend == "local":
+            _storage_backend = LocalStorageBackend()
+        else:
+            raise ValueError(f"Unknown storage backend: {settings.storage_backend!r}")
+    return _storage_backend
+
+
+async def close_storage_backend() -> None:
+    """Close the storage backend; it is recreated on next use."""
+    global _storage_backend
+    if _storage_backend is not None:
+        await _storage_backend.close()
+        _storage_backend = None
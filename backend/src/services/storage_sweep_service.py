@@ -0,0 +1,551 @@
+"""Deletion of expired images, unreferenced blobs and orphan files."""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.config import get_settings
+from src.core.database import async_session_maker
+from src.core.executors import get_io_executor
+from src.core.metrics import (
+    images_expired_total,
+    storage_orphans_total,
+    storage_reclaimed_bytes_total,
+)
+from src.models.blob import Blob
+from src.models.image import GeneratedImage
+from src.models.job import TERMINAL_STATUSES, Job
+from src.models.job_archive import ArchivedJob
+from src.models.uploaded_image import UploadedImage
+from src.models.uploaded_mask import UploadedMask
+from src.models.user import User
+from src.schemas.admin import StorageSweepReport
+from src.services.blob_service import BlobService
+from src.services.blob_store import BlobStore, get_blob_store
+from src.services.storage import LocalStorageBackend
+from src.services.user_stats_service import UserStatsService
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_MASK_PATTERN = re.compile(r"^mask_(.+)\.png$")
+_LEGACY_UPLOAD_PATTERN = re.compile(r"^([0-9a-f-]{36})\.png$")
+BLOB_SHARDS = [f"{index:02x}" for index in range(256)]
+
+
+# Blocking helpers, run on the I/O executor
+
+
+def _unlink(path: Path) -> int:
+    """Delete a file, returning its size, or 0 if it did not exist."""
+    try:
+        size = path.stat().st_size
+        path.unlink()
+        return size
+    except FileNotFoundError:
+        return 0
+
+
+def _scan_files(directory: Path, depth: int = 0) -> list[tuple[Path, int, float]]:
+    """
+    List regular files as (path, size, mtime) with ``os.scandir``.
+
+    With ``depth`` > 0, files in subdirectories down to that depth are listed
+    too.
+    """
+    files = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append((Path(entry.path), stat.st_size, stat.st_mtime))
+                    elif depth > 0 and entry.is_dir(follow_symlinks=False):
+                        files.extend(_scan_files(Path(entry.path), depth - 1))
+                except FileNotFoundError:
+                    continue
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return files
+
+
+def _list_subdirectories(directory: Path) -> list[str]:
+    """Names of the subdirectories of a directory, sorted."""
+    try:
+        with os.scandir(directory) as entries:
+            return sorted(entry.name for entry in entries if entry.is_dir(follow_symlinks=False))
+    except FileNotFoundError:
+        return []
+
+
+def _absolute(path: str | Path) -> str:
+    """Absolute form of a path, for comparing paths stored relative to the working directory."""
+    return os.path.abspath(path)
+
+
+class StorageSweepService:
+    """
+    Keep image storage from growing without bound.
+
+    Each sweep runs three steps:
+
+    1. Expired generated images are deleted in batches of
+       ``storage_sweep_batch_size``, oldest ``expires_at`` first, releasing
+       their blob references and user image counts in the same transaction.
+       Uploaded masks older than ``storage_orphan_grace_seconds`` are
+       deleted the same way; jobs created from them hold their own
+       references. Uploaded images older than ``upload_retention_hours``
+       are deleted too, unless an unfinished job still uses them as its
+       source.
+    2. Blobs whose reference count has been zero for longer than
+       ``storage_orphan_grace_seconds`` are deleted from the database and
+       the storage backend.
+    3. A reconciliation pass compares files on disk with database rows, a
+       few directories per sweep (``storage_reconcile_dirs_per_sweep``) so
+       a large tree is covered over several sweeps. Files no row refers to
+       are deleted once older than the grace period; rows whose file is
+       missing are logged and counted, since they cannot be repaired.
+
+    Reconciliation covers local blob shards (with the local storage
+    backend), pre-blob generated images under ``generated_dir`` and
+    inpainting mask snapshots under ``upload_dir``.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_maker,
+        blob_store: BlobStore | None = None,
+    ):
+        self.session_factory = session_factory
+        self.blob_store = blob_store or get_blob_store()
+        self._sweep_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        # Directories left to reconcile in the current pass, as (kind, path)
+        self._pending_dirs: list[tuple[str, Path]] = []
+
+    @property
+    def grace_seconds(self) -> float:
+        return settings.storage_orphan_grace_seconds
+
+    async def _unlink_all(self, paths: list[Path]) -> int:
+        """Delete files concurrently on the I/O executor; returns the bytes freed."""
+        io_executor = get_io_executor()
+        sizes = await asyncio.gather(*(io_executor.run(_unlink, path) for path in paths))
+        return sum(sizes)
+
+    # Expired images
+
+    async def sweep_expired_batch(self, now: datetime, limit: int | None = None) -> tuple[int, int]:
+        """
+        Delete up to ``limit`` images that expired before ``now``.
+
+        Returns:
+            Number of images deleted and bytes of local files freed
+        """
+        limit = limit or settings.storage_sweep_batch_size
+        async with self.session_factory() as session:
+            expired_ids = (
+                select(GeneratedImage.id)
+                .where(GeneratedImage.expires_at <= now)
+                .order_by(GeneratedImage.expires_at)
+                .limit(limit)
+            )
+            # RETURNING reports only the rows this transaction deleted, so a
+            # concurrent sweeper cannot release the same references twice
+            result = await session.execute(
+                delete(GeneratedImage)
+                .where(GeneratedImage.id.in_(expired_ids.scalar_subquery()))
+                .returning(
+                    GeneratedImage.user_id,
+                    GeneratedImage.blob_hash,
+                    GeneratedImage.file_path,
+                    GeneratedImage.thumbnail_path,
+                )
+            )
+            rows = result.all()
+            if not rows:
+                return 0, 0
+
+            blob_service = BlobService(session, self.blob_store)
+            for digest, count in Counter(row.blob_hash for row in rows if row.blob_hash).items():
+                await blob_service.release(digest, count)
+            user_stats = UserStatsService(session)
+            for user_id, count in Counter(row.user_id for row in rows).items():
+                await user_stats.increment(user_id, images=-count)
+            await session.commit()
+
+        # Blob payloads are freed by blob collection; only pre-blob files go here
+        paths = [Path(row.file_path) for row in rows if not row.blob_hash]
+        paths += [Path(row.thumbnail_path) for row in rows if row.thumbnail_path]
+        freed = await self._unlink_all(paths)
+
+        images_expired_total.inc(len(rows))
+        storage_reclaimed_bytes_total.inc(freed, source="expired")
+        return len(rows), freed
+
+    async def expire_masks_batch(self, cutoff: datetime, limit: int | None = None) -> int:
+        """
+        Delete up to ``limit`` uploaded masks created before ``cutoff``.
+
+        Returns:
+            Number of masks deleted
+        """
+        limit = limit or settings.storage_sweep_batch_size
+        async with self.session_factory() as session:
+            expired_ids = (
+                select(UploadedMask.id)
+                .where(UploadedMask.created_at < cutoff)
+                .order_by(UploadedMask.created_at)
+                .limit(limit)
+            )
+            result = await session.execute(
+                delete(UploadedMask)
+                .where(UploadedMask.id.in_(expired_ids.scalar_subquery()))
+                .returning(UploadedMask.blob_hash)
+            )
+            digests = result.scalars().all()
+            if not digests:
+                return 0
+
+            blob_service = BlobService(session, self.blob_store)
+            for digest, count in Counter(digests).items():
+                await blob_service.release(digest, count)
+            await session.commit()
+        return len(digests)
+
+    async def expire_uploads_batch(self, cutoff: datetime, limit: int | None = None) -> int:
+        """
+        Delete up to ``limit`` uploaded images created before ``cutoff``.
+
+        Uploads that a pending or processing job uses as its source are kept.
+
+        Returns:
+            Number of uploads deleted
+        """
+        limit = limit or settings.storage_sweep_batch_size
+        finished = [job_status.value for job_status in TERMINAL_STATUSES]
+        async with self.session_factory() as session:
+            expired_ids = (
+                select(UploadedImage.id)
+                .where(
+                    UploadedImage.created_at < cutoff,
+                    ~exists().where(
+                        Job.source_image_id == UploadedImage.id,
+                        Job.status.not_in(finished),
+                    ),
+                )
+                .order_by(UploadedImage.created_at)
+                .limit(limit)
+            )
+            result = await session.execute(
+                delete(UploadedImage)
+                .where(UploadedImage.id.in_(expired_ids.scalar_subquery()))
+                .returning(UploadedImage.blob_hash)
+            )
+            digests = result.scalars().all()
+            if not digests:
+                return 0
+
+            blob_service = BlobService(session, self.blob_store)
+            for digest, count in Counter(digests).items():
+                await blob_service.release(digest, count)
+            await session.commit()
+        return len(digests)
+
+    # Unreferenced blobs
+
+    async def collect_blobs_batch(self, cutoff: datetime, limit: int | None = None) -> tuple[int, int]:
+        """
+        Delete up to ``limit`` blobs unreferenced since before ``cutoff``.
+
+        Returns:
+            Number of blobs deleted and their bytes
+        """
+        limit = limit or settings.storage_sweep_batch_size
+        async with self.session_factory() as session:
+            unreferenced = (
+                select(Blob.hash)
+                .where(Blob.ref_count == 0, Blob.updated_at < cutoff)
+                .limit(limit)
+            )
+            # Re-check the count so a blob referenced again meanwhile is kept
+            result = await session.execute(
+                delete(Blob)
+                .where(Blob.hash.in_(unreferenced.scalar_subquery()), Blob.ref_count == 0)
+                .returning(Blob.hash, Blob.size)
+            )
+            rows = result.all()
+            # Delete the payloads before committing: until then the deleted
+            # rows stay locked, so a concurrent add_ref waits, recreates the
+            # row and finds the payload gone instead of missing the deletion
+            outcomes = await asyncio.gather(
+                *(self.blob_store.delete(row.hash) for row in rows),
+                return_exceptions=True,
+            )
+            await session.commit()
+
+        for row, outcome in zip(rows, outcomes, strict=True):
+            # The file is left to reconciliation
+            if isinstance(outcome, Exception):
+                logger.warning(f"Could not delete blob {row.hash}: {outcome}")
+        freed = sum(row.size for row in rows)
+        storage_reclaimed_bytes_total.inc(freed, source="blob")
+        return len(rows), freed
+
+    # Reconciliation
+
+    async def _queue_dirs(self) -> None:
+        """Start a new reconciliation pass over every directory."""
+        io_executor = get_io_executor()
+        pending: list[tuple[str, Path]] = []
+        backend = self.blob_store.backend
+        if isinstance(backend, LocalStorageBackend):
+            pending += [("blob", backend.root / shard) for shard in BLOB_SHARDS]
+        generated_dir = Path(settings.generated_dir)
+        for name in await io_executor.run(_list_subdirectories, generated_dir):
+            pending.append(("generated", generated_dir / name))
+        upload_dir = Path(settings.upload_dir)
+        for name in await io_executor.run(_list_subdirectories, upload_dir):
+            pending.append(("upload", upload_dir / name))
+        # Popped from the end, so reverse to visit in order
+        self._pending_dirs = pending[::-1]
+
+    def _is_old(self, mtime: float) -> bool:
+        return time.time() - mtime > self.grace_seconds
+
+    async def _reconcile_blob_shard(self, session: AsyncSession, shard: Path) -> tuple[list[Path], int]:
+        """Compare a blob shard directory with the blobs table."""
+        files = await get_io_executor().run(_scan_files, shard, 1)
+        prefix = shard.name
+        # Range on the primary key instead of LIKE, so the index is used everywhere
+        result = await session.execute(
+            select(Blob.hash).where(Blob.hash >= prefix, Blob.hash < prefix + "g")
+        )
+        known = set(result.scalars())
+
+        on_disk = set()
+        orphans = []
+        for path, _, mtime in files:
+            name = path.name
+            if _DIGEST_PATTERN.match(name):
+                on_disk.add(name)
+                if name not in known and self._is_old(mtime):
+                    orphans.append(path)
+            elif name.startswith(".tmp-") and self._is_old(mtime):
+                # Left behind by an interrupted write
+                orphans.append(path)
+
+        missing = known - on_disk
+        for digest in missing:
+            logger.warning(f"Blob {digest} has a row but no file")
+        return orphans, len(missing)
+
+    async def _reconcile_generated_dir(self, session: AsyncSession, directory: Path) -> tuple[list[Path], int]:
+        """Compare a user's legacy generated image directory with their images."""
+        files = await get_io_executor().run(_scan_files, directory)
+        result = await session.execute(
+            select(GeneratedImage.blob_hash, GeneratedImage.file_path, GeneratedImage.thumbnail_path).where(
+                GeneratedImage.user_id == directory.name
+            )
+        )
+        referenced = set()
+        expected = set()
+        for blob_hash, file_path, thumbnail_path in result.all():
+            if not blob_hash:
+                expected.add(_absolute(file_path))
+            if thumbnail_path:
+                referenced.add(_absolute(thumbnail_path))
+        referenced |= expected
+
+        on_disk = {_absolute(path) for path, _, _ in files}
+        orphans = [
+            path
+            for path, _, mtime in files
+            if _absolute(path) not in referenced and self._is_old(mtime)
+        ]
+        missing = expected - on_disk
+        for path in missing:
+            logger.warning(f"Generated image file is missing: {path}")
+        return orphans, len(missing)
+
+    async def _reconcile_upload_dir(self, session: AsyncSession, directory: Path) -> list[Path]:
+        """
+        Find mask snapshots of jobs that no longer exist, uploads from before
+        the blob store that were imported into it, and files of deleted users.
+        """
+        files = await get_io_executor().run(_scan_files, directory)
+        old_files = [path for path, _, mtime in files if self._is_old(mtime)]
+        if not old_files:
+            return []
+        if await session.get(User, directory.name) is None:
+            return old_files
+
+        orphans = []
+        job_ids = {
+            match.group(1): path
+            for path in old_files
+            if (match := _MASK_PATTERN.match(path.name))
+        }
+        if job_ids:
+            existing = set()
+            for model in (Job, ArchivedJob):
+                result = await session.execute(select(model.id).where(model.id.in_(list(job_ids))))
+                existing.update(result.scalars())
+            orphans += [path for job_id, path in job_ids.items() if job_id not in existing]
+
+        # Migration 009 imports these into the blob store and leaves the files
+        image_ids = {
+            match.group(1): path
+            for path in old_files
+            if (match := _LEGACY_UPLOAD_PATTERN.match(path.name))
+        }
+        if image_ids:
+            result = await session.execute(
+                select(UploadedImage.id).where(UploadedImage.id.in_(list(image_ids)))
+            )
+            orphans += [image_ids[image_id] for image_id in result.scalars()]
+        return orphans
+
+    async def reconcile_step(self, max_dirs: int | None = None) -> tuple[int, int, int, int]:
+        """
+        Reconcile the next ``max_dirs`` directories of the current pass.
+
+        Returns:
+            Directories checked, orphan files deleted, bytes freed and rows
+            whose file is missing
+        """
+        max_dirs = max_dirs if max_dirs is not None else settings.storage_reconcile_dirs_per_sweep
+        if max_dirs <= 0:
+            return 0, 0, 0, 0
+        if not self._pending_dirs:
+            await self._queue_dirs()
+
+        checked = 0
+        orphans: list[Path] = []
+        missing = 0
+        async with self.session_factory() as session:
+            while self._pending_dirs and checked < max_dirs:
+                kind, directory = self._pending_dirs.pop()
+                checked += 1
+                if kind == "blob":
+                    found, missing_rows = await self._reconcile_blob_shard(session, directory)
+                elif kind == "generated":
+                    found, missing_rows = await self._reconcile_generated_dir(session, directory)
+                else:
+                    found, missing_rows = await self._reconcile_upload_dir(session, directory), 0
+                orphans += found
+                missing += missing_rows
+
+        freed = await self._unlink_all(orphans)
+        if orphans:
+            storage_orphans_total.inc(len(orphans), kind="file")
+            storage_reclaimed_bytes_total.inc(freed, source="orphan")
+        if missing:
+            storage_orphans_total.inc(missing, kind="row")
+        return checked, len(orphans), freed, missing
+
+    # Scheduling
+
+    async def sweep(self) -> StorageSweepReport:
+        """Run every step once; concurrent calls run one after another."""
+        async with self._lock:
+            report = StorageSweepReport()
+            batch_size = settings.storage_sweep_batch_size
+
+            now = datetime.now(UTC)
+            while True:
+                deleted, freed = await self.sweep_expired_batch(now)
+                report.expired_images += deleted
+                report.reclaimed_bytes += freed
+                if deleted < batch_size:
+                    break
+                # Let request handlers use the database between batches
+                await asyncio.sleep(0)
+
+            cutoff = datetime.now(UTC) - timedelta(seconds=self.grace_seconds)
+            while True:
+                deleted = await self.expire_masks_batch(cutoff)
+                report.expired_masks += deleted
+                if deleted < batch_size:
+                    break
+                await asyncio.sleep(0)
+
+            if settings.upload_retention_hours > 0:
+                upload_cutoff = now - timedelta(hours=settings.upload_retention_hours)
+                while True:
+                    deleted = await self.expire_uploads_batch(upload_cutoff)
+                    report.expired_uploads += deleted
+                    if deleted < batch_size:
+                        break
+                    await asyncio.sleep(0)
+
+            while True:
+                deleted, freed = await self.collect_blobs_batch(cutoff)
+                report.deleted_blobs += deleted
+                report.reclaimed_bytes += freed
+                if deleted < batch_size:
+                    break
+                await asyncio.sleep(0)
+
+            checked, orphans, freed, missing = await self.reconcile_step()
+            report.reconciled_dirs = checked
+            report.orphan_files = orphans
+            report.missing_files = missing
+            report.reclaimed_bytes += freed
+
+        if report.expired_images or report.expired_masks or report.expired_uploads or report.deleted_blobs or report.orphan_files or report.missing_files:
+            logger.info(
+                f"Storage sweep: {report.expired_images} expired images, "
+                f"{report.expired_masks} expired masks, "
+                f"{report.expired_uploads} expired uploads, "
+                f"{report.deleted_blobs} blobs, {report.orphan_files} orphan files deleted "
+                f"({report.reclaimed_bytes} bytes reclaimed); "
+                f"{report.missing_files} rows with missing files"
+            )
+        return report
+
+    async def _sweep_periodically(self) -> None:
+        """Background loop that sweeps storage."""
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Failed to sweep storage: {e}")
+            await asyncio.sleep(settings.storage_sweep_interval_seconds)
+
+    def start(self) -> None:
+        """Start the sweep loop."""
+        if self._sweep_task is None and settings.storage_sweep_interval_seconds > 0:
+            self._sweep_task = asyncio.create_task(self._sweep_periodically())
+
+    async def stop(self) -> None:
+        """Stop the sweep loop."""
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+
+
+# Singleton instance
+_storage_sweep_service: StorageSweepService | None = None
+
+
+def get_storage_sweep_service() -> StorageSweepService:
+    """Get or create storage sweep service instance."""
+    global _storage_sweep_service
+    if _storage_sweep_service is None:
+        _storage_sweep_service = StorageSweepService()
+    return _storage_sweep_service
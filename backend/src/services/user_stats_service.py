@@ -0,0 +1,63 @@
+"""Per-user counter maintenance."""
+
+from datetime import UTC, datetime
+
+from sqlalchemy import ScalarSelect, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import dialect_insert
+from src.models.user_stats import UserStats
+
+
+class UserStatsService:
+    """
+    Maintain per-user job and image counters.
+
+    Counters are incremented inside the same transaction as the rows they
+    count, so list endpoints can report totals without a count(*) scan.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def increment(self, user_id: str, jobs: int = 0, images: int = 0) -> None:
+        """Add to a user's counters, creating the row on first use."""
+        if not jobs and not images:
+            return
+
+        now = datetime.now(UTC)
+        insert = dialect_insert(self.db)
+        statement = insert(UserStats).values(
+            user_id=user_id,
+            job_count=max(jobs, 0),
+            image_count=max(images, 0),
+            updated_at=now,
+        )
+        await self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[UserStats.user_id],
+                set_={
+                    "job_count": UserStats.job_count + jobs,
+                    "image_count": UserStats.image_count + images,
+                    "updated_at": now,
+                },
+            )
+        )
+
+    @staticmethod
+    def job_count(user_id: str) -> ScalarSelect[int]:
+        """Scalar subquery for a user's job total, to embed in a list query."""
+        return (
+            select(func.coalesce(func.max(UserStats.job_count), 0))
+            .where(UserStats.user_id == user_id)
+            .scalar_subquery()
+        )
+
+    @staticmethod
+    def image_count(user_id: str) -> ScalarSelect[int]:
+        """Scalar subquery for a user's image total, to embed in a list query."""
+        return (
+            select(func.coalesce(func.max(UserStats.image_count), 0))
+            .where(UserStats.user_id == user_id)
+            .scalar_subquery()
+        )
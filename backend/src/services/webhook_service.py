@@ -0,0 +1,361 @@
+"""Webhook delivery for job completion callbacks."""
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import random
+import socket
+import time
+from datetime import UTC, datetime
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.config import DEFAULT_WEBHOOK_SECRET, get_settings
+from src.core.database import async_session_maker
+from src.models.image import GeneratedImage
+from src.models.webhook_delivery import WebhookDelivery, WebhookDeliveryStatus
+from src.schemas.job import JobResponse
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Responses that are worth retrying; other 4xx responses are permanent failures
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+
+SIGNATURE_HEADER = "X-ImagePlayground-Signature"
+TIMESTAMP_HEADER = "X-ImagePlayground-Timestamp"
+EVENT_HEADER = "X-ImagePlayground-Event"
+DELIVERY_HEADER = "X-ImagePlayground-Delivery"
+
+
+class UnsafeCallbackError(ValueError):
+    """Raised when a callback URL's host resolves to an address webhooks may not reach."""
+
+
+def _is_public_address(address: str) -> bool:
+    """Whether an IP address is globally routable, excluding multicast."""
+    ip = ipaddress.ip_address(address)
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def resolve_callback_url(url: str) -> str | None:
+    """
+    Resolve a callback URL's host to the address to deliver to.
+
+    Hosts listed in ``webhook_allowed_hosts`` are trusted and returned as
+    None, to be resolved by the HTTP client. Any other host must resolve to
+    public addresses only, so callbacks cannot reach loopback, private,
+    link-local or reserved networks such as cloud metadata endpoints.
+
+    Raises:
+        UnsafeCallbackError: If an address of the host is not public
+        OSError: If the host does not resolve
+    """
+    parsed = httpx.URL(url)
+    host = parsed.host.lower()
+    if host in {allowed.lower() for allowed in settings.webhook_allowed_hosts}:
+        return None
+
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    addresses = [info[4][0] for info in infos]
+    for address in addresses:
+        if not _is_public_address(address):
+            raise UnsafeCallbackError(
+                f"Callback host {host} resolves to non-public address {address}"
+            )
+    return addresses[0]
+
+
+def sign_payload(body: bytes, timestamp: str, secret: str | None = None) -> str:
+    """
+    Compute the signature header value for a webhook body.
+
+    Receivers verify it by computing HMAC-SHA256 over ``{timestamp}.{body}``
+    with the shared secret and comparing against the ``sha256=`` hex digest.
+    """
+    key = (secret or settings.webhook_secret).encode()
+    digest = hmac.new(key, timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+class WebhookService:
+    """
+    Deliver signed job callbacks.
+
+    Every callback is first recorded in ``webhook_deliveries`` and then sent
+    in the background through one shared HTTP connection pool, with at most
+    ``webhook_max_concurrency`` requests in flight. Failed attempts are
+    retried with exponential backoff and jitter; deliveries still pending at
+    shutdown are resumed on the next start.
+
+    Callback hosts are checked when a job is submitted and again on every
+    attempt, and requests go to the checked address, so a host cannot be
+    re-pointed at an internal address in between.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = async_session_maker,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.session_factory = session_factory
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._semaphore = asyncio.Semaphore(settings.webhook_max_concurrency)
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=settings.webhook_timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=settings.webhook_max_concurrency,
+                    max_keepalive_connections=settings.webhook_max_concurrency,
+                ),
+                follow_redirects=False,
+            )
+        return self._client
+
+    async def check_callback_url(self, url: str) -> None:
+        """
+        Check that callbacks to a URL may be delivered.
+
+        Raises:
+            UnsafeCallbackError: If the host does not resolve or resolves to
+                a non-public address, or if ``webhook_secret`` is the
+                development default and debug is off
+        """
+        if settings.webhook_secret == DEFAULT_WEBHOOK_SECRET and not settings.debug:
+            raise UnsafeCallbackError("Callbacks are disabled until WEBHOOK_SECRET is set")
+
+        try:
+            await resolve_callback_url(url)
+        except OSError:
+            raise UnsafeCallbackError(f"Callback host {httpx.URL(url).host} does not resolve") from None
+
+    def build_payload(self, job: JobResponse, image: GeneratedImage | None) -> dict:
+        """Build the callback body for a finished job."""
+        return {
+            "event": f"job.{job.status.value}",
+            "job": job.model_dump(mode="json"),
+            "image": (
+                {
+                    "id": image.id,
+                    "width": image.width,
+                    "height": image.height,
+                    "file_size": image.file_size,
+                    "mime_type": image.mime_type,
+                    "download_path": f"/api/images/{image.id}/download",
+                }
+                if image
+                else None
+            ),
+        }
+
+    async def notify(
+        self,
+        callback_url: str,
+        job: JobResponse,
+        image: GeneratedImage | None = None,
+    ) -> str:
+        """
+        Record a callback for a finished job and schedule its delivery.
+
+        Returns:
+            The delivery ID
+        """
+        payload = self.build_payload(job, image)
+        delivery = WebhookDelivery(
+            job_id=job.id,
+            url=callback_url,
+            event=payload["event"],
+            payload=json.dumps(payload, separators=(",", ":")),
+        )
+
+        async with self.session_factory() as session:
+            session.add(delivery)
+            await session.commit()
+
+        self._schedule(delivery.id)
+        return delivery.id
+
+    def _schedule(self, delivery_id: str) -> None:
+        """Run a delivery in the background, keeping a reference to the task."""
+        task = asyncio.create_task(self.deliver(delivery_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def deliver(self, delivery_id: str) -> bool:
+        """
+        Send a recorded delivery, retrying until it succeeds or attempts run out.
+
+        Returns:
+            True if the receiver accepted the callback
+        """
+        async with self.session_factory() as session:
+            delivery = await session.get(WebhookDelivery, delivery_id)
+        if not delivery or delivery.status != WebhookDeliveryStatus.PENDING.value:
+            return False
+
+        body = delivery.payload.encode()
+        attempts = delivery.attempts
+
+        while attempts < settings.webhook_max_attempts:
+            if attempts:
+                delay = settings.webhook_retry_base_seconds * 2 ** (attempts - 1)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+            attempts += 1
+            blocked = False
+            try:
+                status_code, error = await self._send(delivery, body)
+            except UnsafeCallbackError as e:
+                status_code, error, blocked = None, str(e), True
+            delivered = status_code is not None and 200 <= status_code < 300
+            retryable = not delivered and not blocked and (
+                status_code is None
+                or status_code >= 500
+                or status_code in RETRYABLE_STATUS_CODES
+            )
+
+            if delivered:
+                new_status = WebhookDeliveryStatus.DELIVERED
+            elif retryable and attempts < settings.webhook_max_attempts:
+                new_status = WebhookDeliveryStatus.PENDING
+            else:
+                new_status = WebhookDeliveryStatus.FAILED
+
+            await self._record_attempt(delivery_id, attempts, new_status, status_code, error)
+
+            if new_status != WebhookDeliveryStatus.PENDING:
+                log = logger.info if delivered else logger.warning
+                log(f"Webhook {delivery_id} to {delivery.url}: {new_status.value} after {attempts} attempts")
+                return delivered
+
+        return False
+
+    async def _send(self, delivery: WebhookDelivery, body: bytes) -> tuple[int | None, str | None]:
+        """
+        Make one delivery attempt; returns (status code, error message).
+
+        Raises:
+            UnsafeCallbackError: If the host now resolves to a non-public address
+        """
+        try:
+            address = await resolve_callback_url(delivery.url)
+        except OSError as e:
+            return None, f"{type(e).__name__}: {e}"
+
+        url = httpx.URL(delivery.url)
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": f"{settings.app_name}-Webhooks/{settings.app_version}",
+            SIGNATURE_HEADER: sign_payload(body, timestamp),
+            TIMESTAMP_HEADER: timestamp,
+            EVENT_HEADER: delivery.event,
+            DELIVERY_HEADER: delivery.id,
+        }
+        extensions = {}
+        if address is not None:
+            # Connect to the checked address; Host and TLS still use the hostname
+            headers["Host"] = url.netloc.decode("ascii")
+            extensions["sni_hostname"] = url.host
+            url = url.copy_with(host=address)
+
+        async with self._semaphore:
+            try:
+                response = await self.client.post(
+                    url, content=body, headers=headers, extensions=extensions
+                )
+            except httpx.HTTPError as e:
+                return None, f"{type(e).__name__}: {e}"
+
+        if response.is_success:
+            return response.status_code, None
+        return response.status_code, f"HTTP {response.status_code}"
+
+    async def _record_attempt(
+        self,
+        delivery_id: str,
+        attempts: int,
+        status: WebhookDeliveryStatus,
+        status_code: int | None,
+        error: str | None,
+    ) -> None:
+        """Persist the outcome of an attempt."""
+        async with self.session_factory() as session:
+            delivery = await session.get(WebhookDelivery, delivery_id)
+            if not delivery:
+                return
+            delivery.attempts = attempts
+            delivery.status = status.value
+            delivery.last_status_code = status_code
+            delivery.last_error = error
+            if status == WebhookDeliveryStatus.DELIVERED:
+                delivery.delivered_at = datetime.now(UTC)
+            await session.commit()
+
+    async def get_deliveries(self, session: AsyncSession, job_id: str) -> list[WebhookDelivery]:
+        """Get the delivery log of a job, oldest first."""
+        result = await session.execute(
+            select(WebhookDelivery)
+            .where(WebhookDelivery.job_id == job_id)
+            .order_by(WebhookDelivery.created_at)
+        )
+        return list(result.scalars().all())
+
+    async def start(self) -> None:
+        """
+        Resume deliveries left pending by a previous run.
+
+        Callbacks signed with the development default secret could be forged
+        by anyone, so new callback URLs are rejected until it is changed.
+        """
+        if settings.webhook_secret == DEFAULT_WEBHOOK_SECRET and not settings.debug:
+            logger.warning("WEBHOOK_SECRET is the built-in default; jobs with a callback_url will be rejected")
+
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(WebhookDelivery.id).where(
+                    WebhookDelivery.status == WebhookDeliveryStatus.PENDING.value
+                )
+            )
+            pending = list(result.scalars().all())
+
+        for delivery_id in pending:
+            self._schedule(delivery_id)
+        if pending:
+            logger.info(f"Resuming {len(pending)} pending webhook deliveries")
+
+    async def stop(self) -> None:
+        """Cancel in-flight deliveries and close the connection pool."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Singleton instance
+_webhook_service: WebhookService | None = None
+
+
+def get_webhook_service() -> WebhookService:
+    """Get or create webhook service instance."""
+    global _webhook_service
+    if _webhook_service is None:
+        _webhook_service = WebhookService()
+    return _webhook_service
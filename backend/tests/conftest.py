@@ -46,6 +46,25 @@ async def async_session(async_engine) -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+@pytest_asyncio.fixture(scope="function")
+async def session_maker(async_engine) -> AsyncGenerator[async_sessionmaker[AsyncSession], None]:
+    """Session factory on the test database, also used by the app's requests."""
+    from src.core.database import Base, get_db
+    from src.main import app
+
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+        async with maker() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield maker
+    app.dependency_overrides.pop(get_db, None)
+
+
 @pytest_asyncio.fixture(scope="function")
 async def client() -> AsyncGenerator[AsyncClient, None]:
     """Create async HTTP client for testing API endpoints."""
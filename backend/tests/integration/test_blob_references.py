@@ -0,0 +1,114 @@
+"""Blob references released by job archival and storage sweeps."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.api.deps import DEFAULT_USER_ID
+from src.models import Job
+from src.models.blob import Blob
+from src.models.uploaded_image import UploadedImage
+from src.services.blob_service import BlobService
+from src.services.blob_store import BlobStore
+from src.services.job_archive_service import JobArchiveService
+from src.services.storage import LocalStorageBackend
+from src.services.storage_sweep_service import StorageSweepService
+
+LONG_AGO = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+@pytest.fixture
+def blob_store(tmp_path) -> BlobStore:
+    return BlobStore(LocalStorageBackend(tmp_path))
+
+
+async def ref_count(maker: async_sessionmaker[AsyncSession], digest: str) -> int | None:
+    async with maker() as session:
+        return await session.scalar(select(Blob.ref_count).where(Blob.hash == digest))
+
+
+async def collect_blobs(
+    maker: async_sessionmaker[AsyncSession], blob_store: BlobStore
+) -> tuple[int, int]:
+    """Collect every unreferenced blob, ignoring the grace period."""
+    sweeper = StorageSweepService(maker, blob_store)
+    return await sweeper.collect_blobs_batch(datetime.now(UTC) + timedelta(minutes=1))
+
+
+async def test_archived_job_mask_is_collected(
+    session_maker: async_sessionmaker[AsyncSession], blob_store: BlobStore
+):
+    """Archiving the last job using a mask lets the mask blob be swept."""
+    mask = b"mask shared by two jobs"
+    async with session_maker() as session:
+        digest = await BlobService(session, blob_store).store(mask, refs=2)
+        for index, created_at in enumerate([LONG_AGO, datetime.now(UTC)]):
+            session.add(
+                Job(
+                    id=f"job-{index}",
+                    user_id=DEFAULT_USER_ID,
+                    type="inpaint",
+                    status="completed",
+                    prompt="a red door",
+                    mask_hash=digest,
+                    created_at=created_at,
+                )
+            )
+        await session.commit()
+
+    archiver = JobArchiveService(session_maker)
+    assert await archiver.archive_batch(LONG_AGO + timedelta(days=1)) == 1
+    assert await ref_count(session_maker, digest) == 1
+    assert await collect_blobs(session_maker, blob_store) == (0, 0)
+
+    assert await archiver.archive_batch(datetime.now(UTC) + timedelta(minutes=1)) == 1
+    assert await ref_count(session_maker, digest) == 0
+    assert await collect_blobs(session_maker, blob_store) == (1, len(mask))
+    assert not await blob_store.exists(digest)
+
+
+async def test_expired_uploads_release_their_blobs(
+    session_maker: async_sessionmaker[AsyncSession], blob_store: BlobStore
+):
+    """Old uploads are deleted unless an unfinished job still uses them."""
+    async with session_maker() as session:
+        blob_service = BlobService(session, blob_store)
+        for name, job_status in [
+            ("unused", None),
+            ("finished", "completed"),
+            ("queued", "pending"),
+        ]:
+            data = name.encode()
+            digest = await blob_service.store(data, content_type="image/png")
+            session.add(
+                UploadedImage(
+                    id=name,
+                    user_id=DEFAULT_USER_ID,
+                    blob_hash=digest,
+                    width=64,
+                    height=64,
+                    file_size=len(data),
+                    created_at=LONG_AGO,
+                )
+            )
+            if job_status:
+                session.add(
+                    Job(
+                        user_id=DEFAULT_USER_ID,
+                        type="img2img",
+                        status=job_status,
+                        prompt="a blue door",
+                        source_image_id=name,
+                    )
+                )
+        await session.commit()
+
+    sweeper = StorageSweepService(session_maker, blob_store)
+    assert await sweeper.expire_uploads_batch(datetime.now(UTC)) == 2
+
+    async with session_maker() as session:
+        kept = await session.scalars(select(UploadedImage.id))
+        assert list(kept.all()) == ["queued"]
+    assert await collect_blobs(session_maker, blob_store) == (2, len(b"unused") + len(b"finished"))
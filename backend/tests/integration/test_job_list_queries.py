@@ -0,0 +1,105 @@
+"""Statement counts of the job list endpoint."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.api.deps import DEFAULT_USER_ID
+from src.models import ArchivedJob, GeneratedImage, Job, UserStats
+
+# One query for the page keys and total, one per table the page's rows come from
+LIST_STATEMENTS = 3
+
+
+async def seed_jobs(maker: async_sessionmaker[AsyncSession], count: int, archived: int) -> None:
+    """Add finished jobs with result images, the oldest ``archived`` of them archived."""
+    start = datetime(2026, 1, 1, tzinfo=UTC)
+    async with maker() as session:
+        for index in range(count):
+            values = {
+                "id": f"job-{index:04d}",
+                "user_id": DEFAULT_USER_ID,
+                "type": "text2img",
+                "status": "completed",
+                "prompt": f"prompt {index}",
+                "created_at": start + timedelta(minutes=index),
+            }
+            if index < archived:
+                session.add(ArchivedJob(**values))
+                continue
+            session.add(Job(**values))
+            session.add(
+                GeneratedImage(
+                    user_id=DEFAULT_USER_ID,
+                    job_id=values["id"],
+                    file_path=f"generated/{values['id']}.png",
+                    width=512,
+                    height=512,
+                    file_size=1024,
+                    prompt=values["prompt"],
+                )
+            )
+        session.add(
+            UserStats(user_id=DEFAULT_USER_ID, job_count=count, image_count=count - archived)
+        )
+        await session.commit()
+
+
+class StatementCounter:
+    """Count the statements an engine executes while active."""
+
+    def __init__(self, engine):
+        self.engine = engine.sync_engine
+        self.statements: list[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    def __enter__(self) -> "StatementCounter":
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+@pytest.mark.parametrize("count", [30, 120])
+async def test_list_jobs_statement_count_is_constant(
+    async_engine, session_maker, client: AsyncClient, count: int
+):
+    """A page takes the same statements however many jobs, images and archived jobs exist."""
+    await seed_jobs(session_maker, count, archived=count - 10)
+
+    # The newest 10 jobs are live and the rest archived, so page 1 reads both tables
+    with StatementCounter(async_engine) as counter:
+        response = await client.get("/api/jobs", params={"page_size": 20})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == count
+    assert len(body["items"]) == 20
+    assert all(item["result_image_id"] for item in body["items"][:10])
+    assert len(counter.statements) == LIST_STATEMENTS, counter.statements
+
+
+async def test_list_jobs_by_cursor_statement_count(
+    async_engine, session_maker, client: AsyncClient
+):
+    """A cursor page also takes one key query, then loads only the tables its rows are in."""
+    await seed_jobs(session_maker, 60, archived=50)
+    first = (await client.get("/api/jobs", params={"page_size": 20})).json()
+
+    with StatementCounter(async_engine) as counter:
+        response = await client.get(
+            "/api/jobs", params={"page_size": 20, "cursor": first["next_cursor"]}
+        )
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [
+        f"job-{index:04d}" for index in range(39, 19, -1)
+    ]
+    # Only archived jobs are on the second page
+    assert len(counter.statements) == LIST_STATEMENTS - 1, counter.statements
@@ -0,0 +1,41 @@
+"""Quota reserved by the job creation endpoints."""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.api.deps import DEFAULT_USER_ID
+from src.services import quota_service
+from src.services.quota_service import QuotaService
+
+
+@pytest.fixture
+def quota(monkeypatch, session_maker: async_sessionmaker[AsyncSession]) -> QuotaService:
+    """Quota service on the test database, used by the app's requests."""
+    service = QuotaService(session_maker)
+    monkeypatch.setattr(quota_service, "_quota_service", service)
+    return service
+
+
+@pytest.mark.parametrize(
+    ("path", "body"),
+    [
+        ("/api/jobs", {"type": "text2img", "prompt": "a lighthouse"}),
+        ("/api/jobs/batch", {"matrix": {"prompts": ["a", "b"], "seeds": [1, 2]}}),
+    ],
+)
+async def test_failed_commit_refunds_quota(
+    monkeypatch, quota: QuotaService, client: AsyncClient, path: str, body: dict
+):
+    """Quota reserved for jobs that were never committed is given back."""
+    await quota.reserve(DEFAULT_USER_ID)
+
+    async def failing_commit(self: AsyncSession) -> None:
+        raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(AsyncSession, "commit", failing_commit)
+    with pytest.raises(OperationalError):
+        await client.post(path, json=body)
+
+    assert await quota.get_usage(DEFAULT_USER_ID) == 1
@@ -0,0 +1,40 @@
+"""Job timing statistics."""
+
+import json
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.api.deps import DEFAULT_USER_ID
+from src.models import ArchivedJob, Job
+from src.services.job_stats_service import JobStatsService
+
+
+async def test_timing_stats_include_archived_jobs(
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    """Profiled jobs count towards the stats whether or not they were archived."""
+    completed_at = datetime.now(UTC) - timedelta(hours=1)
+    async with session_maker() as session:
+        for model, inference in [(Job, 2.0), (ArchivedJob, 4.0), (ArchivedJob, 6.0)]:
+            session.add(
+                model(
+                    user_id=DEFAULT_USER_ID,
+                    type="text2img",
+                    status="completed",
+                    prompt="a harbour at dusk",
+                    model="sdxl",
+                    timings_json=json.dumps({"inference": inference}),
+                    created_at=completed_at - timedelta(seconds=inference),
+                    completed_at=completed_at,
+                )
+            )
+        await session.commit()
+
+    async with session_maker() as session:
+        [stats] = await JobStatsService(session).get_timing_stats(days=1)
+        assert stats.jobs == 3
+        assert stats.phases["inference"].max == 6.0
+
+        [recent] = await JobStatsService(session).get_timing_stats(days=1, limit=2)
+        assert recent.jobs == 2
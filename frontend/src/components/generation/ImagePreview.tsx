@@ -19,7 +19,8 @@ export default function ImagePreview({ imageId, prompt }: ImagePreviewProps) {
       const url = window.URL.createObjectURL(blob);
       const a = document.createElement('a');
       a.href = url;
-      a.download = `imageplayground_${imageId}.png`;
+      const extension = blob.type.split('/')[1]?.replace('jpeg', 'jpg') || 'png';
+      a.download = `imageplayground_${imageId}.${extension}`;
       document.body.appendChild(a);
       a.click();
       window.URL.revokeObjectURL(url);
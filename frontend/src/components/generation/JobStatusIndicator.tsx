@@ -30,6 +30,12 @@ const STATUS_CONFIG = {
     bgColor: 'bg-red-50',
     icon: 'X',
   },
+  cancelled: {
+    label: '취소됨',
+    color: 'text-gray-600',
+    bgColor: 'bg-gray-50',
+    icon: '-',
+  },
 };
 
 export default function JobStatusIndicator({ status, errorMessage }: JobStatusIndicatorProps) {
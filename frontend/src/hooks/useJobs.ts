@@ -1,6 +1,9 @@
+import { useEffect, useState } from "react";
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import api from "../services/api";
-import type { Job, JobStatus, PaginatedResponse } from "../types";
+import type { Job, JobEvent, JobStatus, PaginatedResponse } from "../types";
+
+const TERMINAL_STATUSES: JobStatus[] = ["completed", "failed", "cancelled"];
 
 interface CreateJobParams {
   type: "text2img" | "img2img" | "inpaint";
@@ -47,11 +50,44 @@ export function useCreateJob() {
   });
 }
 
-// Get single job with polling
+// Get single job, updated by server-sent events with polling as a fallback
 export function useJob(
   jobId: string | null,
   options?: { enabled?: boolean; refetchInterval?: number | false },
 ) {
+  const queryClient = useQueryClient();
+  const [isStreaming, setIsStreaming] = useState(false);
+  const enabled = !!jobId && options?.enabled !== false;
+
+  useEffect(() => {
+    if (!enabled || typeof EventSource === "undefined") return;
+
+    const source = new EventSource(`${api.defaults.baseURL}/jobs/${jobId}/events`);
+    source.onopen = () => setIsStreaming(true);
+    source.addEventListener("job", (message) => {
+      const event = JSON.parse((message as MessageEvent).data) as JobEvent;
+      queryClient.setQueryData<Job | null>(["job", jobId], (job) =>
+        job ? { ...job, ...event, id: job.id } : job,
+      );
+      if (TERMINAL_STATUSES.includes(event.status)) {
+        // Refetch once for the final job state and stop listening
+        queryClient.invalidateQueries({ queryKey: ["job", jobId] });
+        source.close();
+        setIsStreaming(false);
+      }
+    });
+    source.onerror = () => {
+      // Fall back to polling
+      source.close();
+      setIsStreaming(false);
+    };
+
+    return () => {
+      source.close();
+      setIsStreaming(false);
+    };
+  }, [enabled, jobId, queryClient]);
+
   return useQuery({
     queryKey: ["job", jobId],
     queryFn: async () => {
@@ -59,13 +95,17 @@ export function useJob(
       const response = await api.get(`/jobs/${jobId}`);
       return response.data as Job;
     },
-    enabled: !!jobId && options?.enabled !== false,
+    enabled,
     refetchInterval: (query) => {
       const data = query.state.data as Job | null;
-      // Stop polling when job is completed or failed
-      if (data?.status === "completed" || data?.status === "failed") {
+      // Stop polling when job is completed, failed or cancelled
+      if (data && TERMINAL_STATUSES.includes(data.status)) {
         return false;
       }
+      // Updates arrive over the event stream; poll only as a safety net
+      if (isStreaming) {
+        return 15000;
+      }
       return options?.refetchInterval ?? 2000; // Poll every 2 seconds
     },
   });
@@ -1,5 +1,5 @@
 // Job Types
-export type JobStatus = 'pending' | 'processing' | 'completed' | 'failed';
+export type JobStatus = 'pending' | 'processing' | 'completed' | 'failed' | 'cancelled';
 export type JobType = 'text2img' | 'img2img' | 'inpaint';
 
 export interface JobParameters {
@@ -44,6 +44,17 @@ export interface Job {
   completedAt?: string | null;
 }
 
+// Job state change pushed over /jobs/{id}/events
+export interface JobEvent {
+  job_id: string;
+  batch_id?: string | null;
+  status: JobStatus;
+  result_image_id?: string | null;
+  error_message?: string | null;
+  started_at?: string | null;
+  completed_at?: string | null;
+}
+
 export interface CreateJobRequest {
   type: JobType;
   prompt: string;